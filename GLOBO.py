@@ -1,98 +1,64 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import time
-import concurrent.futures
+"""
+Globoplay e g1 ao vivo -> lista1.m3u
 
-# Configurações do Chrome
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-gpu")
-options.add_argument("--window-size=1280,720")
-options.add_argument("--disable-infobars")
+Plugin do scraper_engine: as páginas abrem direto no player, então só é
+preciso clicar no poster de play. Roda sozinho (python GLOBO.py) ou junto
+com os outros sites (python scraper_engine.py).
+"""
 
-# URLs dos vídeos Globoplay
-globoplay_urls = [
-    "https://globoplay.globo.com/ao-vivo/7689934/",
-    "https://globoplay.globo.com/ao-vivo/7690141/",    
-    "https://globoplay.globo.com/v/12749215/",
-    "https://g1.globo.com/rr/roraima/video/ao-vivo-assista-o-jornal-de-roraima-1a-edicao-2923545-1739458038240.ghtml",
-    "https://g1.globo.com/sp/ribeirao-preto-franca/ao-vivo/bom-dia-cidade-ribeirao-preto.ghtml",  # Bom Dia Cidade Ribeirão Preto
-    "https://g1.globo.com/sp/ribeirao-preto-franca/ao-vivo/eptv1.ghtml",  # EPTV 1ª Edição - Ribeirão Preto
-    "https://g1.globo.com/sp/ribeirao-preto-franca/ao-vivo/eptv-2-ribeirao-e-franca-ao-vivo.ghtml",  # EPTV 2ª Edição - Ribeirão e Franca
-    "https://g1.globo.com/pe/petrolina-regiao/ao-vivo/ao-vivo-assista-ao-gr2.ghtml",  # GR2 - Petrolina
-    "https://g1.globo.com/ap/ao-vivo/assista-ao-bdap-desta-sexta-feira-7.ghtml",  # BDAP - Amapá
-    "https://globoplay.globo.com/v/1328766/",
-    "https://globoplay.globo.com/v/1467373/",  # Globoplay - Transmissão ao vivo
-    "https://globoplay.globo.com/v/4064559/",  # G1 ao vivo - Transmissão ao vivo
-    "https://globoplay.globo.com/v/5472979/",
-    "https://globoplay.globo.com/v/2135579/",  # G1 RS - Telejornais da RBS TV
-    "https://globoplay.globo.com/ao-vivo/5472979/",
-    "https://globoplay.globo.com/v/6120663/",  # G1 RS - Jornal da EPTV 1ª Edição - Ribeirão Preto
-    "https://globoplay.globo.com/v/2145544/",  # G1 SC - Telejornais da NSC TV
-    "https://globoplay.globo.com/v/4039160/",  # G1 CE - TV Verdes Mares ao vivo
-    "https://globoplay.globo.com/v/6329086/",  # Globo Esporte BA - Travessia Itaparica-Salvador ao vivo
-    "https://globoplay.globo.com/v/11999480/",  # G1 ES - Jornal Regional ao vivo
-    "https://g1.globo.com/al/alagoas/ao-vivo/assista-aos-telejornais-da-tv-gazeta-de-alagoas.ghtml",  # Telejornais da TV Gazeta de Alagoas
-    "https://globoplay.globo.com/ao-vivo/3667427/",  # Globoplay - Transmissão ao vivo
-    "https://globoplay.globo.com/v/4218681/",  # G1 Triângulo Mineiro - Transmissão ao vivo
-    "https://globoplay.globo.com/v/12945385/",  # Globoplay - Transmissão ao vivo
-    "https://globoplay.globo.com/v/3065772/",  # G1 MS - Transmissão ao vivo em MS
-    "https://globoplay.globo.com/v/2923579/",  # G1 AP - Telejornais da Rede Amazônica
-    "https://g1.globo.com/am/amazonas/ao-vivo/assista-aos-telejornais-da-rede-amazonica.ghtml",  # Telejornais da Rede Amazônica - Amazonas
-    "https://globoplay.globo.com/v/2923546/",  # G1 AC - Jornais da Rede Amazônica
-    "https://globoplay.globo.com/v/2168377/",  # Telejornais da TV Liberal
-    "https://globoplay.globo.com/v/992055/",  # G1 ao vivo - Transmissão ao vivo
-    "https://globoplay.globo.com/v/602497/",  # ge.globo - Transmissão ao vivo
-    "https://globoplay.globo.com/v/8713568/",  # Globo Esporte RS - Gauchão ao vivo
-    "https://globoplay.globo.com/v/10747444/",  # CBN SP - Transmissão ao vivo
-    "https://globoplay.globo.com/v/10740500/",  # CBN RJ - Transmissão ao vivo
-]
+from scraper_engine import SitePlugin, run_sites
 
-def extract_globoplay_data(url):
-    driver = webdriver.Chrome(options=options)
-    driver.get(url)
-    try:
-        play_button = driver.find_element(By.CSS_SELECTOR, "button.poster__play-wrapper")
-        if play_button:
-            play_button.click()
-            time.sleep(10)
-    except Exception:
-        pass
 
-    time.sleep(30)  # Espera a página carregar um pouco
+class GloboSite(SitePlugin):
+    name = 'globo'
+    output = 'lista1.m3u'
+    group_title = 'GLOBO AO VIVO'
+    write_header = False
+    max_per_domain = 2
+    steps = ('play',)
+    play_selectors = ("button.poster__play-wrapper",)
+    logo_keywords = ()   # qualquer .jpg da página serve de thumbnail
 
-    title = driver.title
-    log_entries = driver.execute_script("return window.performance.getEntriesByType('resource');")
-    m3u8_url = None
-    thumbnail_url = None
-    for entry in log_entries:
-        name = entry.get("name", "")
-        if not m3u8_url and ".m3u8" in name:
-            m3u8_url = name
-        if not thumbnail_url and ".jpg" in name:
-            thumbnail_url = name
+    # URLs dos vídeos Globoplay
+    urls = [
+        "https://globoplay.globo.com/ao-vivo/7689934/",
+        "https://globoplay.globo.com/ao-vivo/7690141/",    
+        "https://globoplay.globo.com/v/12749215/",
+        "https://g1.globo.com/rr/roraima/video/ao-vivo-assista-o-jornal-de-roraima-1a-edicao-2923545-1739458038240.ghtml",
+        "https://g1.globo.com/sp/ribeirao-preto-franca/ao-vivo/bom-dia-cidade-ribeirao-preto.ghtml",  # Bom Dia Cidade Ribeirão Preto
+        "https://g1.globo.com/sp/ribeirao-preto-franca/ao-vivo/eptv1.ghtml",  # EPTV 1ª Edição - Ribeirão Preto
+        "https://g1.globo.com/sp/ribeirao-preto-franca/ao-vivo/eptv-2-ribeirao-e-franca-ao-vivo.ghtml",  # EPTV 2ª Edição - Ribeirão e Franca
+        "https://g1.globo.com/pe/petrolina-regiao/ao-vivo/ao-vivo-assista-ao-gr2.ghtml",  # GR2 - Petrolina
+        "https://g1.globo.com/ap/ao-vivo/assista-ao-bdap-desta-sexta-feira-7.ghtml",  # BDAP - Amapá
+        "https://globoplay.globo.com/v/1328766/",
+        "https://globoplay.globo.com/v/1467373/",  # Globoplay - Transmissão ao vivo
+        "https://globoplay.globo.com/v/4064559/",  # G1 ao vivo - Transmissão ao vivo
+        "https://globoplay.globo.com/v/5472979/",
+        "https://globoplay.globo.com/v/2135579/",  # G1 RS - Telejornais da RBS TV
+        "https://globoplay.globo.com/ao-vivo/5472979/",
+        "https://globoplay.globo.com/v/6120663/",  # G1 RS - Jornal da EPTV 1ª Edição - Ribeirão Preto
+        "https://globoplay.globo.com/v/2145544/",  # G1 SC - Telejornais da NSC TV
+        "https://globoplay.globo.com/v/4039160/",  # G1 CE - TV Verdes Mares ao vivo
+        "https://globoplay.globo.com/v/6329086/",  # Globo Esporte BA - Travessia Itaparica-Salvador ao vivo
+        "https://globoplay.globo.com/v/11999480/",  # G1 ES - Jornal Regional ao vivo
+        "https://g1.globo.com/al/alagoas/ao-vivo/assista-aos-telejornais-da-tv-gazeta-de-alagoas.ghtml",  # Telejornais da TV Gazeta de Alagoas
+        "https://globoplay.globo.com/ao-vivo/3667427/",  # Globoplay - Transmissão ao vivo
+        "https://globoplay.globo.com/v/4218681/",  # G1 Triângulo Mineiro - Transmissão ao vivo
+        "https://globoplay.globo.com/v/12945385/",  # Globoplay - Transmissão ao vivo
+        "https://globoplay.globo.com/v/3065772/",  # G1 MS - Transmissão ao vivo em MS
+        "https://globoplay.globo.com/v/2923579/",  # G1 AP - Telejornais da Rede Amazônica
+        "https://g1.globo.com/am/amazonas/ao-vivo/assista-aos-telejornais-da-rede-amazonica.ghtml",  # Telejornais da Rede Amazônica - Amazonas
+        "https://globoplay.globo.com/v/2923546/",  # G1 AC - Jornais da Rede Amazônica
+        "https://globoplay.globo.com/v/2168377/",  # Telejornais da TV Liberal
+        "https://globoplay.globo.com/v/992055/",  # G1 ao vivo - Transmissão ao vivo
+        "https://globoplay.globo.com/v/602497/",  # ge.globo - Transmissão ao vivo
+        "https://globoplay.globo.com/v/8713568/",  # Globo Esporte RS - Gauchão ao vivo
+        "https://globoplay.globo.com/v/10747444/",  # CBN SP - Transmissão ao vivo
+        "https://globoplay.globo.com/v/10740500/",  # CBN RJ - Transmissão ao vivo
+    ]
 
-    driver.quit()
-    return title, m3u8_url, thumbnail_url
 
-# Gera o arquivo M3U
-with open("lista1.m3u", "w", encoding="utf-8") as output_file:
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-        future_to_url = {executor.submit(extract_globoplay_data, url): url for url in globoplay_urls}
-        for future in concurrent.futures.as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                title, m3u8_url, thumbnail_url = future.result()
-                if m3u8_url:
-                    output_file.write(f'#EXTINF:-1 tvg-logo="{thumbnail_url or ""}" group-title="GLOBO AO VIVO", {title}\n')
-                    output_file.write(f"{m3u8_url}\n")
-                    print(f"✅ Processado com sucesso: {url}")
-                else:
-                    print(f"⚠️ M3U8 não encontrado para {url}")
-            except Exception as e:
-                print(f"❌ Erro ao processar {url}: {e}")
-
-print("\n🎉 Arquivo lista1.m3u gerado com sucesso!")
+SITE = GloboSite
 
+if __name__ == "__main__":
+    run_sites([GloboSite()])
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark do epg_matcher.py: casa N canais de playlist contra M ids de EPG
+sintéticos e mede o tempo de montagem do índice, o tempo de casamento e a
+precisão (quantos canais casaram com o id de onde foram derivados).
+
+Os nomes da playlist são variações dos nomes do EPG como as que aparecem nas
+listas reais: sufixos de qualidade, "TV" a mais ou a menos, caixa, acentos,
+sem o país no tvg-id e erros de digitação.
+
+Uso: python benchmarks/bench_epg_matcher.py [--epg 100000] [--channels 20000] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import unicodedata
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from epg_matcher import EpgMatcher, match_channels
+from m3u_tokenizer import Channel
+
+SYLLABLES = ('ba', 'be', 'bra', 'ca', 'co', 'cri', 'da', 'de', 'do', 'fa', 'fo', 'ga', 'glo', 'ja',
+             'la', 'li', 'lo', 'ma', 'me', 'mi', 'na', 'no', 'pa', 'pe', 'ra', 're', 'ri', 'sa',
+             'se', 'si', 'ta', 'te', 'ti', 'va', 've', 'vi', 'xa', 'za', 'nor', 'sul', 'ter')
+REGIONS = ('Bahia', 'São Paulo', 'Rio', 'Minas', 'Norte', 'Sul', 'Lisboa', 'Porto', 'Madrid',
+           'Catalunya', 'London', 'Paris', 'Berlin', 'Roma', 'Milano', 'Kids', 'News', 'Sports',
+           'Movies', 'Música', 'Documentários', 'Internacional', 'Premium', '2', '3', '24')
+COUNTRIES = ('br', 'pt', 'es', 'uk', 'fr', 'de', 'it', 'us', 'mx', 'ar')
+
+
+def build_epg(count, rng):
+    channels = []
+    seen = set()
+    while len(channels) < count:
+        brand = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        region = rng.choice(REGIONS)
+        country = rng.choice(COUNTRIES)
+        display = f'{brand} {region}'
+        epg_id = f"{brand}{region.replace(' ', '')}.{country}"
+        # O mesmo nome em dois países não teria como ser desempatado pelo nome
+        if display in seen:
+            continue
+        seen.add(display)
+        channels.append((epg_id, [display, f'{display} HD']))
+    return channels
+
+
+def strip_accents(text):
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def typo(text, rng):
+    if len(text) < 6:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def derive_channel(epg_id, display, rng):
+    """Canal de playlist com tvg-id ausente ou diferente do id do EPG."""
+    name = display
+    variant = rng.random()
+    if variant < 0.25:
+        name = f'{name} {rng.choice(("HD", "FHD", "4K", "(720p)"))}'
+    elif variant < 0.45:
+        name = f'TV {name}'
+    elif variant < 0.6:
+        name = strip_accents(name).upper()
+    elif variant < 0.75:
+        name = typo(name, rng)
+    tvg_id = rng.choice(('', name.replace(' ', ''), epg_id.split('.')[0]))
+    attrs = {'tvg-id': tvg_id, 'tvg-name': name, 'group-title': 'Teste'}
+    return Channel('-1', attrs, name, f'http://example.com/{epg_id}.m3u8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--epg', type=int, default=100000)
+    parser.add_argument('--channels', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    epg = build_epg(args.epg, rng)
+    sources = rng.sample(epg, args.channels)
+    channels = [derive_channel(epg_id, names[0], rng) for epg_id, names in sources]
+
+    t0 = time.perf_counter()
+    matcher = EpgMatcher(epg)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matches = match_channels(channels, matcher)
+    match_s = time.perf_counter() - t0
+
+    expected = {id(ch): epg_id for ch, (epg_id, _) in zip(channels, sources)}
+    correct = sum(1 for ch, epg_id, _ in matches if expected[id(ch)] == epg_id)
+    result = {
+        'epg_ids': len(epg),
+        'documents': len(matcher),
+        'channels': len(channels),
+        'build_seconds': round(build_s, 2),
+        'match_seconds': round(match_s, 2),
+        'matched': len(matches),
+        'correct': correct,
+        'precision': round(correct / len(matches), 4) if matches else None,
+        'recall': round(correct / len(channels), 4),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"índice: {result['epg_ids']} ids ({result['documents']} nomes) em {result['build_seconds']} s")
+    print(f"casamento: {result['channels']} canais em {result['match_seconds']} s, "
+          f"{result['matched']} casados, {result['correct']} corretos "
+          f"(precisão {result['precision']}, revocação {result['recall']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos caminhos de mesclagem de EPG sobre XMLTV sintético servido por
+HTTP local: 'epg jun.py' (merge_epg_data), o consolidador de 'epg e listas
+juntas.py' (passthrough e ElementTree) e o EPGProcessor de corrijaepglista.py.
+
+Cada execução roda num subprocesso próprio, com cache HTTP vazio, para medir
+tempo total (download + descompressão + mesclagem + escrita) e pico de RSS
+isoladamente. O resultado em JSON inclui o commit e pode ser comparado com um
+resultado anterior via --compare.
+
+Uso: python benchmarks/bench_epg_pipeline.py [--scales 1000,10000] [--json saida.json]
+"""
+
+import argparse
+import functools
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from xmltv_synth import write_sources
+
+PATHS = ('epg_jun', 'consolidator', 'consolidator_et', 'epgprocessor')
+DEFAULT_DATA_DIR = os.path.join(REPO_DIR, '.cache', 'bench')
+
+
+def _load_script(filename):
+    """Importa um script do repositório cujo nome não é um identificador válido."""
+    spec = importlib.util.spec_from_file_location(
+        os.path.splitext(filename)[0].replace(' ', '_'), os.path.join(REPO_DIR, filename)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- Caminhos medidos (executados dentro do subprocesso) ---
+
+def _run_epg_jun(urls, work_dir):
+    module = _load_script('epg jun.py')
+    data = [module.download_epg_data(url).iter_chunks() for url in urls]
+    merged = module.merge_epg_data(data)
+    with open(os.path.join(work_dir, 'EPG.xml.gz'), 'wb') as f:
+        f.write(module.compress_epg(merged))
+
+
+def _run_consolidator(urls, work_dir, passthrough=True):
+    module = _load_script('epg e listas juntas.py')
+    consolidator = module.M3uEpgConsolidator(past_hours=None, future_days=None, passthrough=passthrough)
+    consolidator.consolidate_epgs(urls, os.path.join(work_dir, 'EPG.xml.gz'))
+
+
+def _run_epgprocessor(urls, work_dir):
+    module = _load_script('corrijaepglista.py')
+    module.EPGProcessor().download_and_parse_epgs(set(urls))
+
+
+RUNNERS = {
+    'epg_jun': _run_epg_jun,
+    'consolidator': _run_consolidator,
+    'consolidator_et': functools.partial(_run_consolidator, passthrough=False),
+    'epgprocessor': _run_epgprocessor,
+}
+
+
+def peak_rss_mb():
+    """
+    Pico de RSS deste processo. No Linux usa VmHWM, que começa do zero no exec;
+    ru_maxrss herdaria o pico do processo pai de antes do fork.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+
+
+def run_child(path, urls, work_dir):
+    t0 = time.perf_counter()
+    RUNNERS[path](urls, work_dir)
+    print(json.dumps({'seconds': time.perf_counter() - t0, 'peak_rss_mb': peak_rss_mb()}))
+
+
+# --- Orquestração (processo pai) ---
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(path, urls):
+    """Roda um caminho num subprocesso e devolve (segundos, pico de RSS em MB)."""
+    with tempfile.TemporaryDirectory(prefix='bench-epg-') as work_dir:
+        env = dict(os.environ, HTTP_CACHE_DIR=os.path.join(work_dir, 'http'))
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', path, '--work-dir', work_dir, *urls],
+            cwd=work_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        if proc.returncode != 0:
+            # Os logs dos scripts também vão para o stderr: só o final interessa (o traceback)
+            stderr = proc.stderr.decode('utf-8', 'replace').strip().splitlines()[-20:]
+            raise RuntimeError(f"{path} terminou com código {proc.returncode}:\n" + "\n".join(stderr))
+        # O JSON do filho é a última linha; as anteriores são os prints dos scripts
+        result = json.loads(proc.stdout.decode('utf-8', 'replace').strip().splitlines()[-1])
+        return result['seconds'], result['peak_rss_mb']
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    results = []
+    for channels in args.scales:
+        data_dir = os.path.join(args.data_dir, f'c{channels}-p{args.programmes_per_channel}-s{args.sources}')
+        print(f"Gerando/reutilizando {channels} canais em {data_dir}...", file=sys.stderr)
+        manifest = write_sources(data_dir, channels, args.programmes_per_channel, args.sources,
+                                 seed=args.seed, compressions=args.compressions)
+        raw_bytes = sum(s['raw_bytes'] for s in manifest['sources'])
+        elements = sum(s['channels'] + s['programmes'] for s in manifest['sources'])
+        server = start_server(data_dir)
+        base_url = f'http://127.0.0.1:{server.server_address[1]}/'
+        try:
+            for compression in args.compressions:
+                urls = [base_url + s['files'][compression] for s in manifest['sources']]
+                compressed_bytes = sum(s['sizes'][compression] for s in manifest['sources'])
+                for path in args.paths:
+                    best = None
+                    for _ in range(args.repeat):
+                        seconds, rss = measure(path, urls)
+                        if best is None or seconds < best[0]:
+                            best = (seconds, rss)
+                    seconds, rss = best
+                    result = {
+                        'path': path,
+                        'channels': channels,
+                        'programmes': sum(s['programmes'] for s in manifest['sources']),
+                        'compression': compression,
+                        'input_mb': round(raw_bytes / (1024 * 1024), 2),
+                        'download_mb': round(compressed_bytes / (1024 * 1024), 2),
+                        'seconds': round(seconds, 3),
+                        'mb_per_s': round(raw_bytes / (1024 * 1024) / seconds, 2),
+                        'elements_per_s': round(elements / seconds),
+                        'peak_rss_mb': round(rss, 1),
+                    }
+                    results.append(result)
+                    print(f"  {path:<16} {channels:>7} canais  {compression:<3} {result['seconds']:>8.2f} s  "
+                          f"{result['mb_per_s']:>7.1f} MB/s  {result['elements_per_s']:>9,} elem/s  "
+                          f"RSS {result['peak_rss_mb']:>7.1f} MB", file=sys.stderr)
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def compare(results, baseline_path):
+    """Imprime a variação de tempo e memória em relação a um resultado anterior."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    key = lambda r: (r['path'], r['channels'], r['compression'])
+    previous = {key(r): r for r in baseline['results']}
+    print(f"\nComparação com {baseline.get('commit') or baseline_path}:", file=sys.stderr)
+    for r in results:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+        print(f"  {r['path']:<16} {r['channels']:>7} {r['compression']:<3} "
+              f"tempo {r['seconds'] / old['seconds'] - 1:+7.1%}  "
+              f"RSS {r['peak_rss_mb'] / old['peak_rss_mb'] - 1:+7.1%}", file=sys.stderr)
+
+
+def _csv(type_):
+    return lambda value: [type_(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=_csv(int), default=[1000, 10000],
+                        help='quantidades de canais, separadas por vírgula (ex.: 1000,10000,100000)')
+    parser.add_argument('--programmes-per-channel', type=int, default=48)
+    parser.add_argument('--sources', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--compressions', type=_csv(str), default=['xml', 'gz', 'xz'])
+    parser.add_argument('--paths', type=_csv(str), default=list(PATHS))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--json', help='grava o resultado neste arquivo (padrão: stdout)')
+    parser.add_argument('--compare', help='resultado JSON anterior para comparar')
+    parser.add_argument('--child', choices=PATHS, help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    parser.add_argument('urls', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.urls, args.work_dir)
+        return
+
+    unknown = set(args.paths) - set(PATHS)
+    if unknown:
+        parser.error(f"caminhos desconhecidos: {', '.join(sorted(unknown))}")
+
+    results = run_benchmarks(args)
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'params': {
+            'programmes_per_channel': args.programmes_per_channel,
+            'sources': args.sources,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
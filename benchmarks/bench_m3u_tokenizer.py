@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parsing de playlists: compara o M3UProcessor antigo (um
+re.search por atributo e um dict por canal com cópia da linha original) com
+o tokenizador de m3u_tokenizer.py e os registros Channel com __slots__.
+
+Mede tempo e a memória retida pelos canais (tracemalloc, numa passada
+separada para não distorcer o tempo) sobre output/PLAYLIST.m3u e uma
+playlist sintética de 1M entradas.
+
+Uso: python benchmarks/bench_m3u_tokenizer.py [--entries N] [--playlist ARQ] [--json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from m3u_tokenizer import epg_urls_from_attrs, iter_playlist
+
+GROUPS = ('Notícias', 'Desporto', 'Filmes', 'Séries', 'Infantil', 'Música', 'Documentários', 'Variedades')
+LOGO_HOSTS = ('https://logos.example.com', 'https://i.imgur.com', 'https://cdn.tv.example.pt')
+
+
+def build_playlist(entries, seed=42):
+    rng = random.Random(seed)
+    lines = ['#EXTM3U url-tvg="https://epg.example.com/a.xml.gz,https://epg.example.com/b.xml.xz"']
+    for i in range(entries):
+        lines.append(
+            f'#EXTINF:-1 tvg-id="canal{i}.pt" tvg-name="Canal {i}" '
+            f'tvg-logo="{rng.choice(LOGO_HOSTS)}/{i % 500}.png" group-title="{rng.choice(GROUPS)}",Canal {i} HD'
+        )
+        if i % 10 == 0:
+            lines.append('#EXTVLCOPT:http-user-agent=Mozilla/5.0')
+        lines.append(f'https://stream{i % 50}.example.com/live/{i}/index.m3u8')
+    return '\n'.join(lines) + '\n'
+
+
+def parse_legacy(content):
+    """Reprodução do M3UProcessor._parse_m3u_content original (só tvg-id, tvg-name, nome e URL)."""
+    epg_urls = set()
+    channels = []
+    lines = content.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith('#EXTM3U'):
+            match_xtvg = re.search(r'x-tvg-url="([^"]+)"', line)
+            match_urltvg = re.search(r'url-tvg="([^"]+)"', line)
+            if match_xtvg:
+                epg_urls.update(match_xtvg.group(1).split(','))
+            if match_urltvg:
+                epg_urls.update(match_urltvg.group(1).split(','))
+        elif line.startswith('#EXTINF'):
+            channel_info = {}
+            channel_info['original_line'] = line
+            match_tvg_id = re.search(r'tvg-id="([^"]*)"', line)
+            channel_info['tvg-id'] = match_tvg_id.group(1) if match_tvg_id else ''
+            match_tvg_name = re.search(r'tvg-name="([^"]*)"', line)
+            channel_info['tvg-name'] = match_tvg_name.group(1) if match_tvg_name else ''
+            match_name = re.search(r',([^,]+)$', line)
+            channel_info['name'] = match_name.group(1).strip() if match_name else ''
+            channel_info['url'] = lines[i + 1].strip() if i + 1 < len(lines) else ''
+            channels.append(channel_info)
+    return epg_urls, channels
+
+
+def parse_legacy_full(content):
+    """O parser antigo estendido para também ler tvg-logo e group-title, como o tokenizador."""
+    epg_urls, channels = parse_legacy(content)
+    for channel_info in channels:
+        line = channel_info['original_line']
+        match_logo = re.search(r'tvg-logo="([^"]*)"', line)
+        channel_info['tvg-logo'] = match_logo.group(1) if match_logo else ''
+        match_group = re.search(r'group-title="([^"]*)"', line)
+        channel_info['group-title'] = match_group.group(1) if match_group else ''
+    return epg_urls, channels
+
+
+def parse_tokenizer(content):
+    epg_urls = set()
+    channels = []
+    for kind, item in iter_playlist(content.splitlines()):
+        if kind == 'header':
+            epg_urls.update(epg_urls_from_attrs(item))
+        else:
+            channels.append(item)
+    return epg_urls, channels
+
+
+def measure(func, content, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        _, channels = func(content)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+        count = len(channels)
+        del channels
+
+    # Memória retida pelo resultado (sem contar o texto de entrada)
+    gc.collect()
+    tracemalloc.start()
+    result = func(content)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        'seconds': round(best, 4),
+        'entries_per_s': round(count / best),
+        'entries': count,
+        'retained_mb': round(retained / (1024 * 1024), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=1_000_000)
+    parser.add_argument('--playlist', default=os.path.join(REPO_DIR, 'output', 'PLAYLIST.m3u'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    inputs = []
+    if os.path.exists(args.playlist):
+        with open(args.playlist, 'r', encoding='utf-8', errors='ignore') as f:
+            inputs.append((os.path.basename(args.playlist), f.read()))
+    inputs.append((f'sintética ({args.entries:,} entradas)', build_playlist(args.entries)))
+
+    report = []
+    for label, content in inputs:
+        for name, func in (('legacy', parse_legacy), ('legacy_full', parse_legacy_full),
+                           ('tokenizer', parse_tokenizer)):
+            result = measure(func, content, args.repeat)
+            result.update({'input': label, 'parser': name,
+                           'input_mb': round(len(content.encode('utf-8')) / (1024 * 1024), 2)})
+            report.append(result)
+
+    if args.json:
+        print(json.dumps({'results': report}, indent=2))
+        return
+    for r in report:
+        print(f"{r['input']:<32} {r['parser']:<11} {r['seconds']:>8.3f} s  "
+              f"{r['entries_per_s']:>10,} entradas/s  retido {r['retained_mb']:>8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
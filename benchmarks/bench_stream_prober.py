@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark do stream_prober.py contra um servidor HTTP local que simula os
+comportamentos comuns de servidores de IPTV: stream ok, HEAD recusado (405),
+redirecionamento, conexão derrubada no HEAD, 404, exigência de User-Agent e
+respostas lentas. Os hosts variam entre 127.0.0.1 e 127.0.0.N para exercitar
+o limite por host.
+
+Confere se cada URL recebeu o estado esperado e mede a vazão.
+
+Uso: python benchmarks/bench_stream_prober.py [--urls 10000] [--hosts 50] [--latency 0.05] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from stream_prober import StreamProber, build_health_index
+
+# (caminho, estado esperado, peso)
+BEHAVIOURS = (
+    ('ok', 'ok', 60),
+    ('no-head', 'ok', 10),
+    ('redirect', 'ok', 10),
+    ('drop-head', 'ok', 5),
+    ('need-ua', 'ok', 5),
+    ('missing', 'dead', 8),
+    ('slow', 'error', 2),
+)
+SPECIAL_UA = 'JCTV-Player/1.0'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    timeout_sleep = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, headers=(), body=b''):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self.close_connection = True
+
+    def _handle(self):
+        time.sleep(self.latency)
+        kind = self.path.split('/')[1]
+        if kind == 'ok':
+            self._reply(200, [('Content-Type', 'application/vnd.apple.mpegurl')], b'#EXTM3U\n')
+        elif kind == 'no-head' and self.command == 'HEAD':
+            self._reply(405)
+        elif kind == 'drop-head' and self.command == 'HEAD':
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+        elif kind == 'redirect':
+            self._reply(302, [('Location', '/ok' + self.path[len('/redirect'):])])
+        elif kind == 'need-ua' and self.headers.get('User-Agent') != SPECIAL_UA:
+            self._reply(403)
+        elif kind == 'missing':
+            self._reply(404)
+        elif kind == 'slow':
+            time.sleep(self.timeout_sleep)
+            self._reply(200)
+        else:
+            status = 206 if self.headers.get('Range') else 200
+            self._reply(status, [('Content-Type', 'video/mp2t')], b'\x47' * 188)
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # O cliente desiste das respostas lentas por timeout; o BrokenPipe é esperado
+        pass
+
+
+def build_playlist(path, port, urls, hosts, seed=42):
+    rng = random.Random(seed)
+    population = [(kind, expected) for kind, expected, weight in BEHAVIOURS for _ in range(weight)]
+    expected = {}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#EXTM3U\n')
+        for i in range(urls):
+            kind, state = rng.choice(population)
+            url = f'http://127.0.0.{1 + i % hosts}:{port}/{kind}/{i}/index.m3u8'
+            f.write(f'#EXTINF:-1 tvg-id="canal{i}.pt" group-title="Teste",Canal {i}\n')
+            if kind == 'need-ua':
+                f.write(f'#EXTVLCOPT:http-user-agent={SPECIAL_UA}\n')
+            f.write(url + '\n')
+            expected[url] = state
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--urls', type=int, default=10000)
+    parser.add_argument('--hosts', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05, help='atraso simulado por resposta (s)')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    Handler.latency = args.latency
+    Handler.timeout_sleep = args.timeout * 2
+    server = QuietServer(('0.0.0.0', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        playlist = os.path.join(tmp, 'bench.m3u')
+        expected = build_playlist(playlist, server.server_address[1], args.urls, args.hosts)
+        prober = StreamProber(args.concurrency, args.per_host, args.timeout)
+        health = build_health_index([playlist], prober)
+    server.shutdown()
+
+    wrong = [e for e in health['entries'] if e['status'] != expected[e['url']]]
+    result = {
+        'urls': args.urls,
+        'hosts': args.hosts,
+        'concurrency': args.concurrency,
+        'per_host': args.per_host,
+        'seconds': health['seconds'],
+        'urls_per_s': round(args.urls / health['seconds']) if health['seconds'] else None,
+        'summary': health['summary'],
+        'wrong': len(wrong),
+        'wrong_examples': wrong[:5],
+    }
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(f"{result['urls']} URLs em {result['hosts']} hosts: {result['seconds']} s "
+              f"({result['urls_per_s']} URLs/s), {result['summary']}, {result['wrong']} com estado inesperado")
+        for e in result['wrong_examples']:
+            print(f"  ❌ {e['url']}: {e['status']} ({e.get('http_status')}, {e.get('error')})")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == '__main__':
+    main()
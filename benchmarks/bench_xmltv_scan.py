@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark da varredura XMLTV: compara o caminho com ElementTree (parse +
+ET.tostring por elemento), a varredura de bytes em modo passthrough
+(iter_xmltv_raw) e a mesclagem antiga por regex do 'epg jun.py' (que não lê
+atributos, portanto não consegue filtrar nem deduplicar).
+
+Uso: python benchmarks/bench_xmltv_scan.py [--channels N] [--programmes-per-channel N]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xmltv_stream import CHUNK_SIZE, iter_xmltv_elements, iter_xmltv_raw
+
+
+def build_xmltv(channels, programmes_per_channel):
+    parts = ['<?xml version="1.0" encoding="utf-8"?>\n<tv generator-info-name="bench">\n']
+    for c in range(channels):
+        parts.append(
+            f'  <channel id="canal{c}.br">\n'
+            f'    <display-name lang="pt">Canal {c}</display-name>\n'
+            f'    <icon src="https://logos.example.com/{c}.png" />\n'
+            f'  </channel>\n'
+        )
+    for c in range(channels):
+        for p in range(programmes_per_channel):
+            hour = p % 24
+            parts.append(
+                f'  <programme start="202610{17 + p // 24:02d}{hour:02d}0000 +0000" '
+                f'stop="202610{17 + p // 24:02d}{hour:02d}5900 +0000" channel="canal{c}.br">\n'
+                f'    <title lang="pt">Programa {p} &amp; cia</title>\n'
+                f'    <desc lang="pt">Descrição do programa {p} do canal {c}.</desc>\n'
+                f'  </programme>\n'
+            )
+    parts.append('</tv>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def chunked(data):
+    for i in range(0, len(data), CHUNK_SIZE):
+        yield data[i:i + CHUNK_SIZE]
+
+
+def run_et(data):
+    out = 0
+    count = 0
+    for _, elem in iter_xmltv_elements(chunked(data)):
+        elem.tail = None
+        out += len(ET.tostring(elem, encoding='utf-8'))
+        count += 1
+    return count, out
+
+
+def run_raw(data):
+    out = 0
+    count = 0
+    for _, _, raw in iter_xmltv_raw(chunked(data)):
+        out += len(raw)
+        count += 1
+    return count, out
+
+
+def run_regex_legacy(data):
+    """Reprodução da mesclagem antiga: decode + re.findall + concatenação de str, sem atributos."""
+    epg_xml = data.decode('utf-8')
+    merged_xml = '<tv>\n'
+    channels = re.findall(r'<channel.+?</channel>', epg_xml, re.DOTALL)
+    programmes = re.findall(r'<programme.+?</programme>', epg_xml, re.DOTALL)
+    for channel in channels:
+        merged_xml += channel + '\n'
+    for programme in programmes:
+        merged_xml += programme + '\n'
+    merged_xml += '</tv>'
+    return len(channels) + len(programmes), len(merged_xml)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--channels', type=int, default=2000)
+    parser.add_argument('--programmes-per-channel', type=int, default=48)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    data = build_xmltv(args.channels, args.programmes_per_channel)
+    size_mb = len(data) / (1024 * 1024)
+    results = []
+    for name, func in (('et', run_et), ('raw', run_raw), ('regex_legacy', run_regex_legacy)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            count, _ = func(data)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({
+            'path': name,
+            'seconds': round(best, 4),
+            'mb_per_s': round(size_mb / best, 2),
+            'elements_per_s': round(count / best),
+            'elements': count,
+        })
+
+    if args.json:
+        print(json.dumps({'input_mb': round(size_mb, 2), 'results': results}, indent=2))
+        return
+    print(f"Entrada: {size_mb:.1f} MB de XMLTV sintético")
+    for r in results:
+        print(f"  {r['path']:<13} {r['seconds']:>8.3f} s  {r['mb_per_s']:>8.1f} MB/s  "
+              f"{r['elements_per_s']:>10,} elementos/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Gerador determinístico de XMLTV sintético para os benchmarks.
+
+As fontes são gravadas em streaming (a memória não cresce com o tamanho) e
+dividem os canais em faixas que se sobrepõem, de modo que a mesclagem tenha
+canais repetidos e programas duplicados para descartar. A mesma semente gera
+sempre os mesmos bytes, então os resultados são comparáveis entre commits.
+
+Uso: python benchmarks/xmltv_synth.py DIR [--channels N] [--programmes-per-channel N]
+"""
+
+import argparse
+import gzip
+import json
+import lzma
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+MANIFEST_NAME = 'manifest.json'
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DURATIONS_MIN = (15, 30, 30, 45, 60, 60, 60, 90, 120)
+WRITE_BATCH = 512
+COMPRESSIONS = ('xml', 'gz', 'xz')
+
+_WORDS = ('jornal', 'novela', 'futebol', 'filme', 'série', 'debate', 'música', 'culinária',
+          'documentário', 'desenho', 'esporte', 'notícias', 'show', 'viagem', 'ciência')
+
+
+def _open_output(path, compression):
+    if compression == 'gz':
+        # mtime=0 deixa o arquivo .gz idêntico entre execuções
+        return gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0)
+    if compression == 'xz':
+        return lzma.open(path, 'wb', preset=6)
+    return open(path, 'wb')
+
+
+def _channel_ranges(channels, sources, overlap):
+    """Faixas [início, fim) de canais por fonte, cada uma invadindo `overlap` da seguinte."""
+    size = -(-channels // sources)
+    extra = int(size * overlap)
+    return [(i * size, min(channels, (i + 1) * size + extra)) for i in range(sources)]
+
+
+def _iter_source(rng, first, last, programmes_per_channel):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n<tv generator-info-name="xmltv_synth">\n'
+    for c in range(first, last):
+        yield (f'  <channel id="canal{c}.br">\n'
+               f'    <display-name lang="pt">Canal {c}</display-name>\n'
+               f'    <icon src="https://logos{c % 7}.example.com/{c}.png" />\n'
+               f'  </channel>\n')
+    fmt = '%Y%m%d%H%M%S +0000'
+    for c in range(first, last):
+        # A grade de cada canal depende só do canal: fontes sobrepostas repetem os programas
+        channel_rng = random.Random(c)
+        when = BASE_TIME + timedelta(minutes=channel_rng.choice(DURATIONS_MIN))
+        for p in range(programmes_per_channel):
+            stop = when + timedelta(minutes=channel_rng.choice(DURATIONS_MIN))
+            title = ' '.join(channel_rng.sample(_WORDS, 2)).capitalize()
+            yield (f'  <programme start="{when.strftime(fmt)}" stop="{stop.strftime(fmt)}" '
+                   f'channel="canal{c}.br">\n'
+                   f'    <title lang="pt">{title} &amp; cia</title>\n'
+                   f'    <desc lang="pt">Episódio {p} de {title.lower()} no canal {c}, '
+                   f'edição {rng.randrange(1000)}.</desc>\n'
+                   f'  </programme>\n')
+            when = stop
+    yield '</tv>\n'
+
+
+def write_sources(out_dir, channels, programmes_per_channel, sources=3, overlap=0.1, seed=42,
+                  compressions=COMPRESSIONS):
+    """
+    Grava as fontes em `out_dir` (source<i>.xml / .xml.gz / .xml.xz) e devolve o
+    manifesto com a contagem de elementos e o tamanho de cada arquivo.
+
+    Se o manifesto já existir com os mesmos parâmetros, os arquivos são reutilizados.
+    """
+    params = {
+        'channels': channels,
+        'programmes_per_channel': programmes_per_channel,
+        'sources': sources,
+        'overlap': overlap,
+        'seed': seed,
+        'compressions': list(compressions),
+    }
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['params'] == params and all(
+            os.path.exists(os.path.join(out_dir, name))
+            for source in manifest['sources'] for name in source['files'].values()
+        ):
+            return manifest
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {'params': params, 'sources': []}
+    for i, (first, last) in enumerate(_channel_ranges(channels, sources, overlap)):
+        files = {}
+        raw_bytes = 0
+        for compression in compressions:
+            name = f'source{i}.xml' + ('' if compression == 'xml' else '.' + compression)
+            # Cada variante recomeça a semente, logo todas têm o mesmo XML
+            rng = random.Random(seed * 1000 + i)
+            raw_bytes = 0
+            batch = []
+            with _open_output(os.path.join(out_dir, name), compression) as f:
+                for part in _iter_source(rng, first, last, programmes_per_channel):
+                    batch.append(part)
+                    if len(batch) >= WRITE_BATCH:
+                        data = ''.join(batch).encode('utf-8')
+                        raw_bytes += len(data)
+                        f.write(data)
+                        batch = []
+                data = ''.join(batch).encode('utf-8')
+                raw_bytes += len(data)
+                f.write(data)
+            files[compression] = name
+        manifest['sources'].append({
+            'channels': last - first,
+            'programmes': (last - first) * programmes_per_channel,
+            'raw_bytes': raw_bytes,
+            'files': files,
+            'sizes': {c: os.path.getsize(os.path.join(out_dir, n)) for c, n in files.items()},
+        })
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--channels', type=int, default=1000)
+    parser.add_argument('--programmes-per-channel', type=int, default=48)
+    parser.add_argument('--sources', type=int, default=3)
+    parser.add_argument('--overlap', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    manifest = write_sources(args.out_dir, args.channels, args.programmes_per_channel,
+                             args.sources, args.overlap, args.seed)
+    for source in manifest['sources']:
+        sizes = ', '.join(f"{c}={s / (1024 * 1024):.1f} MB" for c, s in source['sizes'].items())
+        print(f"{source['files']['xml']}: {source['channels']} canais, "
+              f"{source['programmes']} programas ({sizes})")
+
+
+if __name__ == '__main__':
+    main()
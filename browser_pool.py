@@ -0,0 +1,173 @@
+"""
+Pool de navegadores headless compartilhado pelos scrapers Selenium.
+
+Abrir um Chrome custa segundos de CPU e centenas de MB; os scrapers abriam um
+por URL. O pool mantém até `size` navegadores vivos e empresta um por vez a
+cada página. Na devolução o navegador ganha uma aba nova (as antigas são
+fechadas) e, com `reset`, os cookies e o storage da origem visitada são
+apagados, então uma página não herda o estado da anterior. O cache HTTP do
+navegador é mantido: scripts e players das mesmas origens não são baixados
+de novo.
+
+Antes de cada empréstimo o navegador é testado; um que travou ou caiu é
+encerrado e substituído. Depois de `max_uses` páginas ele é reiniciado de
+qualquer forma, para não acumular memória.
+
+    pool = DriverPool(options, size=2)
+    with pool.driver() as driver:
+        driver.get(url)
+    pool.close()
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+
+POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 2))
+MAX_USES = 50
+PAGE_LOAD_TIMEOUT = 60
+
+HIDE_WEBDRIVER_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+class DriverPool:
+    """
+    Navegadores Chrome reaproveitados entre páginas.
+
+    `options` são as Options do Chrome de cada scraper. Com `hide_webdriver`,
+    navigator.webdriver é escondido em todos os documentos abertos na aba.
+    Os navegadores só são abertos quando pedidos pela primeira vez.
+    """
+
+    def __init__(self, options, size=POOL_SIZE, max_uses=MAX_USES, reset=True,
+                 hide_webdriver=False, page_load_timeout=PAGE_LOAD_TIMEOUT):
+        self.options = options
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.reset = reset
+        self.hide_webdriver = hide_webdriver
+        self.page_load_timeout = page_load_timeout
+        self.started = 0
+        self.restarted = 0
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = []  # [(driver, usos)]
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self):
+        driver = webdriver.Chrome(options=self.options)
+        try:
+            driver.set_page_load_timeout(self.page_load_timeout)
+            self._prepare_tab(driver)
+        except Exception:
+            self._quit(driver)
+            raise
+        with self._lock:
+            self.started += 1
+        return driver
+
+    def _prepare_tab(self, driver):
+        if not self.hide_webdriver:
+            return
+        try:
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': HIDE_WEBDRIVER_JS})
+        except Exception:
+            # Sem CDP vale só para o documento atual, como o execute_script feito à mão
+            driver.execute_script(HIDE_WEBDRIVER_JS)
+
+    @staticmethod
+    def _alive(driver):
+        try:
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _recycle(self, driver):
+        """Troca a aba usada por uma nova e limpa o estado deixado pela página."""
+        origin = None
+        if self.reset:
+            try:
+                origin = driver.execute_script('return window.location.origin;')
+            except Exception:
+                pass
+        old_handles = driver.window_handles
+        driver.switch_to.new_window('tab')
+        new_handle = driver.current_window_handle
+        for handle in old_handles:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(new_handle)
+        if self.reset:
+            try:
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+                if origin and origin.startswith('http'):
+                    driver.execute_cdp_cmd('Storage.clearDataForOrigin',
+                                           {'origin': origin, 'storageTypes': 'all'})
+            except Exception:
+                driver.delete_all_cookies()
+        self._prepare_tab(driver)
+
+    def _acquire(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('pool de navegadores fechado')
+            driver, uses = self._idle.pop() if self._idle else (None, 0)
+        if driver is not None and not self._alive(driver):
+            print("♻️ Navegador do pool não responde; abrindo outro")
+            self._quit(driver)
+            driver = None
+            with self._lock:
+                self.restarted += 1
+        if driver is None:
+            driver, uses = self._start(), 0
+        return driver, uses
+
+    def _release(self, driver, uses):
+        keep = not self._closed and uses < self.max_uses and self._alive(driver)
+        if keep:
+            try:
+                self._recycle(driver)
+            except Exception as e:
+                print(f"♻️ Navegador do pool descartado ao limpar a aba: {e}")
+                keep = False
+        with self._lock:
+            if keep and not self._closed:
+                self._idle.append((driver, uses))
+                return
+        self._quit(driver)
+
+    @contextmanager
+    def driver(self):
+        """Empresta um navegador; bloqueia enquanto todos estiverem em uso."""
+        self._slots.acquire()
+        try:
+            driver, uses = self._acquire()
+            try:
+                yield driver
+            finally:
+                self._release(driver, uses + 1)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Encerra os navegadores ociosos; os emprestados são encerrados na devolução."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._quit(driver)
@@ -1,13 +1,21 @@
+import argparse
 import logging
-import re
 import os
+import re
+import tempfile
 import requests
-import gzip
 import lzma
+import zlib
 import xml.etree.ElementTree as ET
-from tqdm import tqdm
+from collections import Counter, deque
 from typing import List, Dict
 
+from epg_matcher import DEFAULT_THRESHOLD, EpgMatcher, match_channels
+from http_cache import download
+from m3u_dedup import canonical_url, extinf_index, iter_blocks
+from m3u_tokenizer import Channel, epg_urls_from_attrs, iter_playlist
+from xmltv_stream import XMLTVScanError, iter_decompressed, iter_xmltv_raw
+
 # =========================================================
 # CONFIGURAÇÃO DE LOGGING
 # =========================================================
@@ -22,7 +30,7 @@ class M3UProcessor:
     def __init__(self, m3u_path: str):
         self.m3u_path = m3u_path
         self.epg_urls: set[str] = set()
-        self.channels: List[Dict] = []
+        self.channels: List[Channel] = []
 
     def load_m3u(self) -> bool:
         try:
@@ -39,179 +47,345 @@ class M3UProcessor:
             return False
 
     def _parse_m3u_content(self, m3u_content: str):
-        lines = m3u_content.splitlines()
-        for i, line in enumerate(lines):
-            if line.startswith('#EXTM3U'):
-                match_xtvg = re.search(r'x-tvg-url="([^"]+)"', line)
-                match_urltvg = re.search(r'url-tvg="([^"]+)"', line)
-                if match_xtvg:
-                    self.epg_urls.update(match_xtvg.group(1).split(','))
-                if match_urltvg:
-                    self.epg_urls.update(match_urltvg.group(1).split(','))
-            elif line.startswith('#EXTINF'):
-                channel_info = {}
-                channel_info['original_line'] = line
-
-                match_tvg_id = re.search(r'tvg-id="([^"]*)"', line)
-                channel_info['tvg-id'] = match_tvg_id.group(1) if match_tvg_id else ''
-
-                match_tvg_name = re.search(r'tvg-name="([^"]*)"', line)
-                channel_info['tvg-name'] = match_tvg_name.group(1) if match_tvg_name else ''
-
-                match_name = re.search(r',([^,]+)$', line)
-                channel_info['name'] = match_name.group(1).strip() if match_name else ''
-
-                if i + 1 < len(lines):
-                    channel_info['url'] = lines[i + 1].strip()
-                else:
-                    channel_info['url'] = ''
-                self.channels.append(channel_info)
+        # Uma única varredura por linha (m3u_tokenizer) em vez de um re.search por atributo
+        for kind, item in iter_playlist(m3u_content.splitlines()):
+            if kind == 'header':
+                self.epg_urls.update(epg_urls_from_attrs(item))
+            else:
+                self.channels.append(item)
 
 
 # =========================================================
 # CLASSE M3UUpdater – atualiza o arquivo M3U ORIGINAL
 # =========================================================
 class M3UUpdater:
-    def __init__(self, m3u_path: str, channels: List[Dict]):
-        self.m3u_path = m3u_path
-        self.channels = channels
-
-    def update_m3u(self, original_m3u_content: str) -> bool:
-        try:
-            logging.info(f"Iniciando a atualização do arquivo M3U: {self.m3u_path}")
-
-            updated_lines = []
-            m3u_lines = original_m3u_content.splitlines()
-            channel_index = 0
-            vlc_opts_added = set()  # Para controlar se já adicionamos os #EXTVLCOPT
-
-            # Log para verificar se o conteúdo foi carregado
-            logging.debug(f"Conteúdo original do M3U carregado com {len(m3u_lines)} linhas.")
+    """
+    Aplica ao arquivo M3U o estado desejado dos canais, entrada por entrada.
 
-            for i, line in enumerate(m3u_lines):
-                if line.startswith("#EXTINF"):
-                    if channel_index < len(self.channels):
-                        ch = self.channels[channel_index]
+    As entradas são casadas pela identidade (tvg-id + URL canônica) e, se o
+    tvg-id mudou, só pela URL canônica quando ela é única; a posição na lista
+    não importa. Entradas repetidas com a mesma identidade são casadas por
+    ocorrência, na ordem (a 1ª do arquivo com o 1º canal, e assim por diante).
+    Entradas cujos campos não mudaram são copiadas byte a byte; nas que mudaram
+    só o atributo alterado é trocado na linha #EXTINF. O arquivo só é regravado
+    (arquivo temporário + rename atômico) quando algo realmente mudou.
 
-                        # Log para verificar se estamos atualizando o canal corretamente
-                        logging.debug(f"Atualizando canal: {ch['name']} com URL: {ch['url']}")
+    `tvg_id_renames` troca a tvg-id das entradas com a identidade dada
+    ({(tvg-id, URL canônica): nova tvg-id}), mesmo quando a URL se repete.
+    """
 
-                        updated_lines.append(ch["original_line"])  # Linha original
-                        updated_lines.append(ch["url"])  # URL do canal
-                        channel_index += 1
+    USER_AGENT_OPT = "#EXTVLCOPT:http-user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.97 Safari/537.36 CrKey/1.44.191160"
 
-                        # Adiciona #EXTVLCOPT apenas uma vez
-                        if ch["url"] not in vlc_opts_added:
-                            updated_lines.append("#EXTVLCOPT:http-user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.97 Safari/537.36 CrKey/1.44.191160")
-                            vlc_opts_added.add(ch["url"])
-
-                else:
-                    # Mantém cabeçalho e comentários
-                    if not line.startswith("http"):
-                        updated_lines.append(line)
-
-            # Se não encontramos canais, log de erro
-            if channel_index == 0:
+    def __init__(self, m3u_path: str, channels: List[Channel], tvg_id_renames: Dict[tuple, str] = None):
+        self.m3u_path = m3u_path
+        self.channels = channels
+        self.tvg_id_renames = tvg_id_renames or {}
+        self.diff: Dict[str, int] = {}
+
+    @staticmethod
+    def identity(channel: Channel) -> tuple:
+        return channel.tvg_id, canonical_url(channel.url)
+
+    @staticmethod
+    def with_tvg_id(channel: Channel, tvg_id: str) -> Channel:
+        return Channel(channel.duration, {**channel.attrs, "tvg-id": tvg_id}, channel.name, channel.url)
+
+    @staticmethod
+    def fields(channel: Channel) -> tuple:
+        return channel.duration, channel.attrs, channel.name
+
+    def _match(self, entries):
+        """
+        Canal desejado de cada entrada (ou None). Primeiro pela identidade,
+        consumindo os canais repetidos em ordem; depois, para as que sobraram,
+        pela URL canônica quando ela é de um canal só e ele ainda não foi usado.
+        """
+        by_identity = {}
+        by_url = {}
+        for ch in self.channels:
+            key = self.identity(ch)
+            by_identity.setdefault(key, deque()).append(ch)
+            # URL repetida com tvg-ids diferentes não serve para casar sozinha
+            by_url[key[1]] = ch if key[1] not in by_url else None
+
+        wanted = [None] * len(entries)
+        used = set()
+        for n, channel in enumerate(entries):
+            queue = by_identity.get(self.identity(channel))
+            if queue:
+                wanted[n] = queue.popleft()
+                used.add(id(wanted[n]))
+        for n, channel in enumerate(entries):
+            if wanted[n] is None:
+                candidate = by_url.get(canonical_url(channel.url))
+                if candidate is not None and id(candidate) not in used:
+                    wanted[n] = candidate
+                    used.add(id(candidate))
+        return wanted
+
+    @staticmethod
+    def _patch_extinf(line: str, current: Channel, wanted: Channel) -> str:
+        """
+        Linha #EXTINF com os atributos alterados trocados no lugar, mantendo a
+        ordem e a grafia dos demais. Duração ou nome diferentes, ou atributos
+        fora do formato key="valor", fazem a linha ser reconstruída.
+        """
+        text = line.rstrip("\r\n")
+        ending = line[len(text):] or "\n"
+        if (current.duration, current.name) != (wanted.duration, wanted.name):
+            return wanted.extinf_line() + ending
+        old, new = current.attrs, wanted.attrs
+        for key in list(old) + [k for k in new if k not in old]:
+            value = new.get(key, "")
+            if old.get(key, "") == value:
+                continue
+            pattern = re.compile(r'(?<=[\s,])' + re.escape(key) + r'="[^"]*"')
+            if pattern.search(text):
+                text = pattern.sub(lambda m: f'{key}="{value}"', text, count=1)
+                continue
+            end = text.rfind('",')
+            if not value or end == -1:
+                return wanted.extinf_line() + ending
+            text = f'{text[:end + 1]} {key}="{value}"{text[end + 1:]}'
+        return text + ending
+
+    def _render(self, current: Channel, block: List[str], wanted: Channel) -> List[str]:
+        """
+        Linhas da entrada no estado desejado. O que não mudou (linha #EXTINF, URL,
+        opções como #EXTVLCOPT) é mantido com os bytes originais; a opção de
+        User-Agent só é acrescentada quando a URL muda.
+        """
+        same_fields = self.fields(wanted) == self.fields(current)
+        if same_fields and wanted.url == current.url:
+            return block
+        # Diretivas antes do #EXTINF (#KODIPROP) ficam onde estão
+        i = extinf_index(block)
+        extinf = block[i] if same_fields else self._patch_extinf(block[i], current, wanted)
+        if wanted.url == current.url:
+            return [*block[:i], extinf, *block[i + 1:]]
+        options = {}
+        for line in block[i + 1:-1]:
+            if line.strip():
+                options.setdefault(line.strip(), line)
+        if self.USER_AGENT_OPT not in options:
+            options = {opt: line for opt, line in options.items() if not opt.startswith("#EXTVLCOPT:http-user-agent=")}
+            options[self.USER_AGENT_OPT] = self.USER_AGENT_OPT + "\n"
+        return [*block[:i], extinf, *options.values(), wanted.url + "\n"]
+
+    def update_m3u(self, original_m3u_content: str = None) -> bool:
+        """
+        Atualiza o arquivo e devolve True se ele foi regravado. O tamanho da
+        diferença fica em self.diff (entradas e linhas alteradas, bytes).
+        """
+        try:
+            logging.info(f"Iniciando a atualização do arquivo M3U: {self.m3u_path}")
+            if original_m3u_content is None:
+                with open(self.m3u_path, "r", encoding="utf-8", errors="surrogateescape", newline="") as f:
+                    original_m3u_content = f.read()
+
+            blocks = list(iter_blocks(original_m3u_content.splitlines(keepends=True)))
+            matches = iter(self._match([channel for channel, _ in blocks if channel is not None]))
+            new_parts = []
+            entries = matched = changed_entries = changed_lines = 0
+
+            for channel, block in blocks:
+                if channel is not None:
+                    entries += 1
+                    key = self.identity(channel)
+                    wanted = next(matches)
+                    new_tvg_id = self.tvg_id_renames.get(key)
+                    if new_tvg_id is not None:
+                        wanted = self.with_tvg_id(wanted or channel, new_tvg_id)
+                    if wanted is not None:
+                        matched += 1
+                        new_block = self._render(channel, block, wanted)
+                        if new_block is not block:
+                            changed_entries += 1
+                            old_lines = Counter(line.strip() for line in block)
+                            new_lines = Counter(line.strip() for line in new_block)
+                            changed_lines += sum(((old_lines - new_lines) + (new_lines - old_lines)).values())
+                            logging.debug(f"Entrada alterada: {wanted.name} ({wanted.url})")
+                            block = new_block
+                new_parts.append("".join(block).encode("utf-8", "surrogateescape"))
+
+            if entries == 0:
                 logging.error(f"Nenhum canal encontrado para atualizar no arquivo M3U!")
 
-            # Sobrescreve o arquivo original apenas se houver atualizações
-            if updated_lines:
-                with open(self.m3u_path, "w", encoding="utf-8") as f:
-                    f.write("\n".join(updated_lines) + "\n")
-                logging.info(f"✅ Arquivo M3U atualizado com sucesso: {self.m3u_path}")
-                return True
-            else:
-                logging.warning(f"Nenhuma atualização foi feita no arquivo M3U.")
+            new_size = sum(len(part) for part in new_parts)
+            self.diff = {
+                "entries": entries,
+                "matched": matched,
+                "changed_entries": changed_entries,
+                "changed_lines": changed_lines,
+                "bytes_before": len(original_m3u_content.encode("utf-8", "surrogateescape")),
+                "bytes_after": new_size,
+            }
+
+            if changed_entries == 0:
+                logging.info(f"M3U sem alterações ({entries} entradas), arquivo não foi regravado: {self.m3u_path}")
                 return False
 
+            directory = os.path.dirname(os.path.abspath(self.m3u_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".m3u-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.writelines(new_parts)
+                if os.path.exists(self.m3u_path):
+                    os.chmod(tmp_path, os.stat(self.m3u_path).st_mode & 0o777)
+                os.replace(tmp_path, self.m3u_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            logging.info(
+                f"✅ Arquivo M3U atualizado: {self.m3u_path} ({changed_entries}/{entries} entradas, "
+                f"{changed_lines} linhas alteradas, {self.diff['bytes_before']} -> {new_size} bytes)"
+            )
+            return True
+
         except Exception as e:
             logging.error(f"Erro ao atualizar o arquivo M3U: {e}")
             return False
 
 
 # =========================================================
-# CLASSE EPGProcessor – baixa, descomprime e parseia EPGs XML
+# CLASSE EPGProcessor – baixa e lê os canais dos EPGs em streaming
 # =========================================================
-class EPGProcessor:
-    def __init__(self, temp_dir: str = '/tmp'):
-        self.temp_dir = temp_dir
-        os.makedirs(self.temp_dir, exist_ok=True)
+class EpgChannel:
+    """O que o casamento precisa de um <channel> do EPG: id, nomes exibidos e ícone."""
 
-    def download_and_parse_epgs(self, epg_urls: set[str]) -> Dict[str, str]:
-        all_epg_data = {}
+    __slots__ = ('id', 'names', 'icon')
+
+    def __init__(self, id: str, names: tuple = (), icon: str = None):
+        self.id = id
+        self.names = names
+        self.icon = icon
+
+    @classmethod
+    def from_xml(cls, tvg_id: str, raw: bytes) -> 'EpgChannel':
+        try:
+            elem = ET.fromstring(raw)
+        except ET.ParseError:
+            return cls(tvg_id)
+        names = tuple(dict.fromkeys(
+            (dn.text or '').strip() for dn in elem.iter('display-name') if (dn.text or '').strip()
+        ))
+        icon = elem.find('icon')
+        return cls(tvg_id, names, icon.get('src') if icon is not None else None)
+
+    def merge(self, other: 'EpgChannel'):
+        """Junta os nomes de outra fonte; o primeiro ícone encontrado é mantido."""
+        self.names = tuple(dict.fromkeys(self.names + other.names))
+        self.icon = self.icon or other.icon
+
+
+class EPGProcessor:
+    """
+    Lê os canais dos EPGs sem arquivos temporários: os bytes do cache HTTP
+    passam pela descompressão incremental (gzip/xz, detectada pelos bytes
+    iniciais) direto para a varredura de <channel>. Os <programme> são pulados
+    sem montar árvore e de cada canal só fica um EpgChannel, então a memória
+    cresce com o número de canais e não com o tamanho do arquivo.
+    """
+
+    def download_and_parse_epgs(self, epg_urls: set[str]) -> Dict[str, EpgChannel]:
+        all_epg_data: Dict[str, EpgChannel] = {}
         for url in epg_urls:
-            filename = os.path.basename(url).split('?')[0]
-            download_path = os.path.join(self.temp_dir, filename)
-            decompressed_path = download_path
-
-            if self._download_file(url, download_path):
-                if filename.endswith('.gz'):
-                    decompressed_path = os.path.join(self.temp_dir, filename.replace('.gz', ''))
-                    if self._decompress_gz(download_path, decompressed_path):
-                        all_epg_data.update(self._parse_epg_file(decompressed_path))
-                elif filename.endswith('.xz'):
-                    decompressed_path = os.path.join(self.temp_dir, filename.replace('.xz', ''))
-                    if self._decompress_xz(download_path, decompressed_path):
-                        all_epg_data.update(self._parse_epg_file(decompressed_path))
-                else:
-                    all_epg_data.update(self._parse_epg_file(download_path))
-
-                # Limpa arquivos temporários
-                if os.path.exists(download_path):
-                    os.remove(download_path)
-                if os.path.exists(decompressed_path) and decompressed_path != download_path:
-                    os.remove(decompressed_path)
+            cached = self._download_file(url)
+            if cached is None:
+                continue
+            count = 0
+            try:
+                for channel in self._iter_channels(cached.iter_chunks()):
+                    count += 1
+                    known = all_epg_data.get(channel.id)
+                    if known is None:
+                        all_epg_data[channel.id] = channel
+                    else:
+                        known.merge(channel)
+                logging.info(f"EPG lido com sucesso: {url} ({count} canais)")
+            except (XMLTVScanError, zlib.error, lzma.LZMAError, EOFError) as e:
+                logging.error(f"Erro ao ler o EPG {url} (mantidos {count} canais): {e}")
         return all_epg_data
 
-    def _download_file(self, url: str, output_path: str) -> bool:
+    def _download_file(self, url: str):
+        """Baixa via cache HTTP compartilhado; o conteúdo é lido em blocos do arquivo do cache."""
         try:
-            response = requests.get(url, stream=True, timeout=60)
-            response.raise_for_status()
-            total_size = int(response.headers.get('content-length', 0))
-            with open(output_path, 'wb') as f, tqdm(
-                total=total_size, unit='B', unit_scale=True, desc=os.path.basename(output_path)
-            ) as pbar:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        pbar.update(len(chunk))
-            logging.info(f"Arquivo baixado com sucesso: {output_path}")
-            return True
+            cached = download(url, timeout=60)
+            origem = "cache (304)" if cached.from_cache else "rede"
+            logging.info(f"Arquivo obtido da {origem}: {url} ({cached.size} bytes)")
+            return cached
         except requests.exceptions.RequestException as e:
             logging.error(f"Erro ao baixar o arquivo {url}: {e}")
-            return False
+            return None
 
-    def _decompress_gz(self, input_path: str, output_path: str) -> bool:
-        try:
-            with gzip.open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
-                f_out.write(f_in.read())
-            logging.info(f"Arquivo .gz descomprimido: {output_path}")
-            return True
-        except Exception as e:
-            logging.error(f"Erro ao descomprimir .gz {input_path}: {e}")
-            return False
+    @staticmethod
+    def _iter_channels(chunks):
+        for tag, attrs, raw in iter_xmltv_raw(iter_decompressed(chunks)):
+            if tag == 'channel' and attrs.get('id'):
+                yield EpgChannel.from_xml(attrs['id'], raw)
 
-    def _decompress_xz(self, input_path: str, output_path: str) -> bool:
-        try:
-            with lzma.open(input_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
-                f_out.write(f_in.read())
-            logging.info(f"Arquivo .xz descomprimido: {output_path}")
-            return True
-        except Exception as e:
-            logging.error(f"Erro ao descomprimir .xz {input_path}: {e}")
-            return False
 
-    def _parse_epg_file(self, epg_path: str) -> Dict[str, str]:
-        epg_data = {}
-        try:
-            tree = ET.parse(epg_path)
-            root = tree.getroot()
-
-            for channel_elem in root.findall(".//channel"):
-                tvg_id = channel_elem.get("id")
-                if tvg_id:
-                    epg_data[tvg_id] = channel_elem
-            logging.info(f"EPG parseado com sucesso: {epg_path}")
-        except Exception as e:
-            logging.error(f"Erro ao parsear o EPG {epg_path}: {e}")
-        return epg_data
+# =========================================================
+# EXECUÇÃO – corrige a tvg-id dos canais que não casam com o EPG
+# =========================================================
+DEFAULT_M3U_FILES = ["all.m3u"]
+DEFAULT_EPG_URLS = [
+    "https://github.com/LITUATUI/M3UPT/raw/main/EPG/epg-mitv-br.xml.gz",
+    "https://github.com/LITUATUI/M3UPT/raw/refs/heads/main/EPG/epg-pt.xml.gz",
+]
+
+
+def epg_channel_names(epg_data: Dict[str, EpgChannel]):
+    """(id, nomes) de cada canal do EPG, para o EpgMatcher."""
+    for channel in epg_data.values():
+        yield channel.id, channel.names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corrige a tvg-id dos canais das playlists pelo EPG")
+    parser.add_argument("playlists", nargs="*", default=DEFAULT_M3U_FILES)
+    parser.add_argument("--epg", action="append", default=None,
+                        help="URL de EPG (repetível); padrão: url-tvg das playlists ou a lista interna")
+    parser.add_argument("--limiar", type=float, default=DEFAULT_THRESHOLD,
+                        help="similaridade mínima (0 a 1) para aceitar um id do EPG")
+    parser.add_argument("--aplicar", action="store_true",
+                        help="grava as trocas nas playlists (sem isso só mostra o que mudaria)")
+    args = parser.parse_args()
+
+    processors = []
+    epg_urls = set(args.epg or [])
+    for path in args.playlists:
+        processor = M3UProcessor(path)
+        if processor.load_m3u():
+            processors.append(processor)
+            if not args.epg:
+                epg_urls.update(processor.epg_urls)
+    if not processors:
+        logging.error("Nenhuma playlist carregada.")
+        return
+    if not epg_urls:
+        epg_urls = set(DEFAULT_EPG_URLS)
+
+    epg_data = EPGProcessor().download_and_parse_epgs(epg_urls)
+    if not epg_data:
+        logging.error("Nenhum canal de EPG carregado.")
+        return
+    matcher = EpgMatcher(epg_channel_names(epg_data), threshold=args.limiar)
+    logging.info(f"Índice de EPG: {len(epg_data)} canais, {len(matcher)} nomes")
+
+    for processor in processors:
+        matches = match_channels(processor.channels, matcher)
+        renames = {}
+        for channel, epg_id, score in matches:
+            renames[M3UUpdater.identity(channel)] = epg_id
+            logging.info(f"{channel.name!r}: tvg-id {channel.tvg_id!r} -> {epg_id!r} ({score:.2f})")
+        logging.info(f"{processor.m3u_path}: {len(renames)} tvg-ids corrigidas de {len(processor.channels)} canais")
+        if renames and not args.aplicar:
+            logging.info(f"{processor.m3u_path}: simulação, nada gravado (use --aplicar para gravar)")
+        elif renames:
+            M3UUpdater(processor.m3u_path, [], tvg_id_renames=renames).update_m3u()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,41 +7,93 @@ Compatível com execução no GitHub Actions.
 
 import requests
 import gzip
+import hashlib
+import json
 import lzma
+import shutil
 import xml.etree.ElementTree as ET
-import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from datetime import datetime
 import os
-from io import BytesIO
-import tempfile
-import shutil
+
+from http_cache import HttpCache, download
+from m3u_merge import iter_merged_lines, write_lines
+from m3u_tokenizer import epg_urls_from_attrs, parse_extinf, parse_header
+from stream_health import HealthStore, iter_healthy_lines
+from parallel_compress import ParallelCompressWriter
+from xmltv_stream import (
+    XMLTV_FOOTER, XMLTV_HEADER, ProgrammeIndex, XMLTVScanError, iter_decompressed,
+    iter_xmltv_elements, iter_xmltv_raw, parse_xmltv_time,
+)
+
+
+
+def normalize_channel_id(channel_id):
+    """Forma canônica usada para casar tvg-id da playlist com ids do XMLTV."""
+    return channel_id.strip().casefold()
+
 
 class M3uEpgConsolidator:
-    def __init__(self):
+    def __init__(self, max_workers=4, max_per_host=2, past_hours=6, future_days=7, passthrough=True,
+                 compress_workers=None, xz_output=False, shard_dir=None, shard_window_step_hours=6):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.cache = HttpCache(session=self.session)
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
         self.failed_urls = []
         self.successful_urls = []
         self.processed_channels = {}
         self.total_programmes = 0
-        self.temp_xml_file = tempfile.mktemp(suffix=".xml")
+        self.programme_index = ProgrammeIndex()
+        self.channel_filter = None
+        # Janela de tempo dos programas mantidos (None desativa o limite). Com
+        # shards, o "agora" é arredondado para que execuções próximas reutilizem
+        # os mesmos shards; a janela passada fica entre past_hours e past_hours + step.
+        now = int(time.time())
+        if shard_dir:
+            step = shard_window_step_hours * 3600
+            now -= now % step
+        self.window_start = now - past_hours * 3600 if past_hours is not None else None
+        self.window_end = now + future_days * 86400 if future_days is not None else None
+        self.window_dropped = {}
+        # passthrough: copia os bytes originais dos elementos em vez de reserializar com ET
+        self.passthrough = passthrough
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.elements_in = 0
+        self.elements_out = 0
+        # Compressão em paralelo durante a mesclagem; xz_output grava também .xml.xz
+        self.compress_workers = compress_workers
+        self.xz_output = xz_output
+        self.output_file = None
+        self.output_tmp_paths = {}
+        # Shards por fonte: saída limpa de cada EPG, reutilizada enquanto a fonte não mudar
+        self.shard_dir = shard_dir
+        self.shard_writer = None
+        self.source_channels = []
+        self.shards_rebuilt = []
+        self.shards_reused = []
 
-    def extract_epg_urls_from_m3u_content(self, content):
-        """Extrai URLs de EPG do conteúdo M3U completo."""
+    def extract_epg_urls_from_m3u_lines(self, lines):
+        """Extrai URLs de EPG das linhas do M3U completo (lidas uma a uma)."""
         epg_urls = set()
         print("🔍 Procurando URLs de EPG no conteúdo M3U consolidado...")
 
-        pattern = r'#EXTM3U[^>]*?(?:url-tvg|x-tvg-url)="([^"]+)"'
-        match = re.search(pattern, content, re.IGNORECASE)
-
-        if match:
-            urls_string = match.group(1)
-            urls = [u.strip() for u in urls_string.split(',') if u.strip()]
-            epg_urls.update(urls)
+        for line in lines:
+            if line.startswith('#EXTM3U'):
+                epg_urls.update(epg_urls_from_attrs(parse_header(line)))
         
         valid_epg_urls = []
         for epg_url in epg_urls:
@@ -56,91 +108,362 @@ class M3uEpgConsolidator:
         print(f"  ✅ Encontradas {len(unique_urls)} URLs de EPG únicas e válidas.")
         return unique_urls
 
-    def download_epg(self, url):
+    def set_channel_filter_from_m3u(self, lines):
+        """
+        Restringe o EPG aos canais referenciados pela playlist: tvg-id de cada
+        #EXTINF e, como alias, o tvg-name (comparados sem diferenciar maiúsculas).
+        """
+        ids = set()
+        for line in lines:
+            if line.startswith('#EXTINF'):
+                for key, value in parse_extinf(line.rstrip('\n'))[1].items():
+                    if key in ('tvg-id', 'tvg-name') and value.strip():
+                        ids.add(normalize_channel_id(value))
+        if not ids:
+            print("  ⚠️ Nenhum tvg-id na playlist; o EPG não será filtrado.")
+            self.channel_filter = None
+            return
+        self.channel_filter = ids
+        print(f"  🎯 Filtro de EPG ativo: {len(ids)} ids/aliases de canais da playlist")
+
+    def _wanted(self, channel_id):
+        return self.channel_filter is None or (
+            channel_id is not None and normalize_channel_id(channel_id) in self.channel_filter
+        )
+
+    def _in_window(self, start_ts, stop_ts):
+        """Programas sem horário legível são mantidos."""
+        if start_ts is None:
+            return True
+        if self.window_end is not None and start_ts > self.window_end:
+            return False
+        end_ts = stop_ts if stop_ts is not None else start_ts
+        return self.window_start is None or end_ts >= self.window_start
+
+    def _count_bytes(self, chunks):
+        for chunk in chunks:
+            self.bytes_in += len(chunk)
+            yield chunk
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def fetch_epg(self, url):
+        """Baixa o EPG ainda comprimido para o cache em disco (executado em paralelo)."""
+        with self._host_semaphore(url):
+            return download(url, timeout=60, cache=self.cache)
+
+    def download_epg(self, url, future):
+        """Aguarda o download concorrente e devolve o CachedDownload (ou None em caso de erro)."""
         print(f"\n📅 Baixando EPG: {url}")
         try:
-            response = self.session.get(url, timeout=60)
-            response.raise_for_status()
-            content = response.content
-            if url.endswith('.gz'):
-                content = gzip.decompress(content)
-                print("  📜 Arquivo descomprimido (.gz)")
-            elif url.endswith('.xz'):
-                content = lzma.decompress(content)
-                print("  📜 Arquivo descomprimido (.xz)")
-            try:
-                xml_content = content.decode('utf-8')
-            except UnicodeDecodeError:
-                xml_content = content.decode('latin-1', errors='ignore')
-            if not xml_content.strip().startswith(('<', '<?xml')):
-                raise Exception("Conteúdo não parece ser XML")
-            self.successful_urls.append(url)
-            print("  ✅ EPG baixado com sucesso")
-            return xml_content
-        except Exception as e:
+            cached = future.result()
+        except requests.RequestException as e:
             print(f"  ❌ Erro ao baixar EPG: {e}")
             self.failed_urls.append(url)
             return None
+        except OSError as e:
+            # Falha ao gravar no cache (ex.: disco cheio) derruba só esta fonte
+            print(f"  ❌ Erro ao gravar EPG no cache: {e}")
+            self.failed_urls.append(url)
+            return None
+        self.successful_urls.append(url)
+        if cached.from_cache:
+            print("  ♻️ EPG não modificado (304), usando cópia do cache")
+        else:
+            print("  ✅ EPG baixado com sucesso")
+        return cached
+
+    @staticmethod
+    def xz_path_for(final_output_gz):
+        base = final_output_gz[:-3] if final_output_gz.endswith('.gz') else final_output_gz
+        return base + '.xz'
 
-    def process_epg_incremental(self, xml_content, source_url):
-        """Processa o conteúdo XML e associa erros à sua URL de origem."""
+    def _open_output(self, final_output_gz):
+        if self.output_file is None:
+            self.output_tmp_paths = {final_output_gz: final_output_gz + '.tmp'}
+            xz_tmp_path = None
+            if self.xz_output:
+                xz_path = self.xz_path_for(final_output_gz)
+                xz_tmp_path = self.output_tmp_paths[xz_path] = xz_path + '.tmp'
+            self.output_file = ParallelCompressWriter(
+                final_output_gz + '.tmp', xz_tmp_path, workers=self.compress_workers
+            )
+            self.output_file.write(XMLTV_HEADER)
+        return self.output_file
+
+    def _iter_elements(self, chunks):
+        """Gera (tag, atributos, conteúdo), onde conteúdo são bytes prontos ou um Element."""
+        if self.passthrough:
+            yield from iter_xmltv_raw(chunks)
+        else:
+            for tag, elem in iter_xmltv_elements(chunks):
+                yield tag, elem.attrib, elem
+
+    def process_epg_incremental(self, chunks, source_url, final_output_gz):
+        """
+        Processa o EPG elemento a elemento e associa erros à sua URL de origem.
+        Devolve True se a fonte foi lida até o fim sem erros.
+        """
+        self.source_channels = []
+        channels_count = 0
+        programmes_count = 0
+        dropped_count = 0
+        filtered_count = 0
+        window_count = 0
         try:
-            root = ET.fromstring(xml_content)
-            channels_count = 0
-            programmes_count = 0
-
-            if not os.path.exists(self.temp_xml_file):
-                with open(self.temp_xml_file, 'w', encoding='utf-8') as f:
-                    f.write('<?xml version="1.0" encoding="utf-8"?>\n<tv>\n')
-
-            with open(self.temp_xml_file, 'a', encoding='utf-8') as f:
-                for channel in root.findall('channel'):
-                    channel_id = channel.get('id')
-                    if channel_id and channel_id not in self.processed_channels:
-                        self.processed_channels[channel_id] = True
-                        channels_count += 1
-                        f.write('\t' + ET.tostring(channel, encoding='unicode') + '\n')
-
-                for programme in root.findall('programme'):
+            for tag, attrs, payload in self._iter_elements(self._count_bytes(chunks)):
+                self.elements_in += 1
+                if tag == 'channel':
+                    channel_id = attrs.get('id')
+                    if not self._wanted(channel_id):
+                        filtered_count += 1
+                        continue
+                    if not channel_id or channel_id in self.processed_channels:
+                        continue
+                    self.processed_channels[channel_id] = True
+                    self.source_channels.append(channel_id)
+                    channels_count += 1
+                else:
+                    if not self._wanted(attrs.get('channel')):
+                        filtered_count += 1
+                        continue
+                    start_ts = parse_xmltv_time(attrs.get('start'))
+                    stop_ts = parse_xmltv_time(attrs.get('stop'))
+                    if not self._in_window(start_ts, stop_ts):
+                        window_count += 1
+                        continue
+                    if not self.programme_index.accept_interval(attrs.get('channel'), start_ts, stop_ts):
+                        dropped_count += 1
+                        continue
                     programmes_count += 1
                     self.total_programmes += 1
-                    f.write('\t' + ET.tostring(programme, encoding='unicode') + '\n')
-            
-            print(f"  📊 Processado: {channels_count} canais novos, {programmes_count} programas")
+                if not isinstance(payload, bytes):
+                    payload.tail = None
+                    payload = ET.tostring(payload, encoding='utf-8')
+                data = b'\t' + payload + b'\n'
+                (self.shard_writer or self._open_output(final_output_gz)).write(data)
+                self.bytes_out += len(data)
+                self.elements_out += 1
+
+            print(f"  📊 Processado: {channels_count} canais novos, {programmes_count} programas "
+                  f"({dropped_count} duplicados/sobrepostos descartados)")
+            if self.channel_filter is not None:
+                print(f"  🎯 {filtered_count} elementos fora da playlist descartados")
+            if window_count:
+                print(f"  ⏱️ {window_count} programas fora da janela de tempo descartados")
+            return True
 
-        except ET.ParseError as e:
+        except (ET.ParseError, XMLTVScanError) as e:
             print(f"  ❌ Erro de Análise XML (EPG Inválido) na fonte: {source_url}")
             print(f"     Detalhe do erro: {e}")
+            print(f"     Elementos já gravados antes do erro: {channels_count} canais, {programmes_count} programas")
             if source_url not in self.failed_urls:
                 self.failed_urls.append(source_url)
         except Exception as e:
             print(f"  ❌ Ocorreu um erro inesperado ao processar a fonte {source_url}: {e}")
             if source_url not in self.failed_urls:
                 self.failed_urls.append(source_url)
+        finally:
+            self.programme_index.end_source()
+            self.window_dropped[source_url] = window_count
+        return False
+
+    def _shard_key(self, content_sha256, previous_key):
+        """
+        Chave do shard: conteúdo da fonte + chave do shard anterior (canais e
+        programas já aceitos influenciam esta fonte) + configuração da mesclagem.
+        """
+        config = {
+            'version': 2,
+            'content': content_sha256,
+            'previous': previous_key,
+            'filter': (hashlib.sha256('\n'.join(sorted(self.channel_filter)).encode('utf-8')).hexdigest()
+                       if self.channel_filter is not None else None),
+            'window': [self.window_start, self.window_end],
+            'passthrough': self.passthrough,
+            'xz': self.xz_output,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _shard_paths(self, key):
+        paths = {'gz': os.path.join(self.shard_dir, key + '.xml.gz')}
+        if self.xz_output:
+            paths['xz'] = os.path.join(self.shard_dir, key + '.xml.xz')
+        paths['state'] = os.path.join(self.shard_dir, key + '.json.gz')
+        return paths
+
+    def _reuse_shard(self, url, paths):
+        with gzip.open(paths['state'], 'rt', encoding='utf-8') as f:
+            state = json.load(f)
+        for channel_id in state['channels']:
+            self.processed_channels[channel_id] = True
+        self.programme_index.add_intervals(state['intervals'])
+        self.total_programmes += state['programmes']
+        # Os contadores do relatório somam a fonte como se ela tivesse sido relida
+        self.elements_in += state['elements_in']
+        self.elements_out += state['elements_out']
+        self.bytes_in += state['bytes_in']
+        self.bytes_out += state['bytes_out']
+        self.shards_reused.append(url)
+        print(f"  ♻️ Fonte inalterada: shard reutilizado ({len(state['channels'])} canais novos, "
+              f"{state['programmes']} programas)")
+        return state['elements_out']
+
+    def _build_shard(self, url, cached, paths):
+        """Processa a fonte gravando num shard próprio; devolve (elementos, shard reutilizável)."""
+        tmp_paths = {kind: path + '.tmp' for kind, path in paths.items()}
+        programmes_before = self.total_programmes
+        elements_before = self.elements_out
+        elements_in_before = self.elements_in
+        bytes_in_before = self.bytes_in
+        bytes_out_before = self.bytes_out
+        self.programme_index.start_journal()
+        self.shard_writer = ParallelCompressWriter(
+            tmp_paths['gz'], tmp_paths.get('xz'), workers=self.compress_workers
+        )
+        try:
+            ok = self.process_epg_incremental(iter_decompressed(cached.iter_chunks()), url, None)
+            self.shard_writer.close()
+        except BaseException:
+            self.shard_writer.abort()
+            for kind in ('gz', 'xz'):
+                if kind in tmp_paths and os.path.exists(tmp_paths[kind]):
+                    os.remove(tmp_paths[kind])
+            raise
+        finally:
+            self.shard_writer = None
+            journal = self.programme_index.take_journal()
+
+        state = {
+            'url': url,
+            'channels': self.source_channels,
+            'intervals': journal,
+            'programmes': self.total_programmes - programmes_before,
+            'elements_out': self.elements_out - elements_before,
+            'elements_in': self.elements_in - elements_in_before,
+            'bytes_in': self.bytes_in - bytes_in_before,
+            'bytes_out': self.bytes_out - bytes_out_before,
+        }
+        with gzip.open(tmp_paths['state'], 'wt', encoding='utf-8') as f:
+            json.dump(state, f)
+        if ok:
+            # Fontes com erro não são reaproveitadas: na próxima execução são reprocessadas
+            for kind, path in paths.items():
+                os.replace(tmp_paths[kind], path)
+            self.shards_rebuilt.append(url)
+            return state['elements_out'], paths
+        return state['elements_out'], tmp_paths
+
+    def _assemble_shards(self, shards, final_output_gz):
+        """Concatena os membros gzip/xz dos shards entre cabeçalho e rodapé, sem recomprimir."""
+        outputs = {'gz': (final_output_gz, lambda data: gzip.compress(data, mtime=0))}
+        if self.xz_output:
+            outputs['xz'] = (self.xz_path_for(final_output_gz), lzma.compress)
+        for kind, (final_path, compress) in outputs.items():
+            tmp_path = final_path + '.tmp'
+            with open(tmp_path, 'wb') as out:
+                out.write(compress(XMLTV_HEADER))
+                for paths in shards:
+                    with open(paths[kind], 'rb') as f:
+                        shutil.copyfileobj(f, out)
+                out.write(compress(XMLTV_FOOTER))
+            os.replace(tmp_path, final_path)
+            print(f"✅ Arquivo EPG montado a partir de {len(shards)} shards: {final_path}")
+
+    def _consolidate_sharded(self, epg_urls, futures, final_output_gz):
+        os.makedirs(self.shard_dir, exist_ok=True)
+        shards = []
+        temporary = []
+        used_files = set()
+        total_elements = 0
+        previous_key = None
+        try:
+            for i, (url, future) in enumerate(zip(epg_urls, futures), 1):
+                print(f"\n[{i}/{len(epg_urls)}] Processando URL de EPG...")
+                cached = self.download_epg(url, future)
+                key = self._shard_key(cached.sha256 if cached else None, previous_key)
+                previous_key = key
+                if cached is None:
+                    continue
+                paths = self._shard_paths(key)
+                if all(os.path.exists(path) for path in paths.values()):
+                    total_elements += self._reuse_shard(url, paths)
+                else:
+                    elements, paths = self._build_shard(url, cached, paths)
+                    total_elements += elements
+                    if paths['gz'].endswith('.tmp'):
+                        temporary.append(paths)
+                shards.append(paths)
+                used_files.update(os.path.basename(path) for path in paths.values())
+
+            if total_elements:
+                self._assemble_shards(shards, final_output_gz)
+            else:
+                print("\n⚠️ Nenhum dado de EPG foi processado. O arquivo final não foi gerado.")
+        finally:
+            for paths in temporary:
+                for path in paths.values():
+                    if os.path.exists(path):
+                        os.remove(path)
+            # Shards que não fazem mais parte da cadeia atual são removidos
+            for name in os.listdir(self.shard_dir):
+                if name not in used_files:
+                    os.remove(os.path.join(self.shard_dir, name))
 
     def finalize_xmltv_and_compress(self, final_output_gz):
-        if not os.path.exists(self.temp_xml_file):
+        if self.output_file is None:
             print("\n⚠️ Nenhum dado de EPG foi processado. O arquivo final não foi gerado.")
             return
-        with open(self.temp_xml_file, 'a', encoding='utf-8') as f:
-            f.write('</tv>\n')
-        print(f"\n📦 Comprimindo XML para {final_output_gz}...")
-        with open(self.temp_xml_file, 'rb') as f_in, gzip.open(final_output_gz, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
-        os.remove(self.temp_xml_file)
-        print(f"✅ Arquivo EPG comprimido com sucesso!")
+        print(f"\n📦 Finalizando compressão ({self.output_file.workers} threads)...")
+        self.output_file.write(XMLTV_FOOTER)
+        self.output_file.close()
+        self.output_file = None
+        for final_path, tmp_path in self.output_tmp_paths.items():
+            os.replace(tmp_path, final_path)
+            print(f"✅ Arquivo EPG comprimido gravado em {final_path}")
 
     def consolidate_epgs(self, epg_urls, final_output_gz):
-        print(f"\n🔄 Iniciando consolidação de {len(epg_urls)} EPGs...")
-        for i, url in enumerate(epg_urls, 1):
-            print(f"\n[{i}/{len(epg_urls)}] Processando URL de EPG...")
-            xml_content = self.download_epg(url)
-            if xml_content:
-                self.process_epg_incremental(xml_content, url)
-                del xml_content
-        self.finalize_xmltv_and_compress(final_output_gz)
+        print(f"\n🔄 Iniciando consolidação de {len(epg_urls)} EPGs "
+              f"({self.max_workers} downloads simultâneos, até {self.max_per_host} por host)...")
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # Os downloads correm em paralelo, mas o parsing e a escrita seguem a
+        # ordem das fontes para que o EPG final seja idêntico ao sequencial.
+        futures = [executor.submit(self.fetch_epg, url) for url in epg_urls]
+        try:
+            if self.shard_dir:
+                self._consolidate_sharded(epg_urls, futures, final_output_gz)
+            else:
+                for i, (url, future) in enumerate(zip(epg_urls, futures), 1):
+                    print(f"\n[{i}/{len(epg_urls)}] Processando URL de EPG...")
+                    cached = self.download_epg(url, future)
+                    if cached is not None:
+                        chunks = iter_decompressed(cached.iter_chunks())
+                        self.process_epg_incremental(chunks, url, final_output_gz)
+                        chunks.close()
+                self.finalize_xmltv_and_compress(final_output_gz)
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            if self.output_file is not None:
+                self.output_file.abort()
+                for tmp_path in self.output_tmp_paths.values():
+                    os.remove(tmp_path)
+                self.output_file = None
         print(f"\n✅ Consolidação de EPG concluída!")
         print(f"📊 Total: {len(self.processed_channels)} canais únicos, {self.total_programmes} programas")
+        print(f"🧹 Programas descartados: {self.programme_index.duplicates} duplicados, "
+              f"{self.programme_index.overlaps} sobrepostos")
+        if self.elements_in:
+            print(f"📉 Mantidos {self.elements_out}/{self.elements_in} elementos "
+                  f"({self.elements_out / self.elements_in * 100:.1f}%), "
+                  f"{self.bytes_out / (1024*1024):.2f}/{self.bytes_in / (1024*1024):.2f} MB de XML "
+                  f"({self.bytes_out / max(self.bytes_in, 1) * 100:.1f}%)")
 
     def print_report(self):
         print("\n" + "="*80)
@@ -152,6 +475,18 @@ class M3uEpgConsolidator:
             print(f"\n✅ EPGs processados com sucesso ({len(clean_successful)}):")
             for url in clean_successful:
                 print(f"  ✓ {url}")
+        if any(self.window_dropped.values()):
+            print(f"\n⏱️ Programas fora da janela de tempo descartados por fonte:")
+            for url, count in self.window_dropped.items():
+                if count:
+                    print(f"  - {url}: {count}")
+        if self.shard_dir:
+            print(f"\n🧩 Shards: {len(self.shards_rebuilt)} fontes reconstruídas, "
+                  f"{len(self.shards_reused)} reutilizadas")
+            for url in self.shards_rebuilt:
+                print(f"  🔨 {url}")
+            for url in self.shards_reused:
+                print(f"  ♻️ {url}")
         if self.failed_urls:
             print(f"\n❌ EPGs que falharam (download ou análise) ({len(self.failed_urls)}):")
             for url in self.failed_urls:
@@ -166,13 +501,21 @@ class M3uEpgConsolidator:
         print("="*80)
 
 def main():
-    consolidator = M3uEpgConsolidator()
+    # Shards por fonte persistidos entre execuções (actions/cache): só fontes alteradas são reprocessadas
+    shard_dir = os.path.join(os.getcwd(), ".cache", "epg_shards")
+    consolidator = M3uEpgConsolidator(shard_dir=shard_dir)
     
     m3u_sources = [
         "https://github.com/LITUATUI/M3UPT/raw/refs/heads/main/M3U/M3UPT.m3u",
         "https://github.com/aseanic/aseanic.github.io/raw/31810aeb9cc29d671f58a554132e62f07f5a80e3/vod"
     ]
     
+    # Mantém no EPG apenas os canais referenciados pela playlist consolidada
+    filter_epg_by_playlist = True
+
+    # Streams com várias falhas seguidas no histórico (stream_health.py): "remover", "rebaixar" ou None
+    dead_streams = "rebaixar"
+
     # ✅ Compatível com GitHub Actions
     output_dir = os.path.join(os.getcwd(), "output")
     os.makedirs(output_dir, exist_ok=True)
@@ -183,26 +526,35 @@ def main():
     print("🚀 Iniciando Consolidador de M3U e EPG (v1.2 - GitHub Edition)")
     print(f"🗓️ Data/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-    full_m3u_content = ""
-    for i, m3u_url in enumerate(m3u_sources):
-        print(f"\n--- Baixando Fonte M3U [{i+1}/{len(m3u_sources)}]: {m3u_url} ---")
-        try:
-            response = consolidator.session.get(m3u_url, timeout=60)
-            response.raise_for_status()
-            content = response.text
-            if i > 0:
-                content = re.sub(r'^#EXTM3U[^\n]*\n?', '', content, count=1)
-            full_m3u_content += content + "\n"
-            print("  ✅ Conteúdo baixado.")
-        except requests.RequestException as e:
-            print(f"  ❌ Erro ao baixar M3U: {e}")
-
-    epg_urls = consolidator.extract_epg_urls_from_m3u_content(full_m3u_content)
+    def iter_m3u_sources():
+        # Cada fonte é baixada para o cache e lida linha a linha, sem montar a playlist em memória
+        for i, m3u_url in enumerate(m3u_sources):
+            print(f"\n--- Baixando Fonte M3U [{i+1}/{len(m3u_sources)}]: {m3u_url} ---")
+            try:
+                cached = download(m3u_url, timeout=60, cache=consolidator.cache)
+                print("  ✅ Conteúdo baixado.")
+            except requests.RequestException as e:
+                print(f"  ❌ Erro ao baixar M3U: {e}")
+                continue
+            yield m3u_url, cached.iter_lines()
 
+    health_store = HealthStore.open_existing() if dead_streams else None
     with open(playlist_output_file, 'w', encoding='utf-8') as f:
-        f.write(full_m3u_content)
+        lines = iter_merged_lines(iter_m3u_sources())
+        if health_store:
+            print(f"🩺 Usando histórico de saúde dos streams ({dead_streams} os fora do ar)")
+            lines = iter_healthy_lines(lines, health_store, demote=(dead_streams == "rebaixar"))
+        write_lines(lines, f)
+    if health_store:
+        health_store.close()
     print(f"\n📝 Arquivo de playlist consolidado salvo em: {playlist_output_file}")
 
+    with open(playlist_output_file, 'r', encoding='utf-8') as f:
+        epg_urls = consolidator.extract_epg_urls_from_m3u_lines(f)
+    if filter_epg_by_playlist:
+        with open(playlist_output_file, 'r', encoding='utf-8') as f:
+            consolidator.set_channel_filter_from_m3u(f)
+
     if not epg_urls:
         print("\n❌ Nenhuma URL de EPG válida foi encontrada.")
     else:
@@ -212,8 +564,9 @@ def main():
 
     if os.path.exists(playlist_output_file):
         print(f"\n📁 Arquivo de Playlist: {playlist_output_file} ({os.path.getsize(playlist_output_file) / (1024*1024):.2f} MB)")
-    if os.path.exists(epg_output_file):
-        print(f"📁 Arquivo de EPG: {epg_output_file} ({os.path.getsize(epg_output_file) / (1024*1024):.2f} MB)")
+    for path in (epg_output_file, M3uEpgConsolidator.xz_path_for(epg_output_file)):
+        if os.path.exists(path):
+            print(f"📁 Arquivo de EPG: {path} ({os.path.getsize(path) / (1024*1024):.2f} MB)")
 
 if __name__ == "__main__":
     main()
@@ -1,60 +1,92 @@
 import requests
 import gzip
 import lzma # Importar lzma
-import re
+import zlib
 import os
 
+from http_cache import download
+from m3u_tokenizer import epg_urls_from_attrs, iter_playlist
+from xmltv_stream import (
+    XMLTV_FOOTER, XMLTV_HEADER, ProgrammeIndex, XMLTVScanError, detect_compression,
+    iter_decompressed, iter_xmltv_raw,
+)
+
 def download_content(url):
-    """Baixa o conteúdo de uma URL e retorna como string, descompactando se for gzip ou xz."""
+    """Baixa o conteúdo de uma URL (via cache HTTP) e retorna como string, descompactando se for gzip ou xz."""
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        if url.endswith(".gz"):
-            return gzip.decompress(response.content).decode("utf-8")
-        elif url.endswith(".xz"):
-            return lzma.decompress(response.content).decode("utf-8") # Descompressão XZ
+        cached = download(url, timeout=30)
+        with cached.open() as f:
+            compressed = detect_compression(f.read(6)) is not None
+        if compressed:
+            return b''.join(iter_decompressed(cached.iter_chunks())).decode("utf-8")
         else:
-            return response.text
+            return cached.text()
     except requests.exceptions.RequestException as e:
         print(f"Erro ao baixar {url}: {e}")
         return None
     except lzma.LZMAError as e:
         print(f"Erro ao descompactar XZ de {url}: {e}")
         return None
+    except zlib.error as e:
+        print(f"Erro ao descompactar GZ de {url}: {e}")
+        return None
+
+def download_epg_data(url):
+    """Baixa um EPG para o cache HTTP e retorna o arquivo em cache (descomprimido só na mesclagem)."""
+    try:
+        return download(url, timeout=30)
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao baixar {url}: {e}")
+        return None
 
 def extract_epg_from_m3u(m3u_content):
     """Extrai URLs de EPG de conteúdo M3U."""
     epg_urls = []
-    # Procura por atributos tvg-url ou url-tvg que apontam para arquivos EPG
-    matches = re.findall(r'url-tvg="(.*?)"|tvg-url="(.*?)"', m3u_content)
-    for match in matches:
-        for url_group in match:
-            if url_group:
-                # Divide a string por vírgulas para lidar com múltiplos URLs
-                individual_urls = [u.strip() for u in url_group.split(',')] # Corrigido para splitar URLs separadas por vírgula
-                for url in individual_urls:
-                    if url and (url.endswith('.xml') or url.endswith('.xml.gz') or url.endswith('.xml.xz')):
-                        epg_urls.append(url)
+    # Procura por atributos tvg-url, url-tvg ou x-tvg-url (já separados por vírgula) que apontam para arquivos EPG
+    for kind, item in iter_playlist(m3u_content.splitlines()):
+        attrs = item if kind == 'header' else item.attrs
+        for url in epg_urls_from_attrs(attrs):
+            if url.endswith('.xml') or url.endswith('.xml.gz') or url.endswith('.xml.xz'):
+                epg_urls.append(url)
     return list(set(epg_urls)) # Retorna URLs únicas
 
 def merge_epg_data(epg_data_list):
-    """Mescla dados de EPG XML."""
-    merged_xml = '<tv>\n'
-    for epg_xml in epg_data_list:
-        # Extrai tags <channel> e <programme>
-        channels = re.findall(r'<channel.+?</channel>', epg_xml, re.DOTALL)
-        programmes = re.findall(r'<programme.+?</programme>', epg_xml, re.DOTALL)
-
-        for channel in channels:
-            merged_xml += channel + '\n'
-        for programme in programmes:
-            merged_xml += programme + '\n'
-    merged_xml += '</tv>'
-    return merged_xml
+    """
+    Mescla dados de EPG XML, descartando canais repetidos e programas duplicados/sobrepostos.
+
+    Cada item é um EPG como bytes ou como iterável de blocos de bytes (comprimidos
+    ou não). Os elementos mantidos são copiados byte a byte, sem reserialização.
+    """
+    parts = [XMLTV_HEADER]
+    seen_channels = set()
+    programme_index = ProgrammeIndex()
+    for epg_data in epg_data_list:
+        chunks = [epg_data] if isinstance(epg_data, bytes) else epg_data
+        try:
+            for tag, attrs, raw in iter_xmltv_raw(iter_decompressed(chunks)):
+                if tag == 'channel':
+                    channel_id = attrs.get('id')
+                    if channel_id in seen_channels:
+                        continue
+                    seen_channels.add(channel_id)
+                elif not programme_index.accept(attrs.get('channel'), attrs.get('start'), attrs.get('stop')):
+                    continue
+                parts.append(raw)
+                parts.append(b'\n')
+        except (XMLTVScanError, lzma.LZMAError, zlib.error) as e:
+            print(f"EPG inválido ignorado a partir deste ponto: {e}")
+        finally:
+            programme_index.end_source()
+    parts.append(XMLTV_FOOTER)
+    print(f"Programas descartados: {programme_index.duplicates} duplicados, "
+          f"{programme_index.overlaps} sobrepostos")
+    return b''.join(parts)
 
 def compress_epg(epg_xml):
     """Comprime dados de EPG XML para .xml.gz."""
-    compressed_data = gzip.compress(epg_xml.encode('utf-8'))
+    if isinstance(epg_xml, str):
+        epg_xml = epg_xml.encode('utf-8')
+    compressed_data = gzip.compress(epg_xml)
     return compressed_data
 
 def main():
@@ -76,16 +108,16 @@ def main():
         else:
             print(f"Não foi possível baixar o conteúdo M3U de {m3u_url}. Tentando usar como EPG diretamente.")
             # Se não for um M3U válido ou não puder ser baixado, tenta tratar como EPG XML diretamente
-            epg_content = download_content(m3u_url)
+            epg_content = download_epg_data(m3u_url)
             if epg_content:
-                epg_data_list.append(epg_content)
+                epg_data_list.append(epg_content.iter_chunks())
 
     # Processar URLs de EPG extraídas ou fornecidas diretamente
     for epg_url in epg_urls_to_process:
         print(f"Baixando EPG de: {epg_url}")
-        epg_content = download_content(epg_url)
+        epg_content = download_epg_data(epg_url)
         if epg_content:
-            epg_data_list.append(epg_content)
+            epg_data_list.append(epg_content.iter_chunks())
 
     if not epg_data_list:
         print("Nenhum dado de EPG para mesclar.")
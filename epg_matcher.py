@@ -0,0 +1,281 @@
+"""
+Casamento aproximado de canais da playlist com os canais do EPG.
+
+Os ids XMLTV e os <display-name> são normalizados (sem acentos, caixa,
+pontuação, marcas de qualidade como HD/FHD, palavras de enchimento como
+"TV" e o sufixo de país do id) e indexados por trigramas num índice
+invertido. Para cada canal da playlist só os documentos que compartilham
+trigramas com o nome são considerados; os mais promissores são pontuados
+com o coeficiente de Dice e o melhor acima do limiar é o escolhido.
+Pontuação 1.0 só quando os nomes são iguais sem tirar nenhuma palavra;
+igualdade que só aparece depois de tirá-las vale STRIPPED_EXACT_SCORE.
+
+Um candidato aproximado ainda é recusado se for outra variante do canal:
+números diferentes ("Premiere 3" não é "Premiere2"), siglas de região
+diferentes ("Record BA" não é "RecordBH") ou palavras que só um dos lados
+tem ("Discovery" não é "Discovery Kids"). Erros de digitação e abreviações
+("BA" para "Bahia") continuam aceitos.
+Nada de comparar todos contra todos: 20k canais contra 100k ids levam
+segundos.
+
+Ex.: "Globo BA" e "Globo TV Bahia.br" viram "globoba" e "globobahia" (Dice 0.71).
+"""
+
+import re
+import unicodedata
+from array import array
+from collections import Counter
+
+DEFAULT_THRESHOLD = 0.7
+CANDIDATES = 32          # documentos repontuados por consulta
+MAX_DF_RATIO = 0.02      # trigramas em mais de 2% dos documentos não geram candidatos
+
+STRIPPED_EXACT_SCORE = 0.9  # chaves iguais só depois de tirar palavras de ruído
+
+# Palavras de enchimento, que não identificam o canal. Palavras como 'plus',
+# 'live' ou 'channel' distinguem canais ("HBO Plus" não é "HBO") e ficam.
+NOISE_WORDS = frozenset(('tv', 'ao', 'vivo', 'the'))
+# Marcas de qualidade/codec da transmissão, não do canal
+QUALITY_TAGS = frozenset((
+    'hd', 'fhd', 'uhd', 'sd', '4k', '8k', 'hevc', 'h264', 'h265', 'hq', 'lq',
+    '1080p', '1080i', '720p', '576p', '480p', '360p',
+))
+_DROPPED = NOISE_WORDS | QUALITY_TAGS
+_CAMEL_RE = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|(?<=[A-Za-z])(?=[0-9])|(?<=[0-9])(?=[A-Za-z])')
+_NON_ALNUM_RE = re.compile(r'[^0-9A-Za-z]+')
+_COUNTRY_RE = re.compile(r'^(.*)\.([a-z]{2,3})(@[^.]*)?$', re.IGNORECASE)
+
+
+def split_country(tvg_id):
+    """Separa o sufixo de país de um id XMLTV: 'GloboBahia.br' -> ('GloboBahia', 'br')."""
+    match = _COUNTRY_RE.match(tvg_id.strip())
+    if match and match.group(1):
+        return match.group(1), match.group(2).lower()
+    return tvg_id.strip(), None
+
+
+def normalize_tokens(text):
+    """
+    (tokens, tirou_palavras): palavras sem acentos e em minúsculas, separadas
+    também nas trocas de caixa e entre letras e números, sem palavras de ruído
+    nem marcas de qualidade; o segundo valor diz se alguma palavra foi tirada.
+
+    Palavras de ruído só saem quando escritas separadas: em "SporTV" o "TV"
+    faz parte do nome.
+    """
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    tokens = []
+    stripped = False
+    for word in _NON_ALNUM_RE.split(text):
+        if not word:
+            continue
+        if word.lower() in _DROPPED:
+            stripped = True
+            continue
+        for part in _CAMEL_RE.sub(' ', word).lower().split():
+            if part in QUALITY_TAGS:
+                stripped = True
+            else:
+                tokens.append(part)
+    return tuple(tokens), stripped
+
+
+def normalize_key(text):
+    """(chave, tirou_palavras): os tokens de normalize_tokens colados."""
+    tokens, stripped = normalize_tokens(text)
+    return ''.join(tokens), stripped
+
+
+def normalize(text):
+    """Chave de comparação (ver normalize_key)."""
+    return normalize_key(text)[0]
+
+
+def trigrams(key):
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+def _one_edit(a, b):
+    """a e b diferem por no máximo uma troca, inserção, remoção ou inversão de vizinhos?"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return (a[i + 1:] == b[i + 1:]
+            or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]))
+
+
+def _covered(token, others, joined):
+    """A palavra aparece do outro lado, como está, abreviada ou com um erro de digitação?"""
+    if token in others:
+        return True
+    if len(token) <= 3:
+        # Siglas curtas (região, variante) só valem iguais ou como abreviação: "ba" -> "bahia"
+        return any(len(other) > len(token) and other.startswith(token) for other in others)
+    return (token in joined
+            or any(len(other) <= 3 and token.startswith(other) for other in others)
+            or (len(token) >= 5 and any(_one_edit(token, other) for other in others)))
+
+
+def same_variant(query, candidate):
+    """
+    Os tokens de `query` e `candidate` (de normalize_tokens) descrevem a mesma
+    variante do canal? Os números têm de ser os mesmos e toda palavra de um
+    lado tem de aparecer no outro.
+    """
+    if {int(t) for t in query if t.isdigit()} != {int(t) for t in candidate if t.isdigit()}:
+        return False
+    query = [t for t in query if not t.isdigit() and t not in NOISE_WORDS]
+    candidate = [t for t in candidate if not t.isdigit() and t not in NOISE_WORDS]
+    query_joined = ''.join(query)
+    candidate_joined = ''.join(candidate)
+    return (all(_covered(t, candidate, candidate_joined) for t in query)
+            and all(_covered(t, query, query_joined) for t in candidate))
+
+
+class EpgMatcher:
+    """
+    Índice dos canais do EPG. `epg_channels` é um iterável de (id, nomes),
+    com os <display-name> de cada canal.
+    """
+
+    def __init__(self, epg_channels, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.ids = []            # id do EPG por documento
+        self.keys = []           # chave normalizada por documento
+        self.tokens = []         # tokens da chave por documento
+        self.countries = []      # país do id (ou None) por documento
+        self.sizes = array('H')  # número de trigramas por documento
+        self.stripped = bytearray()  # 1 se a chave do documento perdeu palavras na normalização
+        self.exact = {}          # chave -> [documentos]
+        postings = {}
+        seen = {}
+        for epg_id, names in epg_channels:
+            base, country = split_country(epg_id)
+            for text in (base, *names):
+                tokens, stripped = normalize_tokens(text or '')
+                key = ''.join(tokens)
+                if not key:
+                    continue
+                doc = seen.get((key, epg_id))
+                if doc is not None:
+                    # O mesmo nome com e sem marcas: vale a forma sem palavras tiradas
+                    if not stripped:
+                        self.stripped[doc] = 0
+                    continue
+                doc = seen[(key, epg_id)] = len(self.ids)
+                self.ids.append(epg_id)
+                self.keys.append(key)
+                self.tokens.append(tokens)
+                self.stripped.append(1 if stripped else 0)
+                self.countries.append(country)
+                grams = trigrams(key)
+                self.sizes.append(min(len(grams), 0xFFFF))
+                self.exact.setdefault(key, []).append(doc)
+                for gram in grams:
+                    posting = postings.get(gram)
+                    if posting is None:
+                        posting = postings[gram] = array('I')
+                    posting.append(doc)
+        self.known_ids = frozenset(self.ids)
+        self.max_df = max(50, int(len(self.ids) * MAX_DF_RATIO))
+        self.postings = {gram: posting for gram, posting in postings.items() if len(posting) <= self.max_df}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _compatible(self, doc, country):
+        other = self.countries[doc]
+        return country is None or other is None or other == country
+
+    def _search(self, tokens, country, stripped=False):
+        """Melhor (pontuação, documento) para os tokens normalizados de um nome."""
+        key = ''.join(tokens)
+        docs = self.exact.get(key)
+        if docs:
+            best = (0.0, None)
+            for doc in docs:
+                if not self._compatible(doc, country):
+                    continue
+                score = STRIPPED_EXACT_SCORE if stripped or self.stripped[doc] else 1.0
+                if score > best[0]:
+                    best = (score, doc)
+                if score == 1.0:
+                    break
+            if best[1] is not None:
+                return best
+        grams = trigrams(key)
+        counts = Counter()
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is not None:
+                counts.update(posting)
+        if not counts:
+            return 0.0, None
+        size = len(grams)
+        sizes = self.sizes
+        # Pré-seleção pelos trigramas em comum, depois pelo Dice aproximado e só então a pontuação exata
+        ranked = sorted(counts.most_common(CANDIDATES * 4),
+                        key=lambda item: -2 * item[1] / (size + sizes[item[0]]))
+        best = (0.0, None)
+        for doc, _ in ranked[:CANDIDATES]:
+            if not self._compatible(doc, country):
+                continue
+            score = dice(grams, trigrams(self.keys[doc]))
+            if score > best[0] and same_variant(tokens, self.tokens[doc]):
+                best = (score, doc)
+        return best
+
+    def match(self, *texts, country=None):
+        """
+        Melhor id do EPG para um canal descrito por `texts` (tvg-id, tvg-name,
+        nome...). Devolve (id, pontuação) ou (None, melhor pontuação).
+        """
+        best = (0.0, None)
+        for text in texts:
+            tokens, stripped = normalize_tokens(text or '')
+            if not tokens:
+                continue
+            cache_key = (tokens, country, stripped)
+            result = self._cache.get(cache_key)
+            if result is None:
+                result = self._cache[cache_key] = self._search(tokens, country, stripped)
+            if result[0] > best[0]:
+                best = result
+            if best[0] == 1.0:
+                break
+        score, doc = best
+        if doc is None or score < self.threshold:
+            return None, score
+        return self.ids[doc], score
+
+    def match_channel(self, channel):
+        """Casa um Channel pela tvg-id (sem o país), tvg-name e nome exibido."""
+        base, country = split_country(channel.tvg_id) if channel.tvg_id else ('', None)
+        return self.match(base, channel.tvg_name, channel.name, country=country)
+
+
+def match_channels(channels, matcher):
+    """
+    Para cada canal cuja tvg-id não existe no EPG, procura o id mais parecido.
+    Devolve [(canal, novo id, pontuação)] apenas dos canais que casaram.
+    """
+    matches = []
+    for channel in channels:
+        if channel.tvg_id and channel.tvg_id in matcher.known_ids:
+            continue
+        epg_id, score = matcher.match_channel(channel)
+        if epg_id is not None and epg_id != channel.tvg_id:
+            matches.append((channel, epg_id, score))
+    return matches
@@ -1,446 +1,180 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-import time
+"""
+Fox News ao vivo -> lista_foxnews.m3u
+
+Plugin do scraper_engine. As páginas de live são lidas em paralelo (dentro
+do limite do domínio) na descoberta: primeiro só por HTTP (HTML do servidor
+e feed do player) e, se não der, no navegador, onde dos links, da rede e do
+código-fonte saem os streams. O título e o logo da página são lidos ali
+mesmo. Cada stream é depois conferido pelo conteúdo, sem abrir a página de
+novo.
+Roda sozinho (python foxvivo.py) ou junto com os outros sites
+(python scraper_engine.py).
+"""
+
+import concurrent.futures
 import re
+import threading
 
-# ===========================
-# CONFIGURAÇÕES DO CHROME
-# ===========================
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-gpu")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--disable-blink-features=AutomationControlled")
-options.add_argument("--disable-infobars")
-options.add_argument("--disable-web-security")
-options.add_argument("--window-size=1280,720")
-options.add_argument("--remote-debugging-port=9222")
-options.add_experimental_option("excludeSwitches", ["enable-automation"])
-options.add_experimental_option("useAutomationExtension", False)
-
-
-# ===========================
-# FUNÇÕES AUXILIARES
-# ===========================
-def handle_cookie_consent(driver):
-    """Tenta fechar popups ou aceitar cookies."""
-    try:
-        time.sleep(3)
-        cookie_selectors = [
-            "button[id*=\'accept\']",
-            "button[class*=\'accept\']",
-            "button[data-testid*=\'accept\']",
-            "button:contains(\'Accept\')",
-            "button:contains(\'I Accept\')",
-            "button:contains(\'Accept All\')",
-            "button:contains(\'Agree\')",
-            "button:contains(\'OK\')",
-            ".cookie-accept",
-            ".accept-cookies",
-            "#onetrust-accept-btn-handler",
-            ".ot-sdk-show-settings",
-            "button[aria-label*=\'Accept\']",
-            "button[title*=\'Accept\']",
-            "button[data-cy*=\'accept\']",
-            ".privacy-manager-accept-all",
-            ".gdpr-accept",
-            ".consent-accept"
-        ]
-
-        for selector in cookie_selectors:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            for element in elements:
-                if element.is_displayed() and element.is_enabled():
-                    driver.execute_script("arguments[0].click();", element)
-                    print(f"Clicou no botão de cookies: {selector}")
-                    time.sleep(1)
-                    return True
-
-        close_selectors = [
-            "button[aria-label*=\'close\']",
-            ".close", ".modal-close", "button.close",
-            "[data-dismiss=\'modal\']", ".overlay-close", ".popup-close"
-        ]
-
-        for selector in close_selectors:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            for element in elements:
-                if element.is_displayed() and element.is_enabled():
-                    driver.execute_script("arguments[0].click();", element)
-                    print(f"Fechou modal/overlay: {selector}")
-                    time.sleep(1)
-                    return True
-    except Exception as e:
-        print(f"Erro ao tratar cookies/modals: {e}")
-
-    return False
-
-
-def wait_for_video_load(driver, timeout=30):
-    """Aguarda até o vídeo carregar."""
-    video_selectors = [
-        "video", ".video-player", ".player-container",
-        "[data-testid*=\'video\']", ".live-player",
-        "iframe[src*=\'player\']", "iframe[src*=\'video\']"
-    ]
-    for selector in video_selectors:
-        try:
-            WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-            )
-            print(f"Elemento de vídeo encontrado: {selector}")
-            return True
-        except TimeoutException:
-            continue
-    return False
-
-
-def handle_iframes(driver):
-    """Procura players dentro de iframes."""
-    try:
-        iframes = driver.find_elements(By.TAG_NAME, "iframe")
-        print(f"Encontrados {len(iframes)} iframes")
-        for i, iframe in enumerate(iframes):
-            src = iframe.get_attribute("src") or ""
-            if any(k in src.lower() for k in ["player", "video", "live", "stream"]):
-                print(f"Iframe {i} parece conter vídeo: {src[:100]}...")
-                driver.switch_to.frame(iframe)
-                videos = driver.find_elements(By.TAG_NAME, "video")
-                for v in videos:
-                    try:
-                        driver.execute_script("arguments[0].play();", v)
-                    except Exception:
-                        pass
-                driver.switch_to.default_content()
-    except Exception as e:
-        print(f"Erro ao tratar iframes: {e}")
-
-
-def try_play_video(driver):
-    """Tenta dar play manual no vídeo."""
-    try:
-        time.sleep(3)
-        play_selectors = [
-            "button[aria-label*=\'play\']", "button[title*=\'play\']",
-            "button.play-button", ".play-btn", ".video-play-button",
-            ".player-play-button", "button.vjs-big-play-button",
-            ".vjs-play-control", ".poster__play-wrapper",
-            ".playkit-pre-playback-play-button", ".play-overlay"
-        ]
-
-        for selector in play_selectors:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            for el in elements:
-                if el.is_displayed() and el.is_enabled():
-                    driver.execute_script("arguments[0].scrollIntoView(true);", el)
-                    time.sleep(0.5)
-                    driver.execute_script("arguments[0].click();", el)
-                    print(f"Clicou no botão de play: {selector}")
-                    time.sleep(3)
-                    return True
-
-        # Clicar diretamente no elemento <video>
-        videos = driver.find_elements(By.TAG_NAME, "video")
-        for v in videos:
-            if v.is_displayed():
-                driver.execute_script("arguments[0].click();", v)
-                print("Clicou diretamente no elemento video")
-                time.sleep(3)
-                return True
-
-        # Play via JavaScript
-        driver.execute_script("""
-            var videos = document.querySelectorAll(\'video\');
-            for (var i = 0; i < videos.length; i++) {
-                if (videos[i].paused) videos[i].play();
-            }
-        """)
-        print("Tentou dar play via JavaScript")
-        time.sleep(3)
-        return True
-    except Exception as e:
-        print(f"Erro ao tentar dar play: {e}")
-    return False
-
-
-def extract_m3u8_from_network(driver):
-    """Extrai URLs .m3u8 do log de rede."""
-    try:
-        logs = driver.execute_script("return window.performance.getEntriesByType(\'resource\');")
-        urls = [l.get("name", "") for l in logs if ".m3u8" in l.get("name", "")]
-        urls = list(set(urls))
-        for u in urls:
-            if any(x in u.lower() for x in ["master", "playlist", "index"]):
-                return u
-        if urls:
-            return urls[0]
-    except Exception as e:
-        print(f"Erro ao extrair m3u8 dos logs: {e}")
-    return None
-
-
-def extract_m3u8_from_source(driver):
-    """Extrai URLs .m3u8 do código-fonte."""
-    try:
-        html = driver.page_source
-        m3u8_patterns = [
-            # Padrão 1: URL .m3u8 simples
-            r"https?://[^\s\"\'<>]+?\.m3u8[^\s\"\'<>]*",
-            # Padrão 2: URL .m3u8 entre aspas duplas
-            r"\"(https?://[^\"]+?\.m3u8[^\"]*)\"",
-            # Padrão 3: URL .m3u8 entre aspas simples
-            r"\'(https?://[^\\]+?\.m3u8[^\\]*)\'",
-            # Padrão 4: URL .m3u8 em atributo src com aspas duplas
-            r"src=\"(https?://[^\"]+?\.m3u8[^\"]*)\"",
-            # Padrão 5: URL .m3u8 em atributo src com aspas simples escapadas
-            r"src=\\'(https?://[^\\]+?\.m3u8[^\\]*)\\'",
-            # Padrão 6: URL .m3u8 em JSON/JS com 'url'
-            r"url:\s*['\"](https?://[^'\"]+?\.m3u8[^'\"]*)['\"]",
-            # Padrão 7: URL .m3u8 em JSON/JS com 'source'
-            r"source:\s*['\"](https?://[^'\"]+?\.m3u8[^'\"]*)['\"]",
-            # Padrão 8: URL .m3u8 em JSON/JS com 'file'
-            r"file:\s*['\"](https?://[^'\"]+?\.m3u8[^'\"]*)['\"]"
-        ]
-
-        for pattern in m3u8_patterns:
-            matches = re.findall(pattern, html, re.IGNORECASE)
-            if matches:
-                # O re.findall pode retornar uma lista de tuplas se houver grupos de captura
-                # Tentamos pegar o primeiro grupo, que é o URL
-                if isinstance(matches[0], tuple):
-                    return matches[0][0] if matches[0][0] else matches[0]
-                return matches[0]
-    except Exception as e:
-        print(f"Erro ao extrair m3u8 do HTML: {e}")
-    return None
-
-
-def get_foxnews_live_streams(driver):
-    """Obtém URLs de streams ao vivo da Fox News."""
-    live_urls = set()
-    final_filtered_urls = set() # Inicializar aqui
-    potential_live_pages = [
-        "https://www.foxnews.com/live",
-        "https://www.foxnews.com/shows/fox-news-live",
-        "https://www.foxnews.com/go",
-        "https://www.foxnews.com/video" # Incluir a página de vídeo geral para mais cobertura
-    ]
-
-    for url in potential_live_pages:
-        try:
-            print(f"Navegando para página potencial de live: {url}")
-            driver.get(url)
-            time.sleep(5)
-            handle_cookie_consent(driver)
-
-            # Tentar encontrar elementos que indiquem um stream ao vivo
-            # Isso pode variar, então usaremos vários seletores
-            live_selectors = [
-                "a[href*=\"/live\"][href*=\".m3u8\"]",
-                "a[href*=\"/live-stream\"]",
-                "div[data-component-name=\"LivePlayer\"] a",
-                "video[src*=\"live\"]",
-                "iframe[src*=\"live\"]",
-                "span.live-badge", # Exemplo de um badge \'Ao Vivo\'
-                "div.on-air-now", # Exemplo de um contêiner \'No Ar Agora\'
-                "div[data-qa-label=\"on-air-now\"]"
-            ]
-
-            for selector in live_selectors:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for el in elements:
-                    href = el.get_attribute("href") or el.get_attribute("src")
-                    if href and (".m3u8" in href or "live" in href.lower()):
-                        live_urls.add(href)
-                        print(f"Encontrado potencial stream ao vivo: {href}")
-
-            # Tentar extrair m3u8 diretamente da rede ou source nessas páginas
-            m3u8_from_network = extract_m3u8_from_network(driver)
-            if m3u8_from_network and "live" in m3u8_from_network.lower():
-                live_urls.add(m3u8_from_network)
-                print(f"M3U8 ao vivo encontrado via rede: {m3u8_from_network}")
-            
-            m3u8_from_source = extract_m3u8_from_source(driver)
-            if m3u8_from_source and "live" in m3u8_from_source.lower():
-                live_urls.add(m3u8_from_source)
-                print(f"M3U8 ao vivo encontrado via source: {m3u8_from_source}")
-
-            # Verificar se há indicadores visuais de "On Air Now" ou "Live" na página
-            on_air_indicators = driver.find_elements(By.XPATH, "//*[contains(text(), \'On Air Now\') or contains(text(), \'LIVE\')] | //*[contains(@class, \'live-badge\') or contains(@class, \'on-air-now\')] | //*[contains(@class, \'live-tag\')] | //*[contains(@class, \'live-label\')]")
-            
-            # Se a página contém um indicador "On Air Now" ou "LIVE", consideramos os URLs encontrados nela
-            if on_air_indicators:
-                print(f"Indicador \'On Air Now\' ou \'LIVE\' encontrado na página {url}.")
-                # Adicionar todos os URLs de stream encontrados para esta página ao conjunto final
-                for u in live_urls:
-                    # Refinar ainda mais: garantir que o URL em si contenha "live" ou seja um m3u8
-                    if "live" in u.lower() or ".m3u8" in u.lower():
-                        # Evitar URLs que parecem ser VODs, a menos que explicitamente marcados como live
-                        if "/video/" in u.lower() and not ("live" in u.lower().split("/video/")[-1] or "live-stream" in u.lower()):
-                            continue # Ignorar se for um vídeo gravado sem indicador claro de live
-                        final_filtered_urls.add(u)
-            else:
-                print(f"Nenhum indicador \'On Air Now\' ou \'LIVE\' encontrado na página {url}. Ignorando URLs desta página.")
-
-        except Exception as e:
-            print(f"Erro ao processar URL de live {url}: {e}")
-
-    # Retornar uma lista de tuplas (url_stream, url_pagina)
-    return list(set([(u, url) for u in live_urls for url in potential_live_pages if u in final_filtered_urls]))
-
-
-def extract_logo_from_page(driver):
-    """Extrai o URL do logo do canal ou thumbnail da página."""
-    logo = None
-    # Seletores comuns para logo/thumbnail em páginas de vídeo
-    logo_selectors = [
-        "meta[property='og:image']", # Imagem principal da página
-        "meta[name='twitter:image']",
-        "meta[name='thumbnail']",
-        "img[alt*='logo']",
-        "img[src*='logo']",
-        "img[src*='thumbnail']",
-        "img[class*='logo']"
-    ]
-    
-    for selector in logo_selectors:
-        try:
-            element = driver.find_element(By.CSS_SELECTOR, selector)
-            if element.tag_name == "meta":
-                logo = element.get_attribute("content")
-            else:
-                logo = element.get_attribute("src")
-            
-            if logo and logo.startswith("http"):
-                print(f"Logo/Thumbnail encontrado via seletor {selector}: {logo}")
-                return logo
-        except Exception:
-            continue
-            
-    # Tentar extrair de logs de rede (menos confiável para logo)
-    try:
-        logs = driver.execute_script("return window.performance.getEntriesByType(\'resource\');")
-        for entry in logs:
-            name = entry.get("name", "")
-            if any(ext in name.lower() for ext in [".jpg", ".png", ".webp"]) and ("logo" in name.lower() or "thumb" in name.lower()):
-                print(f"Logo/Thumbnail encontrado via log: {name}")
-                return name
-    except Exception:
-        pass
-        
-    return None
-
-def extract_foxnews_data(url):
-    """Extrai título, .m3u8 e thumbnail de um vídeo Fox News."""
-    driver = None
-    try:
-        driver = webdriver.Chrome(options=options)
-        driver.execute_script("Object.defineProperty(navigator, \'webdriver\', {get: () => undefined})")
-
-        print(f"Acessando: {url}")
-        driver.get(url)
-        time.sleep(5)
-        handle_cookie_consent(driver)
-        wait_for_video_load(driver)
-        handle_iframes(driver)
-        try_play_video(driver)
-        time.sleep(15)
-
-        m3u8 = extract_m3u8_from_network(driver) or extract_m3u8_from_source(driver)
-        title = driver.title
-        
-        # Chamada para a nova função de extração de logo
-        thumb = extract_logo_from_page(driver)
-
-        return title, m3u8, thumb
-    except Exception as e:
-        print(f"Erro ao processar {url}: {e}")
-        return None, None, None
-    finally:
-        if driver:
-            driver.quit()
-
-
-# ===========================
-# FUNÇÃO PRINCIPAL
-# ===========================
-def main():
-    print("Iniciando extração de streams ao vivo da Fox News...")
-
-    driver_main = webdriver.Chrome(options=options)
-    live_stream_data = get_foxnews_live_streams(driver_main) # Retorna (url_stream, url_pagina)
-    driver_main.quit()
-
-    print(f"Foram encontrados {len(live_stream_data)} potenciais streams ao vivo.")
-
-    # Usar um set para armazenar os dados finais e evitar duplicatas
-    final_stream_data = set() 
-
-    # URLs a serem filtrados
-    invalid_url_keywords = ["ping.chartbeat.net", "iframe/vod.html"]
-
-    for m3u8_url, page_url in live_stream_data:
-        # Filtrar URLs inválidos
-        if any(keyword in m3u8_url for keyword in invalid_url_keywords):
-            print(f"❌ Ignorando URL inválido/de rastreamento: {m3u8_url}")
-            continue
-
-        print("=" * 60)
-        print(f"Processando stream: {m3u8_url} (Página: {page_url})")
-        print("=" * 60)
-        
-        # Reutilizar a função extract_foxnews_data para obter o logo/thumbnail da página
-        # Nota: A função extract_foxnews_data agora espera o URL da página, não o URL do stream
-        # Como a função original extrai o m3u8, vamos adaptar a lógica
+from selenium.webdriver.common.by import By
 
-        # Criar um driver temporário para extrair o logo/thumbnail da página
-        driver_temp = None
+from hls_resolver import resolve_m3u8
+from http_fast_path import TIER_BROWSER
+from m3u8_capture import M3u8Capture
+from scraper_engine import (
+    DEFAULT_LOGO_SELECTORS, SitePlugin, StreamEntry, extract_logo, handle_cookie_consent,
+    m3u8_urls_from_source, resolve_candidates, run_sites,
+)
+
+LIVE_PAGES = [
+    "https://www.foxnews.com/live",
+    "https://www.foxnews.com/shows/fox-news-live",
+    "https://www.foxnews.com/go",
+    "https://www.foxnews.com/video",  # Página de vídeo geral para mais cobertura
+]
+# Elementos que indicam um stream ao vivo (varia entre as páginas)
+LIVE_SELECTORS = [
+    "a[href*=\"/live\"][href*=\".m3u8\"]",
+    "a[href*=\"/live-stream\"]",
+    "div[data-component-name=\"LivePlayer\"] a",
+    "video[src*=\"live\"]",
+    "iframe[src*=\"live\"]",
+    "span.live-badge",
+    "div.on-air-now",
+    "div[data-qa-label=\"on-air-now\"]",
+]
+ON_AIR_XPATH = (
+    "//*[contains(text(), 'On Air Now') or contains(text(), 'LIVE')]"
+    " | //*[contains(@class, 'live-badge') or contains(@class, 'on-air-now')]"
+    " | //*[contains(@class, 'live-tag')] | //*[contains(@class, 'live-label')]"
+)
+# O mesmo indicador procurado no HTML do servidor (caminho HTTP)
+ON_AIR_RE = re.compile(r"On Air Now|\bLIVE\b|live-badge|on-air-now|live-tag|live-label")
+# URLs de rastreamento e de VOD que aparecem junto com os streams
+INVALID_URL_KEYWORDS = ["ping.chartbeat.net", "iframe/vod.html"]
+# Páginas de descoberta podem não ter player: a espera por .m3u8 nelas é curta
+DISCOVERY_DEADLINE = 8
+
+
+def is_live_url(url):
+    """Contém "live" ou é .m3u8, e não parece um vídeo gravado sem indicação de live."""
+    lower = url.lower()
+    if "live" not in lower and ".m3u8" not in lower:
+        return False
+    if "/video/" in lower and not ("live" in lower.split("/video/")[-1] or "live-stream" in lower):
+        return False
+    return True
+
+
+class FoxNewsSite(SitePlugin):
+    name = 'foxnews'
+    output = 'lista_foxnews.m3u'
+    group_title = 'FOX NEWS VIDEO'
+    max_per_domain = 2
+    urls = LIVE_PAGES
+    # Feed do player da Fox, pelo id do vídeo embutido na página
+    player_apis = ((r'data-video-id="(\d+)"', "https://video.foxnews.com/v/feed/video/{0}.js?template=fox"),)
+    logo_selectors = DEFAULT_LOGO_SELECTORS + (
+        ("img[alt*='logo']", "src"),
+        ("img[src*='logo']", "src"),
+        ("img[src*='thumbnail']", "src"),
+        ("img[class*='logo']", "src"),
+    )
+
+    def __init__(self):
+        self._page_info = {}
+        self._lock = threading.Lock()
+
+    def discover(self, engine):
+        """Pares (stream, página) das páginas com indicador 'On Air Now' ou 'LIVE'."""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_per_domain) as executor:
+            found = executor.map(lambda url: self._discover_page(engine, url), self.urls)
+            return sorted({job for jobs in found for job in jobs})
+
+    def _discover_page(self, engine, url):
+        http_tried = engine.try_http(url)
+        streams = self._discover_http(engine, url) if http_tried else None
+        if streams is None:
+            streams = self._discover_browser(engine, url)
+
+        jobs = []
+        for stream in sorted(streams):
+            if any(keyword in stream for keyword in INVALID_URL_KEYWORDS):
+                print(f"❌ [{self.name}] Ignorando URL inválido/de rastreamento: {stream}")
+            elif is_live_url(stream):
+                jobs.append((stream, url))
+        with self._lock:
+            tier = self._page_info.get(url, (None, None, None))[2] if jobs else None
+        engine.record_tier(url, tier, http_tried)
+        return jobs
+
+    def _discover_http(self, engine, url):
+        """Stream de live achado só com HTTP, ou None para cair no navegador."""
+        headers = self.http_headers(url)
+        for tier, candidates, http_page in engine.http.iter_candidates(url, self.player_apis, headers):
+            # Sem o indicador no HTML do servidor, a página pode montá-lo via JavaScript
+            if not ON_AIR_RE.search(http_page.html):
+                return None
+            if not candidates:
+                continue
+            m3u8 = resolve_candidates(None, candidates, tier, self.name, headers)
+            if m3u8 and "live" in m3u8.lower():
+                print(f"⚡ [{self.name}] Live via {tier}, sem navegador: {url}")
+                with self._lock:
+                    self._page_info[url] = (http_page.title, http_page.logo(self.logo_selectors), tier)
+                return {m3u8}
+        return None
+
+    def _discover_browser(self, engine, url):
+        streams = set()
         try:
-            driver_temp = webdriver.Chrome(options=options)
-            driver_temp.execute_script("Object.defineProperty(navigator, \'webdriver\', {get: () => undefined})")
-            driver_temp.get(page_url)
-            time.sleep(5)
-            handle_cookie_consent(driver_temp)
-            
-            # Extrair logo/thumbnail
-            thumb = extract_logo_from_page(driver_temp)
-            title = driver_temp.title
-            
+            with engine.browser(url, self) as driver:
+                print(f"🔎 [{self.name}] Página potencial de live: {url}")
+                capture = M3u8Capture(driver, deadline=DISCOVERY_DEADLINE, profile=engine.profile)
+                driver.get(url)
+                handle_cookie_consent(driver, self)
+
+                for selector in LIVE_SELECTORS:
+                    for el in driver.find_elements(By.CSS_SELECTOR, selector):
+                        href = el.get_attribute("href") or el.get_attribute("src")
+                        if href and (".m3u8" in href or "live" in href.lower()):
+                            streams.add(href)
+
+                candidates = capture.wait()
+                from_network = resolve_candidates(driver, candidates, "rede", self.name) if candidates else None
+                if from_network and "live" in from_network.lower():
+                    streams.add(from_network)
+                from_source = m3u8_urls_from_source(driver)
+                from_source = resolve_candidates(driver, from_source, "código-fonte", self.name) if from_source else None
+                if from_source and "live" in from_source.lower():
+                    streams.add(from_source)
+
+                if not driver.find_elements(By.XPATH, ON_AIR_XPATH):
+                    print(f"⚠️ [{self.name}] Sem indicador 'On Air Now'/'LIVE' em {url}; URLs ignoradas")
+                    return set()
+                with self._lock:
+                    self._page_info[url] = (driver.title, extract_logo(driver, self), TIER_BROWSER)
         except Exception as e:
-            print(f"Erro ao extrair dados da página {page_url}: {e}")
-            thumb = None
-            title = f"Fox News Live Stream - {page_url.split('/')[-1]}"
-        finally:
-            if driver_temp:
-                driver_temp.quit()
-
-        if m3u8_url:
-            thumb = thumb or ""
-            # O título pode ser muito longo, vamos tentar pegar o que está em "On Air Now" se possível,
-            # mas por enquanto, usamos o título da página.
-            final_stream_data.add((m3u8_url, title, thumb))
-            print(f"✅ Sucesso: {title} | Logo: {thumb}")
-        else:
-            print(f"❌ M3U8 não encontrado para {page_url}")
+            print(f"❌ [{self.name}] Erro ao processar página de live {url}: {e}")
+            return set()
+        return streams
 
-        time.sleep(5)
+    def scrape(self, engine, job):
+        stream, page_url = job
+        with self._lock:
+            title, logo, tier = self._page_info.get(page_url, (None, None, TIER_BROWSER))
+        title = title or f"Fox News Live Stream - {page_url.rstrip('/').split('/')[-1]}"
 
-    with open("lista_foxnews.m3u", "w", encoding="utf-8") as f:
-        f.write("#EXTM3U\n")
-        
-        for m3u8_url, title, thumb in final_stream_data:
-            f.write(f'#EXTINF:-1 tvg-logo="{thumb}" group-title="FOX NEWS VIDEO", {title}\n')
-            f.write(f"{m3u8_url}\n")
+        # Confere o stream antes de gravar: descarta legendas/áudio e troca pela master ou variante certa
+        if ".m3u8" in stream.lower():
+            stream = resolve_m3u8([stream], {"Referer": page_url})
+        if not stream:
+            print(f"❌ [{self.name}] M3U8 não encontrado para {page_url}")
+            return None
+        print(f"✅ [{self.name}] {title} | Logo: {logo}")
+        return StreamEntry(stream, title, logo, page_url, tier)
 
 
-    print("\n" + "=" * 60)
-    print(f"✅ Processamento concluído! {len(final_stream_data)} streams válidos salvos em: lista_foxnews.m3u")
-    print("=" * 60)
+SITE = FoxNewsSite
 
 if __name__ == "__main__":
-    main()
+    run_sites([FoxNewsSite()])
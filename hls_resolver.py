@@ -0,0 +1,252 @@
+"""
+Resolução de playlists HLS capturadas pelos scrapers.
+
+O navegador registra várias URLs .m3u8 por página: a master, as variantes de
+cada qualidade, faixas de áudio e legendas. Em vez de escolher pelo nome da
+URL, cada candidata é baixada e interpretada: master (tem #EXT-X-STREAM-INF),
+variante de vídeo, só áudio ou legendas. A escolha final é a master ou,
+com limite de BANDWIDTH/altura configurado, a melhor variante dentro do
+limite (o player economiza o download da master). Candidatas quebradas ou
+que não são HLS são descartadas antes de ir para a lista.
+
+O resultado de cada URL fica em memória, então a mesma playlist vista em
+várias páginas é baixada uma vez só.
+"""
+
+import os
+import re
+import threading
+from urllib.parse import urljoin
+
+import requests
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+# Limites padrão lidos do ambiente; 0 desliga o limite e mantém sempre a master
+MAX_BANDWIDTH = int(os.environ.get('HLS_MAX_BANDWIDTH', 0))
+MAX_HEIGHT = int(os.environ.get('HLS_MAX_HEIGHT', 0))
+
+MASTER = 'master'
+VARIANT = 'variant'
+AUDIO_ONLY = 'audio'
+SUBTITLES = 'subtitles'
+INVALID = 'invalid'
+
+_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+_AUDIO_CODECS = ('mp4a', 'ac-3', 'ec-3', 'opus', 'flac', 'mp3')
+_AUDIO_EXTENSIONS = ('.aac', '.m4a', '.mp3', '.ac3', '.ec3')
+_SUBTITLE_EXTENSIONS = ('.vtt', '.webvtt', '.srt')
+
+
+def parse_attributes(text):
+    """Atributos de uma tag HLS (BANDWIDTH=..., CODECS="...") como dicionário."""
+    return {key: value.strip('"') for key, value in _ATTR_RE.findall(text)}
+
+
+class Variant:
+    __slots__ = ('url', 'bandwidth', 'width', 'height', 'codecs', 'audio_group')
+
+    def __init__(self, url, attrs):
+        self.url = url
+        self.bandwidth = int(attrs.get('AVERAGE-BANDWIDTH') or attrs.get('BANDWIDTH') or 0)
+        self.width, self.height = 0, 0
+        resolution = attrs.get('RESOLUTION', '')
+        if 'x' in resolution:
+            width, _, height = resolution.partition('x')
+            if width.isdigit() and height.isdigit():
+                self.width, self.height = int(width), int(height)
+        self.codecs = attrs.get('CODECS', '')
+        self.audio_group = attrs.get('AUDIO')
+
+    @property
+    def audio_only(self):
+        if self.height:
+            return False
+        codecs = [c.strip().lower() for c in self.codecs.split(',') if c.strip()]
+        return bool(codecs) and all(c.startswith(_AUDIO_CODECS) for c in codecs)
+
+
+class HlsPlaylist:
+    """Playlist HLS interpretada: tipo, variantes (master) e segmentos (media)."""
+
+    def __init__(self, url, kind, variants=(), audio_groups=(), segments=0, live=False, error=None):
+        self.url = url
+        self.kind = kind
+        self.variants = list(variants)
+        self.audio_groups = frozenset(audio_groups)  # grupos com faixa de áudio separada
+        self.segments = segments
+        self.live = live
+        self.error = error
+
+    def video_variants(self):
+        return [v for v in self.variants if not v.audio_only]
+
+    def best_variant(self, max_bandwidth=0, max_height=0):
+        """Variante de maior qualidade dentro dos limites (ou a menor, se nenhuma couber)."""
+        variants = self.video_variants()
+        if not variants:
+            return None
+        fitting = [
+            v for v in variants
+            if (not max_bandwidth or v.bandwidth <= max_bandwidth)
+            and (not max_height or v.height <= max_height)
+        ]
+        if not fitting:
+            return min(variants, key=lambda v: (v.height, v.bandwidth))
+        return max(fitting, key=lambda v: (v.height, v.bandwidth))
+
+
+def parse_playlist(text, url):
+    """Classifica o conteúdo de uma .m3u8 baixada de `url`."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or not lines[0].startswith('#EXTM3U'):
+        return HlsPlaylist(url, INVALID, error='não é uma playlist HLS')
+
+    variants = []
+    audio_groups = set()
+    pending = None
+    segment_uris = []
+    live = True
+    for line in lines[1:]:
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            pending = parse_attributes(line.partition(':')[2])
+        elif line.startswith('#EXT-X-MEDIA:'):
+            attrs = parse_attributes(line.partition(':')[2])
+            if attrs.get('TYPE') == 'AUDIO' and attrs.get('URI'):
+                audio_groups.add(attrs.get('GROUP-ID'))
+        elif line.startswith('#EXT-X-ENDLIST'):
+            live = False
+        elif not line.startswith('#'):
+            if pending is not None:
+                variants.append(Variant(urljoin(url, line), pending))
+                pending = None
+            else:
+                segment_uris.append(line.split('?', 1)[0].lower())
+
+    if variants:
+        kind = MASTER if any(not v.audio_only for v in variants) else AUDIO_ONLY
+        return HlsPlaylist(url, kind, variants, audio_groups)
+    if not segment_uris:
+        return HlsPlaylist(url, INVALID, error='playlist sem segmentos')
+    if all(uri.endswith(_SUBTITLE_EXTENSIONS) for uri in segment_uris):
+        kind = SUBTITLES
+    elif all(uri.endswith(_AUDIO_EXTENSIONS) for uri in segment_uris):
+        kind = AUDIO_ONLY
+    else:
+        kind = VARIANT
+    return HlsPlaylist(url, kind, segments=len(segment_uris), live=live)
+
+
+class HlsResolver:
+    """
+    Escolhe a melhor URL HLS entre as candidatas capturadas de uma página.
+
+    `max_bandwidth` (bits/s) e `max_height` (linhas) limitam a qualidade; sem
+    limite a master é mantida para o player fazer a troca adaptativa.
+    """
+
+    def __init__(self, max_bandwidth=MAX_BANDWIDTH, max_height=MAX_HEIGHT, timeout=15, session=None):
+        self.max_bandwidth = max_bandwidth
+        self.max_height = max_height
+        self.timeout = timeout
+        if session is None:
+            # Os cabeçalhos padrão só vão para a sessão criada aqui; a de quem chama fica intacta
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+        self.session = session
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url, headers=None):
+        """Baixa e interpreta a playlist, reaproveitando o resultado já obtido para a URL."""
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached is not None:
+            return cached
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            playlist = parse_playlist(response.text, response.url)
+            playlist.url = url
+        except requests.RequestException as e:
+            playlist = HlsPlaylist(url, INVALID, error=str(e))
+        with self._lock:
+            self._cache[url] = playlist
+        return playlist
+
+    @property
+    def limited(self):
+        return bool(self.max_bandwidth or self.max_height)
+
+    def _pick_from_master(self, master, headers):
+        """URL final a partir de uma master: ela própria ou a melhor variante dentro do limite."""
+        if not self.limited:
+            return master.url
+        best = master.best_variant(self.max_bandwidth, self.max_height)
+        # Áudio em faixa separada só é tocado a partir da master
+        if best is None or best.audio_group in master.audio_groups:
+            return master.url
+        if self.fetch(best.url, headers).kind != VARIANT:
+            return master.url
+        return best.url
+
+    def resolve(self, candidates, headers=None):
+        """
+        Devolve a melhor URL entre as candidatas, ou None se nenhuma for uma
+        playlist de vídeo válida.
+        """
+        seen = set()
+        playlists = []
+        for url in candidates:
+            if url and url not in seen:
+                seen.add(url)
+                playlists.append(self.fetch(url, headers))
+
+        masters = [p for p in playlists if p.kind == MASTER]
+        if masters:
+            # A master com mais variantes de vídeo é a principal; as outras costumam ser parciais
+            master = max(masters, key=lambda p: len(p.video_variants()))
+            return self._pick_from_master(master, headers)
+        for playlist in playlists:
+            if playlist.kind == VARIANT:
+                return playlist.url
+        return None
+
+    def describe(self, url):
+        """Texto curto com o tipo da URL já resolvida, para os logs dos scrapers."""
+        playlist = self._cache.get(url)
+        if playlist is None:
+            return 'não verificada'
+        if playlist.kind == MASTER:
+            return f'master com {len(playlist.video_variants())} variantes'
+        return playlist.kind if not playlist.error else f'{playlist.kind}: {playlist.error}'
+
+
+def headers_from_driver(driver):
+    """User-Agent e Referer da página aberta no Selenium, para baixar as playlists como o player."""
+    headers = {}
+    try:
+        headers['User-Agent'] = driver.execute_script('return navigator.userAgent;')
+        headers['Referer'] = driver.current_url
+    except Exception:
+        pass
+    return {key: value for key, value in headers.items() if value}
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Resolvedor compartilhado pelo processo, com os limites do ambiente."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = HlsResolver()
+        return _resolver
+
+
+def resolve_m3u8(candidates, headers=None):
+    """Atalho para get_resolver().resolve(candidates, headers)."""
+    return get_resolver().resolve(candidates, headers)
@@ -0,0 +1,280 @@
+"""
+Cache HTTP persistente em disco, compartilhado por todos os scripts que baixam
+listas M3U e EPGs.
+
+Cada URL guarda ETag/Last-Modified no índice; os downloads seguintes enviam
+If-None-Match/If-Modified-Since e, quando o servidor responde 304, o conteúdo
+é servido do disco. Os arquivos são endereçados pelo SHA-256 do conteúdo e
+removidos por LRU quando o cache passa do tamanho máximo; objetos que nenhuma
+URL referencia mais e .part de downloads interrompidos também são apagados.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+CACHE_DIR = os.environ.get(
+    'HTTP_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'http'),
+)
+CACHE_MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+CHUNK_SIZE = 64 * 1024
+PART_MAX_AGE = 3600  # .part mais antigos que isso são de downloads interrompidos
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+class CachedDownload:
+    """Resultado de um download: o conteúdo fica no arquivo `path` do cache."""
+
+    __slots__ = ('url', 'path', 'sha256', 'size', 'content_type', 'from_cache')
+
+    def __init__(self, url, path, sha256, size, content_type, from_cache):
+        self.url = url
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.from_cache = from_cache
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        with self.open() as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+
+    def read_bytes(self):
+        with self.open() as f:
+            return f.read()
+
+    @property
+    def encoding(self):
+        for param in self.content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"\'')
+        return 'utf-8'
+
+    def text(self, errors='replace'):
+        try:
+            return self.read_bytes().decode(self.encoding, errors=errors)
+        except LookupError:
+            return self.read_bytes().decode('utf-8', errors=errors)
+
+    def iter_lines(self, errors='replace'):
+        """Gera as linhas do conteúdo, sem a quebra de linha, decodificando aos poucos."""
+        try:
+            encoding = codecs.lookup(self.encoding).name
+        except LookupError:
+            encoding = 'utf-8'
+        if encoding == 'utf-8':
+            encoding = 'utf-8-sig'  # descarta o BOM, que esconderia o #EXTM3U da primeira linha
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        pending = ''
+        for chunk in self.iter_chunks():
+            lines = (pending + decoder.decode(chunk)).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip('\r')
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending.rstrip('\r')
+
+
+class HttpCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, session=None):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+        self.session = session
+        self._lock = threading.Lock()
+        self._pinned = set()  # objetos usados nesta execução nunca são removidos
+        self._revalidating = {}  # sha256 -> requisições condicionais em andamento
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def _result(self, url, entry, from_cache):
+        return CachedDownload(
+            url, self._object_path(entry['sha256']), entry['sha256'], entry['size'],
+            entry.get('content_type', ''), from_cache,
+        )
+
+    def fetch(self, url, timeout=60, headers=None):
+        """
+        Baixa `url` usando GET condicional e devolve um CachedDownload.
+
+        Erros HTTP e de rede são propagados como requests.RequestException.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if entry and not os.path.exists(self._object_path(entry['sha256'])):
+                entry = None
+            if entry:
+                # Outra thread não pode remover o objeto enquanto o servidor responde
+                entry = dict(entry)
+                self._revalidating[entry['sha256']] = self._revalidating.get(entry['sha256'], 0) + 1
+
+        try:
+            return self._fetch(url, entry, timeout, headers)
+        finally:
+            if entry:
+                with self._lock:
+                    count = self._revalidating.pop(entry['sha256']) - 1
+                    if count:
+                        self._revalidating[entry['sha256']] = count
+                    else:
+                        # Conteúdo novo: a versão antiga só fica se outra URL ainda a usa
+                        self._remove_unreferenced(entry['sha256'])
+
+    def _fetch(self, url, entry, timeout, headers):
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        with self.session.get(url, timeout=timeout, stream=True, headers=request_headers) as response:
+            if entry and response.status_code == 304:
+                with self._lock:
+                    entry['last_access'] = time.time()
+                    self._index[url] = entry
+                    self._pinned.add(entry['sha256'])
+                    self._save_index()
+                return self._result(url, entry, from_cache=True)
+
+            response.raise_for_status()
+            fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix='.part')
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+            sha256 = digest.hexdigest()
+            object_path = self._object_path(sha256)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(tmp_path, object_path)
+
+            entry = {
+                'sha256': sha256,
+                'size': size,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('Content-Type', ''),
+                'last_access': time.time(),
+            }
+
+        with self._lock:
+            previous = self._index.get(url)
+            self._index[url] = entry
+            self._pinned.add(sha256)
+            if previous and previous['sha256'] != sha256:
+                self._remove_unreferenced(previous['sha256'])
+            self._evict()
+            self._save_index()
+        return self._result(url, entry, from_cache=False)
+
+    def _in_use(self, sha256):
+        return sha256 in self._pinned or sha256 in self._revalidating
+
+    def _remove_unreferenced(self, sha256):
+        """Apaga o objeto substituído se nenhuma outra URL o usa."""
+        if self._in_use(sha256) or any(entry['sha256'] == sha256 for entry in self._index.values()):
+            return
+        try:
+            os.remove(self._object_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def _remove_orphans(self):
+        """Apaga objetos que o índice não referencia e .part de downloads interrompidos."""
+        referenced = {entry['sha256'] for entry in self._index.values()}
+        stale_before = time.time() - PART_MAX_AGE
+        for root, _, names in os.walk(self.objects_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    if name.endswith('.part'):
+                        if os.path.getmtime(path) < stale_before:
+                            os.remove(path)
+                    elif name not in referenced and not self._in_use(name):
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _evict(self):
+        """Remove os objetos menos usados recentemente até caber em max_bytes."""
+        self._remove_orphans()
+        objects = {}
+        for url, entry in self._index.items():
+            sha256 = entry['sha256']
+            size, last_access, urls = objects.get(sha256, (entry['size'], 0, []))
+            urls.append(url)
+            objects[sha256] = (size, max(last_access, entry.get('last_access', 0)), urls)
+
+        total = sum(size for size, _, _ in objects.values())
+        for sha256, (size, _, urls) in sorted(objects.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if self._in_use(sha256):
+                continue
+            try:
+                os.remove(self._object_path(sha256))
+            except FileNotFoundError:
+                pass
+            for url in urls:
+                del self._index[url]
+            total -= size
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+        return _default_cache
+
+
+def download(url, timeout=60, headers=None, cache=None):
+    """Função de download única dos scripts: GET condicional através do cache em disco."""
+    return (cache or get_cache()).fetch(url, timeout=timeout, headers=headers)
@@ -0,0 +1,277 @@
+"""
+Caminho rápido só HTTP dos scrapers, tentado antes de abrir um navegador.
+
+Muitas páginas já trazem no HTML do servidor a URL do stream, ou o JSON de
+configuração do player que a contém. HttpFastPath baixa a página com uma
+sessão HTTP compartilhada (conexões reaproveitadas) e procura as .m3u8 em
+camadas, da mais barata para a mais cara:
+
+- 'html': os padrões de código-fonte (M3U8_SOURCE_PATTERNS) no HTML;
+- 'api': os endpoints JSON do player que o plugin conhece (`player_apis`),
+  com o id tirado da URL ou do HTML da página;
+- 'navegador': o fluxo completo no Chrome, só quando as anteriores falham.
+
+TierStore guarda a camada que resolveu cada página (.cache/scraper_tiers.json).
+Páginas estáveis continuam no caminho barato; nas que sempre precisam do
+navegador o HTTP deixa de ser tentado depois de HTTP_SKIP_AFTER falhas
+seguidas e volta a ser testado de tempos em tempos (intervalo que dobra a
+cada nova falha, até HTTP_RETRY_MAX).
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+TIER_HTML = 'html'
+TIER_API = 'api'
+TIER_BROWSER = 'navegador'
+HTTP_TIERS = (TIER_HTML, TIER_API)
+
+TIERS_PATH = os.environ.get(
+    'SCRAPER_TIERS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'scraper_tiers.json'),
+)
+# SCRAPER_HTTP_FIRST=0 vai direto para o navegador
+HTTP_FIRST = os.environ.get('SCRAPER_HTTP_FIRST', '1') != '0'
+HTTP_SKIP_AFTER = 2
+HTTP_RETRY_INTERVAL = 24 * 3600
+HTTP_RETRY_MAX = 7 * 24 * 3600
+PAGE_TIMEOUT = 15
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+MAX_API_CALLS = 3   # endpoints de player chamados por página
+DETECT_BYTES = 64 * 1024  # bytes usados para adivinhar a codificação de páginas sem charset
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+}
+
+M3U8_SOURCE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'https?://[^\s"\'<>]+?\.m3u8[^\s"\'<>]*',
+        r'"(https?://[^"]+?\.m3u8[^"]*)"',
+        r"'(https?://[^']+\.m3u8[^']*)'",
+        r'src="([^"]+?\.m3u8[^"]*)"',
+        r"src='([^']+\.m3u8[^']*)'",
+        r'(?:url|source|file):\s*["\']([^"\']+?\.m3u8[^"\']*)["\']',
+        r'"hls_url":"(.*?\.m3u8.*?)"',
+        r'"src":"(.*?\.m3u8.*?)"',
+    )
+]
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w:.-]+)', re.IGNORECASE)
+# Seletores simples de metadado, como os logo_selectors dos plugins: meta[property='og:image']
+_TAG_SELECTOR_RE = re.compile(r"""^(meta|link)\[([\w:-]+)=['"]([^'"]+)['"]\]$""")
+
+
+def m3u8_urls_from_html(html, base):
+    """URLs .m3u8 num HTML ou JSON (relativas e com barras escapadas de JSON resolvidas)."""
+    urls = []
+    # JSON embutido costuma escapar as barras ("https:\/\/..."), o que esconde as URLs dos padrões
+    html = html.replace('\\/', '/').replace('\\u002F', '/')
+    for pattern in M3U8_SOURCE_PATTERNS:
+        for match in pattern.findall(html):
+            url = urljoin(base, match)
+            if url not in urls:
+                urls.append(url)
+    return urls
+
+
+def page_encoding(content_type, body):
+    """
+    Codificação do corpo: o charset do Content-Type, senão o <meta charset> da
+    página, senão a detectada pelo conteúdo (como response.apparent_encoding),
+    senão UTF-8. Sem charset no cabeçalho o requests supõe ISO-8859-1 para
+    text/html, o que estraga os acentos das páginas em UTF-8.
+    """
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'charset' and value.strip('"\''):
+            return value.strip('"\'')
+    match = _META_CHARSET_RE.search(body[:4096])
+    if match:
+        return match.group(1).decode('ascii')
+    if chardet is not None and body:
+        detected = chardet.detect(body[:DETECT_BYTES]).get('encoding')
+        if detected:
+            return detected
+    return 'utf-8'
+
+
+class HttpPage(HTMLParser):
+    """HTML de uma página baixada, com o <title> e os atributos das tags <meta> e <link>."""
+
+    def __init__(self, url, html):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.html = html
+        self.title = ''
+        self._tags = {}
+        self._title_parts = None
+        try:
+            self.feed(html)
+            self.close()
+        except Exception:
+            pass
+        self.title = self.title.strip() or self.meta('og:title') or ''
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and not self.title and self._title_parts is None:
+            self._title_parts = []
+        elif tag in ('meta', 'link'):
+            attrs = {key: value or '' for key, value in attrs}
+            for key in ('property', 'name', 'itemprop', 'rel'):
+                if attrs.get(key):
+                    self._tags.setdefault((tag, key, attrs[key].lower()), attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+    def meta(self, name):
+        for key in ('property', 'name', 'itemprop'):
+            attrs = self._tags.get(('meta', key, name.lower()))
+            if attrs and attrs.get('content'):
+                return attrs['content']
+        return None
+
+    def logo(self, selectors):
+        """Primeiro logo dos seletores (tag, atributo) do plugin que dá para ler sem navegador."""
+        for selector, attr in selectors:
+            match = _TAG_SELECTOR_RE.match(selector)
+            if not match:
+                continue
+            tag, key, value = match.groups()
+            logo = (self._tags.get((tag, key, value.lower())) or {}).get(attr)
+            if logo:
+                logo = urljoin(self.url, logo)
+                if logo.startswith('http'):
+                    return logo
+        return None
+
+
+class TierStore:
+    """Camada que resolveu cada página nas últimas execuções."""
+
+    def __init__(self, path=TIERS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                pages = json.load(f)
+            return pages if isinstance(pages, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def tier(self, page):
+        with self._lock:
+            return self._pages.get(page, {}).get('tier')
+
+    def should_try_http(self, page, now=None):
+        """O caminho HTTP vale a tentativa? Não, se falhou seguidas vezes e ainda não venceu o intervalo."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._pages.get(page)
+        if not state or state.get('http_misses', 0) < HTTP_SKIP_AFTER:
+            return True
+        interval = min(HTTP_RETRY_INTERVAL * 2 ** (state['http_misses'] - HTTP_SKIP_AFTER), HTTP_RETRY_MAX)
+        return now - state.get('http_checked', 0) >= interval
+
+    def record(self, page, tier, http_tried, now=None):
+        """Registra o resultado de uma página; `tier` None quando nenhuma camada achou a .m3u8."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._pages.setdefault(page, {})
+            if tier is not None:
+                state['tier'] = tier
+                state['ok'] = now
+            if tier in HTTP_TIERS:
+                state['http_misses'] = 0
+                state['http_checked'] = now
+            elif http_tried:
+                state['http_misses'] = state.get('http_misses', 0) + 1
+                state['http_checked'] = now
+
+    def save(self):
+        """Grava o JSON (arquivo temporário + rename)."""
+        with self._lock:
+            data = json.dumps(self._pages, indent=1, sort_keys=True)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+class HttpFastPath:
+    """Busca as .m3u8 de uma página só com HTTP, camada por camada."""
+
+    def __init__(self, session=None, timeout=PAGE_TIMEOUT, pool_size=10):
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+
+    def fetch(self, url, headers=None):
+        """Texto e URL final da resposta, ou (None, url) em erro; lê no máximo MAX_PAGE_BYTES."""
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= MAX_PAGE_BYTES:
+                        break
+                body = b''.join(chunks)
+                try:
+                    text = body.decode(page_encoding(response.headers.get('Content-Type', ''), body), 'replace')
+                except LookupError:
+                    text = body.decode('utf-8', 'replace')
+                return text, response.url
+        except requests.RequestException:
+            return None, url
+
+    def iter_candidates(self, page, player_apis=(), headers=None):
+        """
+        (camada, candidatas .m3u8, HttpPage) de cada camada HTTP. É um gerador:
+        as APIs do player só são chamadas se quem consome pedir a camada seguinte.
+        """
+        html, final_url = self.fetch(page, headers)
+        if html is None:
+            return
+        http_page = HttpPage(final_url, html)
+        yield TIER_HTML, m3u8_urls_from_html(html, final_url), http_page
+
+        api_headers = dict(headers or {}, Referer=final_url)
+        seen = set()
+        for pattern, template in player_apis:
+            for match in re.finditer(pattern, page + '\n' + html):
+                api_url = template.format(*match.groups())
+                if api_url in seen:
+                    continue
+                if len(seen) >= MAX_API_CALLS:
+                    return
+                seen.add(api_url)
+                text, api_final = self.fetch(api_url, api_headers)
+                if text:
+                    yield TIER_API, m3u8_urls_from_html(text, api_final), http_page
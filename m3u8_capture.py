@@ -0,0 +1,224 @@
+"""
+Captura das playlists .m3u8 pedidas por uma página, sem esperas fixas.
+
+Os scrapers dormiam dezenas de segundos por URL esperando o player pedir a
+playlist. M3u8Capture é criada antes do driver.get e acompanha as requisições
+por duas vias:
+
+- o log de performance do ChromeDriver (eventos Network.* do DevTools), que
+  também reconhece playlists pelo Content-Type quando a URL não tem .m3u8;
+  requer enable_network_log(options) nas opções do Chrome;
+- um PerformanceObserver injetado em cada documento (iframes repassam o que
+  veem para a página principal), com o buffer de Resource Timing ampliado,
+  pois o padrão de 250 entradas esgota em páginas cheias de anúncios.
+
+wait() devolve assim que a primeira playlist aparece, mais uma janela curta
+(`settle`) para pegar a master que costuma vir logo depois, ou no prazo
+máximo (`deadline`, contado desde a criação da captura).
+
+Com um CaptureProfile a aba também deixa de baixar o que não interessa
+(imagens, fontes, rastreadores...) e, assim que a playlist é vista, os
+segmentos de mídia (.ts/.m4s/.aac): só o endereço do manifesto importa. Os
+scripts do player continuam liberados, pois são eles que geram a .m3u8 com
+token. O bloqueio usa Network.setBlockedURLs (padrões de URL com '*'), que
+funciona pelo execute_cdp_cmd do Selenium; a interceptação pelo domínio
+Fetch exigiria tratar eventos, o que o Selenium não expõe.
+"""
+
+import json
+import os
+import time
+
+DEADLINE = float(os.environ.get('M3U8_CAPTURE_DEADLINE', 30))
+SETTLE = float(os.environ.get('M3U8_CAPTURE_SETTLE', 2))
+POLL_INTERVAL = 0.25
+
+# Classes de recurso bloqueáveis, por padrão de URL
+RESOURCE_PATTERNS = {
+    'images': ('*.jpg', '*.jpg?*', '*.jpeg', '*.jpeg?*', '*.png', '*.png?*', '*.gif', '*.gif?*',
+               '*.webp', '*.webp?*', '*.avif', '*.avif?*', '*.svg', '*.svg?*', '*.ico', '*.ico?*'),
+    'fonts': ('*.woff', '*.woff?*', '*.woff2', '*.woff2?*', '*.ttf', '*.ttf?*', '*.otf', '*.otf?*', '*.eot', '*.eot?*'),
+    'styles': ('*.css', '*.css?*'),
+}
+TRACKER_DOMAINS = (
+    'chartbeat.net', 'chartbeat.com', 'doubleclick.net', 'googlesyndication.com', 'google-analytics.com',
+    'googleadservices.com', 'adservice.google.com', 'scorecardresearch.com', 'omtrdc.net', 'demdex.net',
+    'everesttech.net', 'facebook.net', 'connect.facebook.com', 'amazon-adsystem.com', 'adsafeprotected.com',
+    'moatads.com', 'taboola.com', 'outbrain.com', 'criteo.com', 'criteo.net', 'hotjar.com', 'nr-data.net',
+    'krxd.net', 'quantserve.com', 'permutive.com', 'bounceexchange.com', 'branch.io', 'tiqcdn.com',
+)
+SEGMENT_PATTERNS = ('*.ts', '*.ts?*', '*.m4s', '*.m4s?*', '*.aac', '*.aac?*', '*.m4a', '*.m4a?*', '*.vtt', '*.vtt?*')
+# Classes bloqueadas por padrão; SCRAPER_BLOCK='' desliga o bloqueio
+DEFAULT_BLOCK = tuple(c.strip() for c in os.environ.get('SCRAPER_BLOCK', 'images,fonts,trackers').split(',') if c.strip())
+
+HLS_MIME_TYPES = ('application/vnd.apple.mpegurl', 'application/x-mpegurl', 'audio/mpegurl', 'audio/x-mpegurl')
+
+OBSERVER_JS = """
+(function () {
+  if (window.__m3u8Capture) return;
+  var found = window.__m3u8Capture = [];
+  function add(url) {
+    if (typeof url !== 'string' || url.indexOf('.m3u8') === -1 || found.indexOf(url) !== -1) return;
+    found.push(url);
+    if (window.top !== window) {
+      try { window.top.postMessage({m3u8Capture: url}, '*'); } catch (e) {}
+    }
+  }
+  try { performance.setResourceTimingBufferSize(10000); } catch (e) {}
+  try {
+    new PerformanceObserver(function (list) {
+      list.getEntries().forEach(function (entry) { add(entry.name); });
+    }).observe({type: 'resource', buffered: true});
+  } catch (e) {}
+  window.addEventListener('message', function (event) {
+    if (event.data && event.data.m3u8Capture) add(event.data.m3u8Capture);
+  });
+})();
+"""
+
+READ_PAGE_JS = """
+var urls = (window.__m3u8Capture || []).slice();
+performance.getEntriesByType('resource').forEach(function (entry) {
+  if (entry.name.indexOf('.m3u8') !== -1) urls.push(entry.name);
+});
+return urls;
+"""
+
+
+def enable_network_log(options):
+    """Liga o log de performance (eventos de rede do DevTools) nas opções do Chrome."""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def is_m3u8(url, mime_type=''):
+    if not url or url.startswith(('data:', 'blob:')):
+        return False
+    return '.m3u8' in url.lower() or (mime_type or '').lower().split(';')[0].strip() in HLS_MIME_TYPES
+
+
+class CaptureProfile:
+    """
+    Bloqueios de rede de uma aba de captura: `block` lista classes de
+    RESOURCE_PATTERNS e/ou 'trackers' (TRACKER_DOMAINS e `extra_domains`);
+    com `block_segments`, os segmentos de mídia são cortados depois que a
+    primeira playlist é vista.
+    """
+
+    def __init__(self, block=DEFAULT_BLOCK, extra_domains=(), block_segments=True):
+        unknown = set(block) - set(RESOURCE_PATTERNS) - {'trackers'}
+        if unknown:
+            raise ValueError(f"classes de bloqueio desconhecidas: {', '.join(sorted(unknown))}")
+        self.block = tuple(block)
+        self.domains = (TRACKER_DOMAINS if 'trackers' in self.block else ()) + tuple(extra_domains)
+        self.block_segments = block_segments
+
+    def patterns(self, segments=False):
+        patterns = [p for name in self.block for p in RESOURCE_PATTERNS.get(name, ())]
+        patterns += [f'*{domain}/*' for domain in self.domains]
+        if segments:
+            patterns += SEGMENT_PATTERNS
+        return patterns
+
+    def apply(self, driver, segments=False):
+        """Instala os bloqueios na aba atual; devolve False se o DevTools não estiver disponível."""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.patterns(segments)})
+            return True
+        except Exception:
+            return False
+
+
+class M3u8Capture:
+    """Playlists .m3u8 vistas na aba atual do driver, na ordem em que apareceram."""
+
+    def __init__(self, driver, deadline=DEADLINE, settle=SETTLE, profile=None):
+        self.driver = driver
+        self.deadline = deadline
+        self.settle = settle
+        self.profile = profile
+        self.urls = []
+        self.started = time.monotonic()
+        self.first_seen = None
+        self._use_log = True
+        try:
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': OBSERVER_JS})
+        except Exception:
+            pass
+        # Eventos que sobraram de páginas anteriores não são desta captura
+        self._read_log()
+        if profile is not None:
+            profile.apply(driver)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def _read_log(self):
+        if not self._use_log:
+            return []
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            self._use_log = False
+            return []
+        urls = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                url = params.get('request', {}).get('url', '')
+                if is_m3u8(url):
+                    urls.append(url)
+            elif method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if is_m3u8(response.get('url', ''), response.get('mimeType', '')):
+                    urls.append(response['url'])
+        return urls
+
+    def _read_page(self):
+        try:
+            return self.driver.execute_script(READ_PAGE_JS) or []
+        except Exception:
+            return []
+
+    def poll(self):
+        """Lê os eventos novos e devolve as playlists ainda não vistas."""
+        new = []
+        for url in self._read_log() + self._read_page():
+            if url not in self.urls:
+                self.urls.append(url)
+                new.append(url)
+        if new and self.first_seen is None:
+            self.first_seen = time.monotonic()
+            if self.profile is not None and self.profile.block_segments:
+                self.profile.apply(self.driver, segments=True)
+        return new
+
+    def found(self):
+        """Já apareceu alguma playlist? (lê os eventos pendentes antes de responder)"""
+        self.poll()
+        return bool(self.urls)
+
+    def wait(self, deadline=None, settle=None):
+        """
+        Espera a primeira playlist e mais `settle` segundos, sem passar do
+        prazo. Devolve todas as URLs capturadas (lista vazia se nenhuma).
+        """
+        deadline = self.deadline if deadline is None else deadline
+        settle = self.settle if settle is None else settle
+        end = self.started + deadline
+        while True:
+            self.poll()
+            now = time.monotonic()
+            if self.first_seen is not None and now >= min(self.first_seen + settle, end):
+                break
+            if now >= end:
+                break
+            time.sleep(POLL_INTERVAL)
+        return list(self.urls)
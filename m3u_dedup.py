@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Deduplicação de streams entre playlists.
+
+A mesma transmissão aparece em várias listas com tokens, parâmetros de
+rastreamento ou grafias de tvg-id diferentes. Cada URL é reduzida a uma forma
+canônica (host normalizado, caminho limpo, sem parâmetros voláteis) e
+indexada por hash, junto com o tvg-id normalizado. Todas as playlists são
+percorridas uma única vez, na ordem dada: a primeira ocorrência de um stream
+é mantida e as repetições são removidas e registradas no relatório.
+
+Uso: python m3u_dedup.py [--output-dir DIR | --in-place] [--por-tvg-id] [--relatorio ARQ] PLAYLIST...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from m3u_tokenizer import Channel
+
+# Parâmetros que mudam a cada sessão/dispositivo sem mudar o stream
+VOLATILE_PARAMS = frozenset((
+    'token', 'auth', 'wmsauthsign', 'hdnts', 'hdnea', 'hdntl', 'signature', 'sig', 'expires',
+    'exp', 'e', 'st', 'md5', 'hash', 'policy', 'key-pair-id', 'cb', 'cachebuster', 'nocache',
+    '_', 't', 'ts', 'timestamp', 'rnd', 'random', 'sid', 'sessionid', 'session_id', 'uuid',
+    'deviceid', 'did', 'advertisingid', 'ifa', 'us_privacy', 'gdpr', 'gdpr_consent',
+    'devicelat', 'devicelon', 'devicednt', 'devicemake', 'devicemodel', 'deviceversion',
+    'appversion',
+))
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonical_url(url):
+    """
+    Forma canônica de uma URL de stream: esquema ignorado (http e https valem o
+    mesmo), host em minúsculas sem 'www.' nem porta padrão, caminho normalizado
+    e parâmetros estáveis em ordem alfabética, sem os voláteis nem o fragmento.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f'{host}:{port}'
+    path = posixpath.normpath(parts.path) if parts.path else '/'
+    if path == '.':
+        path = '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in VOLATILE_PARAMS
+    )
+    return host + path + ('?' + urlencode(query) if query else '')
+
+
+def normalize_tvg_id(tvg_id):
+    """tvg-id sem acentos, maiúsculas, espaços nem pontuação ('SIC Notícias.pt' == 'sicnoticias.pt')."""
+    text = unicodedata.normalize('NFKD', tvg_id).casefold()
+    return ''.join(ch for ch in text if ch.isalnum() or ch in '.@')
+
+
+def _key(value):
+    """Chave compacta do índice: 8 bytes de BLAKE2b como inteiro."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# Diretivas que alguns players (Kodi) aceitam antes do #EXTINF e que pertencem à entrada seguinte
+ENTRY_DIRECTIVES = ('#KODIPROP', '#EXTVLCOPT', '#EXTHTTP', '#EXTGRP')
+
+
+def extinf_index(block):
+    """Posição da linha #EXTINF no bloco de uma entrada."""
+    for i, line in enumerate(block):
+        if line.lstrip().startswith('#EXTINF'):
+            return i
+    return -1
+
+
+def iter_blocks(lines):
+    """
+    Agrupa as linhas da playlist em blocos: (Channel, linhas) para cada entrada
+    (#EXTINF, opções como #EXTVLCOPT e a URL, mais as diretivas como #KODIPROP
+    logo antes do #EXTINF) e (None, [linha]) para o resto. As linhas são
+    repassadas como vieram, com a quebra de linha original.
+    """
+    block = None
+    directives = []
+    for line in lines:
+        text = line.strip()
+        if text.startswith('#EXTINF'):
+            if block is not None:
+                yield None, block
+            block = directives + [line]
+            directives = []
+        elif block is not None:
+            block.append(line)
+            if text and not text.startswith('#'):
+                yield Channel.from_extinf(block[extinf_index(block)].strip(), text), block
+                block = None
+        elif text.startswith(ENTRY_DIRECTIVES):
+            directives.append(line)
+        else:
+            for directive in directives:
+                yield None, [directive]
+            directives = []
+            yield None, [line]
+    if block is not None:
+        yield None, block
+    for directive in directives:
+        yield None, [directive]
+
+
+class DedupIndex:
+    """
+    Índice de streams já vistos, por URL canônica e (opcionalmente) por tvg-id.
+    Com `by_tvg_id`, entradas com o mesmo tvg-id normalizado também contam como
+    repetidas, mesmo que apontem para URLs diferentes (streams alternativos).
+    """
+
+    def __init__(self, by_tvg_id=False):
+        self.by_tvg_id = by_tvg_id
+        self._urls = {}
+        self._tvg_ids = {}
+        self.occurrences = []  # (playlist, linha, nome, URL) de cada entrada mantida
+        self.duplicates = {}   # índice da ocorrência mantida -> [(playlist, linha, nome, URL, motivo)]
+
+    def check(self, channel, playlist, line_no):
+        """Registra a entrada e devolve False se ela repete um stream já visto."""
+        url_key = _key(canonical_url(channel.url))
+        tvg_id = normalize_tvg_id(channel.tvg_id) if self.by_tvg_id else ''
+        tvg_key = _key(tvg_id) if tvg_id else None
+
+        kept = self._urls.get(url_key)
+        reason = 'url'
+        if kept is None and tvg_key is not None:
+            kept = self._tvg_ids.get(tvg_key)
+            reason = 'tvg-id'
+        if kept is not None:
+            self.duplicates.setdefault(kept, []).append((playlist, line_no, channel.name, channel.url, reason))
+            return False
+
+        index = len(self.occurrences)
+        self.occurrences.append((playlist, line_no, channel.name, channel.url))
+        self._urls[url_key] = index
+        if tvg_key is not None:
+            self._tvg_ids.setdefault(tvg_key, index)
+        return True
+
+    def report(self):
+        groups = []
+        for index, dups in sorted(self.duplicates.items()):
+            playlist, line_no, name, url = self.occurrences[index]
+            groups.append({
+                'kept': {'playlist': playlist, 'line': line_no, 'name': name, 'url': url},
+                'canonical': canonical_url(url),
+                'duplicates': [
+                    {'playlist': p, 'line': n, 'name': nm, 'url': u, 'reason': r}
+                    for p, n, nm, u, r in dups
+                ],
+            })
+        return groups
+
+
+def dedup_playlists(paths, output_for, by_tvg_id=False):
+    """
+    Percorre as playlists em ordem, gravando cada uma sem as entradas repetidas
+    no caminho devolvido por `output_for(path)`. Devolve (estatísticas, grupos).
+    """
+    index = DedupIndex(by_tvg_id=by_tvg_id)
+    stats = []
+    for path in paths:
+        entries = removed = 0
+        out_path = output_for(path)
+        tmp_path = out_path + '.tmp'
+        # surrogateescape preserva bytes inválidos; newline='' preserva as quebras de linha
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as src, \
+                open(tmp_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as dst:
+            line_no = 1
+            for channel, block in iter_blocks(src):
+                if channel is not None:
+                    entries += 1
+                    if not index.check(channel, path, line_no):
+                        removed += 1
+                        line_no += len(block)
+                        continue
+                dst.writelines(block)
+                line_no += len(block)
+        os.replace(tmp_path, out_path)
+        stats.append({'playlist': path, 'output': out_path, 'entries': entries,
+                      'kept': entries - removed, 'removed': removed})
+    return stats, index.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('playlists', nargs='+')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--output-dir', default='output/dedup',
+                        help='diretório das playlists sem repetições (padrão: output/dedup)')
+    target.add_argument('--in-place', action='store_true', help='reescreve as playlists originais')
+    parser.add_argument('--por-tvg-id', action='store_true',
+                        help='trata o mesmo tvg-id normalizado como repetição, mesmo com URLs diferentes')
+    parser.add_argument('--relatorio', default=None,
+                        help='arquivo JSON do relatório (padrão: <output-dir>/duplicados.json)')
+    args = parser.parse_args()
+
+    if args.in_place:
+        output_for = lambda path: path
+        report_path = args.relatorio or 'duplicados.json'
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_for = lambda path: os.path.join(args.output_dir, os.path.basename(path))
+        report_path = args.relatorio or os.path.join(args.output_dir, 'duplicados.json')
+
+    stats, groups = dedup_playlists(args.playlists, output_for, by_tvg_id=args.por_tvg_id)
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'playlists': stats, 'groups': groups}, f, ensure_ascii=False, indent=2)
+
+    total = sum(s['entries'] for s in stats)
+    removed = sum(s['removed'] for s in stats)
+    print(f"🔁 {removed} de {total} entradas eram repetidas ({len(groups)} streams com cópias)")
+    for s in stats:
+        print(f"  {s['playlist']}: {s['kept']}/{s['entries']} mantidas -> {s['output']}")
+    print(f"📝 Relatório de duplicados: {report_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Concatenação de playlists M3U em streaming.
+
+As fontes são lidas linha a linha e as linhas aceitas vão direto para o
+arquivo de saída: a memória não depende de quantas listas existem nem do
+tamanho delas. Como as fontes são consumidas sob demanda, as que ficam além
+do limite de linhas nem chegam a ser baixadas.
+"""
+
+from m3u_tokenizer import EPG_URL_ATTRS, parse_header
+
+
+def is_simple_extm3u_header(line):
+    """Verifica se é um cabeçalho #EXTM3U simples (sem atributos importantes)"""
+    line = line.strip()
+    if not line.startswith("#EXTM3U"):
+        return False
+    attrs = parse_header(line)
+    return not any(key.lower() in EPG_URL_ATTRS for key in attrs)
+
+
+def iter_merged_lines(sources):
+    """
+    Junta as linhas de várias fontes, dadas como iterável de (nome, linhas).
+
+    - Linhas em branco são descartadas e as demais saem sem espaços nas pontas.
+    - O #EXTM3U que abre uma fonte só é mantido se nenhum cabeçalho foi escrito
+      ainda; nas fontes seguintes ele é descartado.
+    - #EXTM3U no meio de uma fonte é mantido apenas se tiver atributos
+      importantes (url-tvg, x-tvg-url, tvg-url).
+    """
+    wrote_header = False
+    for _, lines in sources:
+        first = True
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#EXTM3U'):
+                if first:
+                    first = False
+                    if wrote_header:
+                        continue
+                    wrote_header = True
+                elif is_simple_extm3u_header(line):
+                    continue
+            first = False
+            yield line
+
+
+def write_lines(lines, f, line_budget=None):
+    """
+    Grava as linhas em `f` e para de consumir o gerador ao atingir
+    `line_budget` linhas. Devolve quantas linhas foram gravadas.
+    """
+    count = 0
+    if line_budget is not None and line_budget <= 0:
+        return count
+    for line in lines:
+        f.write(line + '\n')
+        count += 1
+        if line_budget is not None and count >= line_budget:
+            break
+    return count
@@ -0,0 +1,164 @@
+"""
+Tokenizador único para linhas #EXTM3U/#EXTINF, compartilhado pelos scripts
+que leem playlists.
+
+Cada linha é dividida em duração, bloco de atributos e nome com operações de
+string, e todos os atributos saem de um único findall pré-compilado sobre o
+bloco, em vez de um re.search por atributo. Os canais viram registros
+Channel com __slots__; valores que se repetem muito (group-title, tvg-logo,
+duração) são internados e compartilhados entre os registros.
+
+O ganho é de memória retida pelos canais, não de tempo: ler todos os
+atributos custa mais que os poucos re.search do parser antigo, que só lia
+tvg-id, tvg-name e nome (benchmarks/bench_m3u_tokenizer.py).
+"""
+
+import re
+import sys
+
+# Os nomes começam após espaço ou vírgula: a busca só tenta casar nessas
+# posições, em vez de em cada caractere dos valores.
+# Caminho rápido: todos os valores entre aspas duplas (o caso comum)
+_QUOTED_ATTR_RE = re.compile(r'[\s,]([^\s=,"]+)="([^"]*)"')
+# Caminho intermediário: valores entre aspas duplas ou sem aspas (media=true, '=' dentro de URLs)
+_PLAIN_ATTR_RE = re.compile(r'[\s,]([^\s=,"\']+)=(?:"([^"]*)"|([^\s,"\']*))')
+# Caminho geral: também aspas simples e espaços ao redor do '='
+_ATTR_RE = re.compile(r'[\s,]([^\s=,"\']+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s,"\']*))')
+
+EPG_URL_ATTRS = ('url-tvg', 'x-tvg-url', 'tvg-url')
+
+_intern = sys.intern
+
+
+def _parse_attrs(text):
+    if "'" not in text and text.count('=') == text.count('="'):
+        pairs = _QUOTED_ATTR_RE.findall(text)
+    elif "'" not in text and ' =' not in text and '= ' not in text:
+        pairs = [(key, quoted or bare) for key, quoted, bare in _PLAIN_ATTR_RE.findall(text)]
+    else:
+        pairs = [(key, dq or sq or bare) for key, dq, sq, bare in _ATTR_RE.findall(text)]
+    attrs = dict(pairs)
+    if len(attrs) != len(pairs):
+        # Atributo repetido (ex.: tvg-id="x" tvg-id=""): vale o primeiro valor não vazio
+        attrs = {}
+        for key, value in pairs:
+            if not attrs.get(key):
+                attrs[key] = value
+    return attrs
+
+
+def parse_attrs(text):
+    """Devolve os atributos key="valor" de `text` como dicionário, na ordem original."""
+    return _parse_attrs(text if text[:1] in (' ', ',') else ' ' + text)
+
+
+def parse_extinf(line):
+    """
+    Lê uma linha #EXTINF e devolve (duração, atributos, nome). O nome é tudo o
+    que vem depois da primeira vírgula fora de aspas, então pode conter
+    vírgulas e aspas; vírgulas dentro de valores entre aspas não encerram os
+    atributos. Com aspas desbalanceadas, o nome é o que vem após a última vírgula.
+    """
+    comma = line.find(',', 8)
+    # Número ímpar de aspas antes da vírgula: ela está dentro de um valor
+    while comma != -1 and line.count('"', 8, comma) % 2:
+        close = line.find('"', comma)
+        if close == -1:
+            comma = line.rfind(',')
+            break
+        comma = line.find(',', close + 1)
+    head, name = (line, '') if comma == -1 else (line[:comma], line[comma + 1:])
+    space = head.find(' ', 8)
+    duration = head[8:space] if space != -1 else head[8:]
+    if not duration or '=' in duration:
+        duration = '-1'
+    # head começa com '#EXTINF:', então todo atributo vem depois de um espaço
+    return _intern(duration), _parse_attrs(head), name.strip()
+
+
+def parse_header(line):
+    """Atributos de uma linha #EXTM3U como dicionário."""
+    return parse_attrs(line[len('#EXTM3U'):])
+
+
+def epg_urls_from_attrs(attrs):
+    """URLs de EPG (url-tvg, x-tvg-url, tvg-url; podem ser várias separadas por vírgula)."""
+    urls = []
+    for key, value in attrs.items():
+        if key.lower() in EPG_URL_ATTRS:
+            urls.extend(u.strip() for u in value.split(',') if u.strip())
+    return urls
+
+
+class Channel:
+    """
+    Registro compacto de um canal da playlist. Os atributos comuns ficam em
+    slots; os demais, se houver, no dicionário `extra`.
+    """
+
+    __slots__ = ('duration', 'tvg_id', 'tvg_name', 'tvg_logo', 'group_title', 'extra', 'name', 'url')
+
+    _CORE = (('tvg-id', 'tvg_id'), ('tvg-name', 'tvg_name'), ('tvg-logo', 'tvg_logo'),
+             ('group-title', 'group_title'))
+
+    def __init__(self, duration, attrs, name, url=''):
+        self.duration = duration
+        pop = attrs.pop
+        self.tvg_id = pop('tvg-id', '')
+        self.tvg_name = pop('tvg-name', '')
+        # Valores que se repetem entre canais: uma única cópia compartilhada
+        self.tvg_logo = _intern(pop('tvg-logo', ''))
+        self.group_title = _intern(pop('group-title', ''))
+        self.extra = attrs or ()
+        self.name = name
+        self.url = url
+
+    @classmethod
+    def from_extinf(cls, line, url=''):
+        duration, attrs, name = parse_extinf(line)
+        return cls(duration, attrs, name, url)
+
+    @property
+    def attrs(self):
+        """Todos os atributos como dicionário (comuns primeiro, vazios omitidos)."""
+        attrs = {key: getattr(self, slot) for key, slot in self._CORE if getattr(self, slot)}
+        attrs.update(self.extra)
+        return attrs
+
+    def get(self, key, default=''):
+        return self.attrs.get(key, default)
+
+    def extinf_line(self):
+        """Reconstrói a linha #EXTINF."""
+        attrs = ''.join(f' {key}="{value}"' for key, value in self.attrs.items())
+        return f'#EXTINF:{self.duration}{attrs},{self.name}'
+
+    def __repr__(self):
+        return f'Channel({self.name!r}, tvg_id={self.tvg_id!r}, url={self.url!r})'
+
+
+def iter_playlist(lines):
+    """
+    Percorre as linhas de uma playlist e gera ('header', atributos) para cada
+    #EXTM3U e ('channel', Channel) para cada #EXTINF, cuja URL é a primeira
+    linha seguinte que não é comentário (#EXTVLCOPT, #EXTGRP... são pulados).
+    """
+    pending = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == '#':
+            if line.startswith('#EXTINF'):
+                if pending is not None:
+                    yield 'channel', pending
+                pending = Channel.from_extinf(line)
+            elif line.startswith('#EXTM3U'):
+                yield 'header', parse_header(line)
+            continue
+        if pending is not None:
+            pending.url = line
+            yield 'channel', pending
+            pending = None
+    if pending is not None:
+        yield 'channel', pending
@@ -0,0 +1,99 @@
+"""
+Escritor com compressão paralela em blocos (estilo pigz).
+
+O fluxo é cortado em blocos e cada bloco é comprimido num pool de threads
+(zlib e lzma liberam o GIL) como um membro gzip independente, opcionalmente
+também como um stream .xz. Os membros são gravados na ordem original;
+arquivos com membros concatenados são válidos para qualquer cliente gzip/xz.
+"""
+
+import gzip
+import lzma
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+BLOCK_SIZE = 1024 * 1024
+
+
+def _compress_block(block, gzip_level, xz_preset):
+    # mtime=0 deixa a saída determinística (mesma entrada, mesmos bytes)
+    gz_data = gzip.compress(block, compresslevel=gzip_level, mtime=0)
+    xz_data = lzma.compress(block, preset=xz_preset) if xz_preset is not None else None
+    return gz_data, xz_data
+
+
+class ParallelCompressWriter:
+    def __init__(self, gz_path, xz_path=None, block_size=BLOCK_SIZE, workers=None,
+                 gzip_level=6, xz_preset=6):
+        self.workers = workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self.gzip_level = gzip_level
+        self.xz_preset = xz_preset if xz_path else None
+        self.bytes_in = 0
+        self._gz_file = open(gz_path, 'wb')
+        self._xz_file = open(xz_path, 'wb') if xz_path else None
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        # Limita os blocos em voo para manter a memória constante
+        self._max_pending = self.workers * 2
+        self._pending = deque()
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        self.bytes_in += len(data)
+        if self._buffered >= self.block_size:
+            self._submit()
+
+    def _submit(self):
+        if not self._buffered:
+            return
+        block = b''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._pending.append(
+            self._executor.submit(_compress_block, block, self.gzip_level, self.xz_preset)
+        )
+        while len(self._pending) > self._max_pending:
+            self._write_next()
+
+    def _write_next(self):
+        gz_data, xz_data = self._pending.popleft().result()
+        self._gz_file.write(gz_data)
+        if self._xz_file is not None:
+            self._xz_file.write(xz_data)
+
+    def close(self):
+        """Comprime o que restou, grava todos os blocos pendentes e fecha os arquivos."""
+        try:
+            self._submit()
+            while self._pending:
+                self._write_next()
+        finally:
+            self._shutdown()
+
+    def abort(self):
+        """Descarta os blocos pendentes e fecha os arquivos sem completar a escrita."""
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._buffer = []
+        self._buffered = 0
+        self._shutdown()
+
+    def _shutdown(self):
+        self._executor.shutdown(wait=True)
+        self._gz_file.close()
+        if self._xz_file is not None:
+            self._xz_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
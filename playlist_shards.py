@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Publicação das playlists divididas por group-title.
+
+Para cada playlist de entrada é gerado um diretório com:
+
+- uma playlist por grupo (<grupo>.m3u) e a cópia gzip (<grupo>.m3u.gz);
+- todos.m3u: a playlist inteira com as entradas de cada grupo contíguas,
+  na ordem em que os grupos aparecem, e a cópia todos.m3u.gz;
+- manifest.json: para cada grupo, número de entradas, tamanho e SHA-256 dos
+  arquivos e a faixa de bytes (offset, length) do grupo em todos.m3u.
+
+Um cliente que só exibe alguns grupos baixa o manifesto e depois apenas os
+arquivos desses grupos, ou lê as faixas com Range sobre todos.m3u (o
+cabeçalho #EXTM3U também tem faixa própria). As entradas são copiadas como
+estão, e os arquivos gzip saem sem data no cabeçalho, então os hashes só
+mudam quando o conteúdo muda; a data do manifesto ('generated') também só
+muda quando algum arquivo mudou.
+
+Uso: python playlist_shards.py [--saida output/grupos] PLAYLIST...
+"""
+
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import unicodedata
+from datetime import datetime, timezone
+
+from m3u_dedup import iter_blocks
+
+NO_GROUP = 'Sem grupo'
+COMBINED_NAME = 'todos.m3u'
+MANIFEST_NAME = 'manifest.json'
+MAX_OPEN_SHARDS = 128
+CHUNK_SIZE = 64 * 1024
+
+
+def slugify(text, default='sem-grupo'):
+    """Nome de arquivo para um grupo: sem acentos nem emoji, minúsculas e hífens ('⭐ RECORD' -> 'record')."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    slug = ''.join(ch if ch.isalnum() else '-' for ch in text)
+    slug = '-'.join(part for part in slug.split('-') if part)
+    return slug or default
+
+
+def file_info(path):
+    """Tamanho e SHA-256 de um arquivo publicado."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return {'path': os.path.basename(path), 'size': os.path.getsize(path), 'sha256': sha256.hexdigest()}
+
+
+def gzip_copy(path):
+    """Grava <path>.gz de forma determinística (mtime=0 e sem nome no cabeçalho)."""
+    gz_path = path + '.gz'
+    tmp_path = gz_path + '.tmp'
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as raw, \
+            gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0, compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    os.replace(tmp_path, gz_path)
+    return gz_path
+
+
+class ShardWriter:
+    """Arquivos de grupo abertos sob demanda, com no máximo MAX_OPEN_SHARDS ao mesmo tempo."""
+
+    def __init__(self, directory, header):
+        self.directory = directory
+        self.header = header
+        self.groups = {}   # grupo -> {'slug', 'entries', 'tmp_path'}, na ordem de aparição
+        self._open = {}
+        self._slugs = set()
+
+    def _handle(self, group):
+        f = self._open.pop(group, None)
+        if f is None:
+            info = self.groups.get(group)
+            if info is None:
+                slug = base = slugify(group)
+                n = 2
+                while slug in self._slugs or slug + '.m3u' == COMBINED_NAME:
+                    slug = f'{base}-{n}'
+                    n += 1
+                self._slugs.add(slug)
+                info = self.groups[group] = {
+                    'slug': slug, 'entries': 0,
+                    'tmp_path': os.path.join(self.directory, slug + '.m3u.tmp'),
+                }
+                f = open(info['tmp_path'], 'wb')
+                f.write(self.header)
+            else:
+                f = open(info['tmp_path'], 'ab')
+            if len(self._open) >= MAX_OPEN_SHARDS:
+                oldest = next(iter(self._open))
+                self._open.pop(oldest).close()
+        self._open[group] = f  # reinserido no fim: o dicionário fica em ordem de uso
+        return f
+
+    def write(self, group, data):
+        self._handle(group).write(data)
+        self.groups[group]['entries'] += 1
+
+    def close(self):
+        for f in self._open.values():
+            f.close()
+        self._open.clear()
+
+
+def _encode_block(block):
+    data = ''.join(block).encode('utf-8', 'surrogateescape')
+    return data if data.endswith(b'\n') else data + b'\n'
+
+
+def publish_playlist(path, out_dir):
+    """Divide a playlist por grupo em `out_dir` e devolve o manifesto."""
+    os.makedirs(out_dir, exist_ok=True)
+    # utf-8-sig: um BOM esconderia o #EXTM3U da primeira linha
+    with open(path, 'r', encoding='utf-8-sig', errors='surrogateescape', newline='') as f:
+        first = f.readline()
+        if first.strip().startswith('#EXTM3U'):
+            header = _encode_block([first])
+            lines = f
+        else:
+            header = b'#EXTM3U\n'
+            lines = itertools.chain([first], f)
+        writer = ShardWriter(out_dir, header)
+        skipped = 0
+        try:
+            for channel, block in iter_blocks(lines):
+                if channel is None:
+                    # Linhas soltas (comentários, #EXTM3U repetido, #EXTINF sem URL) não pertencem a um grupo
+                    skipped += any(line.strip() for line in block)
+                    continue
+                writer.write(channel.group_title.strip() or NO_GROUP, _encode_block(block))
+        finally:
+            writer.close()
+
+    # todos.m3u: cabeçalho e depois o corpo de cada grupo, copiado do arquivo do grupo
+    combined_path = os.path.join(out_dir, COMBINED_NAME)
+    combined_tmp = combined_path + '.tmp'
+    groups = []
+    with open(combined_tmp, 'wb') as combined:
+        combined.write(header)
+        for group, info in writer.groups.items():
+            offset = combined.tell()
+            body_hash = hashlib.sha256()
+            with open(info['tmp_path'], 'rb') as shard:
+                shard.seek(len(header))
+                for chunk in iter(lambda: shard.read(CHUNK_SIZE), b''):
+                    combined.write(chunk)
+                    body_hash.update(chunk)
+            shard_path = os.path.join(out_dir, info['slug'] + '.m3u')
+            os.replace(info['tmp_path'], shard_path)
+            groups.append({
+                'group': group,
+                'entries': info['entries'],
+                'offset': offset,
+                'length': combined.tell() - offset,
+                'sha256': body_hash.hexdigest(),
+                'shard': file_info(shard_path),
+                'gzip': file_info(gzip_copy(shard_path)),
+            })
+    os.replace(combined_tmp, combined_path)
+
+    # Remove arquivos de grupos que sumiram desde a última publicação
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    current = {g['shard']['path'] for g in groups} | {g['gzip']['path'] for g in groups}
+    previous = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            for g in previous.get('groups', []):
+                for key in ('shard', 'gzip'):
+                    name = g.get(key, {}).get('path')
+                    if name and name not in current and os.path.exists(os.path.join(out_dir, name)):
+                        os.remove(os.path.join(out_dir, name))
+        except (OSError, ValueError, AttributeError):
+            previous = {}
+
+    manifest = {
+        'source': os.path.basename(path),
+        'generated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'entries': sum(g['entries'] for g in groups),
+        'skipped_lines': skipped,
+        'header': {'offset': 0, 'length': len(header)},
+        'combined': file_info(combined_path),
+        'combined_gzip': file_info(gzip_copy(combined_path)),
+        'groups': groups,
+    }
+    # Conteúdo igual ao da publicação anterior: mantém a data, para o manifesto não mudar à toa
+    if isinstance(previous, dict) and previous.get('generated') and \
+            {**previous, 'generated': None} == {**manifest, 'generated': None}:
+        manifest['generated'] = previous['generated']
+    # O manifesto é gravado por último: quem o lê encontra todos os arquivos listados
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('playlists', nargs='+')
+    parser.add_argument('--saida', default='output/grupos',
+                        help='diretório base; cada playlist ganha um subdiretório com o seu nome')
+    args = parser.parse_args()
+
+    for path in args.playlists:
+        out_dir = os.path.join(args.saida, slugify(os.path.splitext(os.path.basename(path))[0], 'playlist'))
+        manifest = publish_playlist(path, out_dir)
+        print(f"🗂️ {path}: {manifest['entries']} entradas em {len(manifest['groups'])} grupos -> {out_dir}")
+        for g in manifest['groups']:
+            print(f"  {g['group']}: {g['entries']} entradas, {g['shard']['size'] / 1024:.1f} KB "
+                  f"({g['gzip']['size'] / 1024:.1f} KB gzip)")
+        if manifest['skipped_lines']:
+            print(f"  ⚠️ {manifest['skipped_lines']} blocos fora de entradas foram ignorados")
+
+
+if __name__ == '__main__':
+    main()
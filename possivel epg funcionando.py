@@ -1,6 +1,10 @@
-import os
+import json
 import requests
 
+from http_cache import download
+from m3u_merge import iter_merged_lines, write_lines
+from m3u_tokenizer import parse_header
+
 # URLs dos repositórios que contêm os arquivos M3U
 repo_urls = [
     "https://raw.githubusercontent.com/strikeinthehouse/1/refs/heads/main/lista2.M3U",
@@ -8,46 +12,49 @@ repo_urls = [
     "https://github.com/strikeinthehouse/Navez/raw/main/playlist.m3u",
 ]
 
+# Entradas (nome, fonte): a fonte é o arquivo já no cache ou a URL a baixar sob demanda
 lists = []
 
+
+def contains_extm3u(cached):
+    """Procura '#EXTM3U' no arquivo em cache bloco a bloco, sem carregá-lo inteiro."""
+    tail = b''
+    for chunk in cached.iter_chunks():
+        if b'#EXTM3U' in tail + chunk:
+            return True
+        tail = chunk[-6:]
+    return False
+
+
 # Buscar arquivos M3U de cada URL
 for url in repo_urls:
     print(f"Processando URL: {url}")
     try:
-        response = requests.get(url, allow_redirects=True)
-
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '').lower()
-            
-            if url.lower().endswith(('.m3u', '.m3u8')) or '#EXTM3U' in response.text:
-                print(f"  Detectado arquivo M3U direto: {url}")
+        cached = download(url)
+        content_type = cached.content_type.lower()
+        if cached.from_cache:
+            print(f"  Conteúdo não modificado (304), usando cópia do cache")
+
+        if url.lower().endswith(('.m3u', '.m3u8')) or contains_extm3u(cached):
+            print(f"  Detectado arquivo M3U direto: {url}")
+            filename = url.split("/")[-1]
+            lists.append((filename, cached))
+        elif 'application/json' in content_type:
+            try:
+                contents = json.loads(cached.text())
+                print(f"  Processando resposta JSON com {len(contents)} itens")
+                m3u_files = [content for content in contents if content.get("name", "").lower().endswith(('.m3u', '.m3u8'))]
+
+                for m3u_file in m3u_files:
+                    lists.append((m3u_file["name"], m3u_file["download_url"]))
+            except ValueError:
+                print(f"  Erro ao processar JSON de {url}, tratando como arquivo M3U direto")
                 filename = url.split("/")[-1]
-                lists.append((filename, response.text))
-            elif 'application/json' in content_type:
-                try:
-                    contents = response.json()
-                    print(f"  Processando resposta JSON com {len(contents)} itens")
-                    m3u_files = [content for content in contents if content.get("name", "").lower().endswith(('.m3u', '.m3u8'))]
-
-                    for m3u_file in m3u_files:
-                        m3u_url = m3u_file["download_url"]
-                        print(f"  Baixando arquivo M3U: {m3u_url}")
-                        m3u_response = requests.get(m3u_url, allow_redirects=True)
-                        if m3u_response.status_code == 200:
-                            lists.append((m3u_file["name"], m3u_response.text))
-                except ValueError:
-                    print(f"  Erro ao processar JSON de {url}, tratando como arquivo M3U direto")
-                    filename = url.split("/")[-1]
-                    lists.append((filename, response.text))
-            else:
-                if '#EXTM3U' in response.text:
-                    print(f"  Conteúdo detectado como M3U pelo cabeçalho #EXTM3U")
-                    filename = url.split("/")[-1]
-                    lists.append((filename, response.text))
-                else:
-                    print(f"  Tipo de conteúdo não reconhecido: {content_type}")
+                lists.append((filename, cached))
         else:
-            print(f"  Erro ao acessar URL: {url}, código de status: {response.status_code}")
+            print(f"  Tipo de conteúdo não reconhecido: {content_type}")
+    except requests.exceptions.HTTPError as e:
+        print(f"  Erro ao acessar URL: {url}, código de status: {e.response.status_code}")
     except requests.exceptions.RequestException as e:
         print(f"  Erro ao processar URL {url}: {e}")
 
@@ -59,94 +66,44 @@ for name, _ in lists:
     print(f"  - {name}")
 
 # Limitação das linhas a serem escritas no arquivo final
-line_count = 0
+line_budget = 212
 output_file = "lista1.M3U"
-wrote_header = False  # Para garantir que só escreva uma vez o cabeçalho
 epg_urls = []  # Lista para armazenar URLs de EPG encontradas
 
 def extract_epg_url(extm3u_line):
     """Extrai a URL de EPG de uma linha #EXTM3U se presente"""
-    if 'url-tvg=' in extm3u_line:
-        # Procura por url-tvg="..." ou url-tvg='...'
-        import re
-        match = re.search(r'url-tvg=["\']([^"\']+)["\']', extm3u_line)
-        if match:
-            return match.group(1)
-    return None
-
-def is_simple_extm3u_header(line):
-    """Verifica se é um cabeçalho #EXTM3U simples (sem atributos importantes)"""
-    line = line.strip()
-    if not line.startswith("#EXTM3U"):
-        return False
-    
-    # Se contém apenas #EXTM3U ou #EXTM3U com espaços, é simples
-    if line == "#EXTM3U" or line.replace("#EXTM3U", "").strip() == "":
-        return True
-    
-    # Se contém atributos importantes como url-tvg, não é simples
-    important_attributes = ['url-tvg=', 'tvg-url=', 'x-tvg-url=']
-    for attr in important_attributes:
-        if attr in line.lower():
-            return False
-    
-    return True
+    return parse_header(extm3u_line.strip()).get('url-tvg') or None
 
-with open(output_file, "w") as f:
-    for list_name, list_content in lists:
+def iter_sources(entries):
+    """Gera (nome, linhas) de cada lista, baixando sob demanda as que vieram da listagem JSON."""
+    for list_name, source in entries:
         print(f"Processando lista: {list_name}")
-        lines = list_content.split("\n")
-
-        start_idx = 0
-
-        # Verifica se a primeira linha é um cabeçalho #EXTM3U
-        if lines and lines[0].strip().startswith("#EXTM3U"):
-            if not wrote_header:
-                # Escreve o cabeçalho completo com atributos, se presente
-                f.write(lines[0].strip() + "\n")
-                line_count += 1
-                wrote_header = True
-                
-                # Extrai URL de EPG se presente
-                epg_url = extract_epg_url(lines[0])
-                if epg_url and epg_url not in epg_urls:
-                    epg_urls.append(epg_url)
-                    print(f"  URL de EPG encontrada: {epg_url}")
-            start_idx = 1  # Pular esta linha nas próximas listas
-
-        for i in range(start_idx, len(lines)):
-            line = lines[i].strip()
-            if not line:
-                continue  # Ignorar linhas em branco
-
-            # CORREÇÃO: Distinguir entre cabeçalhos simples e com atributos importantes
-            if line.startswith("#EXTM3U"):
-                if is_simple_extm3u_header(line):
-                    # Ignora apenas cabeçalhos simples duplicados
-                    continue
-                else:
-                    # Preserva cabeçalhos com atributos importantes (como url-tvg)
-                    epg_url = extract_epg_url(line)
-                    if epg_url and epg_url not in epg_urls:
-                        epg_urls.append(epg_url)
-                        print(f"  URL de EPG encontrada: {epg_url}")
-                    
-                    f.write(line + "\n")
-                    line_count += 1
-                    continue
-
-            f.write(line + "\n")
-            line_count += 1
-
-            if line_count >= 212:
-                print(f"Limite de 212 linhas atingido")
-                break
-
-        if line_count >= 212:
-            break
+        if isinstance(source, str):
+            print(f"  Baixando arquivo M3U: {source}")
+            try:
+                source = download(source)
+            except requests.exceptions.RequestException as e:
+                print(f"  Erro ao baixar {source}: {e}")
+                continue
+        yield list_name, source.iter_lines()
+
+def collect_epg_urls(lines):
+    """Repassa as linhas, registrando as URLs de EPG dos cabeçalhos gravados."""
+    for line in lines:
+        if line.startswith("#EXTM3U"):
+            epg_url = extract_epg_url(line)
+            if epg_url and epg_url not in epg_urls:
+                epg_urls.append(epg_url)
+                print(f"  URL de EPG encontrada: {epg_url}")
+        yield line
+
+with open(output_file, "w") as f:
+    merged = collect_epg_urls(iter_merged_lines(iter_sources(lists)))
+    line_count = write_lines(merged, f, line_budget)
+    if line_count >= line_budget:
+        print(f"Limite de {line_budget} linhas atingido")
 
 print(f"\nArquivo {output_file} criado com {line_count} linhas")
 print(f"URLs de EPG encontradas e preservadas:")
 for epg_url in epg_urls:
     print(f"  - {epg_url}")
-
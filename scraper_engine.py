@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Motor único dos scrapers de páginas ao vivo.
+
+Cada site é um plugin (subclasse de SitePlugin) que declara as páginas, os
+seletores que diferem do padrão, o grupo e a playlist de saída; as rotinas de
+cookies, player, play, captura da .m3u8 e logo ficam aqui, uma vez só.
+
+O agendador roda todos os sites juntos: as páginas de todos entram numa fila
+intercalada, com um orçamento global de navegadores (um DriverPool só,
+dimensionado pelos núcleos e pela memória da máquina) e um limite de abas
+simultâneas por domínio. O tempo total passa a ser o do site mais lento, não
+a soma dos sites. A playlist de cada site é gravada assim que as páginas dele
+terminam.
+
+Antes do navegador, cada página passa pelo caminho rápido só HTTP
+(http_fast_path): o HTML do servidor e os endpoints JSON do player muitas
+vezes já trazem a .m3u8. O Chrome só é aberto quando eles não bastam, e a
+camada que resolveu cada página fica registrada para as próximas execuções.
+
+Uso: python scraper_engine.py [--navegadores N] [--sem-http] [SITE...]
+     (sem SITE roda todos os de SITE_SCRIPTS; SITE é o nome do plugin ou o script)
+"""
+
+import argparse
+import concurrent.futures
+import importlib.util
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_pool import DriverPool
+from hls_resolver import get_resolver, headers_from_driver, resolve_m3u8
+from http_fast_path import HTTP_FIRST, TIER_BROWSER, HttpFastPath, TierStore, m3u8_urls_from_html
+from m3u8_capture import DEADLINE, CaptureProfile, M3u8Capture, enable_network_log
+
+# Scripts com um plugin cada (atributo SITE), na ordem em que são agendados
+SITE_SCRIPTS = ('GLOBO.py', 'foxvivo.py', 'abc news.py')
+
+BROWSER_MEMORY = 600 * 1024 * 1024  # memória reservada por navegador headless
+MAX_BROWSERS = 8
+
+DEFAULT_STEPS = ('consent', 'video', 'iframes', 'play')
+DEFAULT_COOKIE_SELECTORS = (
+    "#onetrust-accept-btn-handler", "#didomi-notice-agree-button", ".cmp-button_button--primary",
+    "button[id*='accept']", "button[class*='accept']", "button[data-testid*='accept']",
+    "button[aria-label*='Accept']", "button[title*='Accept']", "button[data-cy*='accept']",
+    ".cookie-accept", ".accept-cookies", ".privacy-manager-accept-all", ".gdpr-accept", ".consent-accept",
+)
+# Botões reconhecidos pelo texto (CSS não tem :contains)
+COOKIE_BUTTON_TEXTS = ('Accept All', 'I Accept', 'Accept', 'Agree', 'Aceitar', 'Concordo', 'OK')
+DEFAULT_CLOSE_SELECTORS = (
+    "button[aria-label*='close']", "button[aria-label*='Close']", ".modal-close", "button.close",
+    "[data-dismiss='modal']", ".overlay-close", ".popup-close",
+)
+DEFAULT_VIDEO_SELECTORS = (
+    "video", ".video-player", ".player-container", "[data-testid*='video']", ".live-player",
+    "iframe[src*='player']", "iframe[src*='video']", ".jwplayer", ".vjs-tech",
+)
+DEFAULT_PLAY_SELECTORS = (
+    "button[aria-label*='play']", "button[aria-label*='Play']", "button[title*='play']", "button[title*='Play']",
+    "button.play-button", ".play-btn", ".video-play-button", "button[data-testid*='play']",
+    ".player-play-button", "button.vjs-big-play-button", ".vjs-play-control", ".poster__play-wrapper",
+    "button[aria-label='Reproduzir vídeo']", ".playkit-pre-playback-play-button", ".play-overlay",
+    ".play-icon", ".vjs-poster", ".jw-icon-playback", ".fp-ui.fp-engine", ".bmpui-ui-overlay",
+    ".shaka-play-button",
+)
+DEFAULT_LOGO_SELECTORS = (
+    ("meta[property='og:image']", "content"),
+    ("meta[name='twitter:image']", "content"),
+    ("meta[name='thumbnail']", "content"),
+)
+IFRAME_KEYWORDS = ('player', 'video', 'live', 'stream', 'embed')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+def default_browser_budget():
+    """Navegadores simultâneos: um por núcleo, limitado pela memória (BROWSER_POOL_SIZE sobrepõe)."""
+    if os.environ.get('BROWSER_POOL_SIZE'):
+        return max(1, int(os.environ['BROWSER_POOL_SIZE']))
+    cores = os.cpu_count() or 1
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        memory = 0
+    by_memory = memory // BROWSER_MEMORY if memory else cores
+    return max(1, min(cores, by_memory, MAX_BROWSERS))
+
+
+def chrome_options():
+    """Opções comuns a todos os sites; o que varia por site é aplicado por aba."""
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-web-security")
+    options.add_argument("--window-size=1280,720")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    return enable_network_log(options)
+
+
+def site_domain(url):
+    """Domínio usado no limite por domínio: o host sem subdomínios (globoplay.globo.com -> globo.com)."""
+    host = urlsplit(url).hostname or ''
+    parts = host.split('.')
+    if len(parts) > 2 and len(parts[-1]) == 2 and parts[-2] in ('com', 'net', 'org', 'gov', 'edu'):
+        return '.'.join(parts[-3:])
+    return '.'.join(parts[-2:])
+
+
+# =========================================================
+# ROTINAS DE PÁGINA – comuns a todos os sites
+# =========================================================
+def _click(driver, element):
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+    driver.execute_script("arguments[0].click();", element)
+
+
+def _first_visible(driver, selectors, by=By.CSS_SELECTOR):
+    for selector in selectors:
+        try:
+            for element in driver.find_elements(by, selector):
+                if element.is_displayed() and element.is_enabled():
+                    return selector, element
+        except Exception:
+            continue
+    return None, None
+
+
+def _wait_any(driver, selectors, timeout):
+    """Espera até `timeout` s por qualquer um dos seletores (um prazo para o conjunto)."""
+    if not selectors or timeout <= 0:
+        return None
+    try:
+        return WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(selectors)))
+        )
+    except TimeoutException:
+        return None
+    except Exception:
+        return None
+
+
+def handle_cookie_consent(driver, site):
+    """Aceita cookies ou fecha o modal que cobre o player."""
+    _wait_any(driver, site.cookie_selectors, site.consent_timeout)
+    selector, element = _first_visible(driver, site.cookie_selectors)
+    if element is None:
+        xpath = " | ".join(f"//button[normalize-space(.)='{text}']" for text in COOKIE_BUTTON_TEXTS)
+        selector, element = _first_visible(driver, [xpath], By.XPATH)
+    if element is None:
+        selector, element = _first_visible(driver, site.close_selectors)
+    if element is None:
+        return False
+    try:
+        _click(driver, element)
+        print(f"🍪 [{site.name}] Clicou em {selector}")
+        return True
+    except Exception as e:
+        print(f"⚠️ [{site.name}] Erro ao tratar cookies/modals: {e}")
+        return False
+
+
+def wait_for_video_load(driver, site):
+    element = _wait_any(driver, site.video_selectors, site.video_timeout)
+    if element is None:
+        print(f"⚠️ [{site.name}] Nenhum elemento de vídeo em {driver.current_url}")
+    return element is not None
+
+
+def handle_iframes(driver, site):
+    """Dá play nos <video> de iframes que parecem conter o player."""
+    try:
+        for iframe in driver.find_elements(By.TAG_NAME, "iframe"):
+            src = (iframe.get_attribute("src") or "").lower()
+            if not any(keyword in src for keyword in IFRAME_KEYWORDS):
+                continue
+            try:
+                driver.switch_to.frame(iframe)
+                for video in driver.find_elements(By.TAG_NAME, "video"):
+                    driver.execute_script("arguments[0].play();", video)
+            except Exception:
+                pass
+            finally:
+                driver.switch_to.default_content()
+    except Exception as e:
+        print(f"⚠️ [{site.name}] Erro ao tratar iframes: {e}")
+
+
+def try_play_video(driver, site):
+    """Clica no botão de play do site; sem botão, clica no <video> ou chama play() via JavaScript."""
+    _wait_any(driver, site.play_selectors, site.play_timeout)
+    selector, element = _first_visible(driver, site.play_selectors)
+    if element is None:
+        selector, element = _first_visible(driver, ["video"])
+    try:
+        if element is not None:
+            _click(driver, element)
+            print(f"▶️ [{site.name}] Clicou em {selector}")
+            return True
+        driver.execute_script(
+            "document.querySelectorAll('video').forEach(function (v) { if (v.paused) v.play(); });"
+        )
+        return True
+    except Exception as e:
+        print(f"⚠️ [{site.name}] Erro ao tentar dar play: {e}")
+        return False
+
+
+STEPS = {
+    'consent': handle_cookie_consent,
+    'video': wait_for_video_load,
+    'iframes': handle_iframes,
+    'play': try_play_video,
+}
+
+
+def resolve_candidates(driver, urls, origem, site_name, headers=None):
+    """
+    Baixa as candidatas .m3u8 e escolhe a master/variante de vídeo válida.
+    Sem navegador (caminho HTTP), `driver` é None e os `headers` vêm prontos.
+    """
+    m3u8 = resolve_m3u8(urls, headers if headers is not None else headers_from_driver(driver))
+    if m3u8:
+        print(f"🎯 [{site_name}] M3U8 via {origem}: {m3u8} ({get_resolver().describe(m3u8)})")
+    else:
+        print(f"⚠️ [{site_name}] Nenhuma das {len(urls)} URLs .m3u8 via {origem} é uma playlist de vídeo válida")
+    return m3u8
+
+
+def m3u8_urls_from_source(driver):
+    """URLs .m3u8 no HTML da página (relativas e com barras escapadas de JSON resolvidas)."""
+    try:
+        return m3u8_urls_from_html(driver.page_source, driver.current_url)
+    except Exception:
+        return []
+
+
+def extract_logo(driver, site):
+    """Logo/thumbnail: metadados da página e, na falta deles, imagens vistas na rede."""
+    for selector, attr in site.logo_selectors:
+        try:
+            for element in driver.find_elements(By.CSS_SELECTOR, selector):
+                logo = element.get_attribute(attr)
+                if logo and logo.startswith("http"):
+                    return logo
+        except Exception:
+            continue
+    try:
+        entries = driver.execute_script("return window.performance.getEntriesByType('resource');")
+    except Exception:
+        return None
+    for entry in entries:
+        name = entry.get("name", "")
+        lower = name.lower()
+        if any(ext in lower for ext in IMAGE_EXTENSIONS) and \
+                (not site.logo_keywords or any(k in lower for k in site.logo_keywords)):
+            return name
+    return None
+
+
+# =========================================================
+# PLUGINS
+# =========================================================
+class StreamEntry:
+    __slots__ = ('url', 'title', 'logo', 'page', 'tier')
+
+    def __init__(self, url, title, logo=None, page=None, tier=TIER_BROWSER):
+        self.url = url
+        self.title = title
+        self.logo = logo
+        self.page = page
+        self.tier = tier    # camada que achou o stream: 'html', 'api' ou 'navegador'
+
+
+class SitePlugin:
+    """
+    Um site: páginas, seletores e saída. Os atributos de classe são os
+    padrões; cada plugin sobrescreve só o que difere. Para páginas que não
+    são fixas, sobrescreva discover(); para páginas que não seguem o fluxo
+    player -> .m3u8, sobrescreva scrape().
+    """
+
+    name = 'site'
+    output = None
+    group_title = ''
+    write_header = True
+    urls = ()
+    max_per_domain = 2          # abas simultâneas do site (limitado também pelo orçamento global)
+    steps = DEFAULT_STEPS
+    cookie_selectors = DEFAULT_COOKIE_SELECTORS
+    close_selectors = DEFAULT_CLOSE_SELECTORS
+    video_selectors = DEFAULT_VIDEO_SELECTORS
+    play_selectors = DEFAULT_PLAY_SELECTORS
+    logo_selectors = DEFAULT_LOGO_SELECTORS
+    logo_keywords = ('logo', 'thumb')
+    consent_timeout = 3
+    video_timeout = 20
+    play_timeout = 5
+    deadline = DEADLINE
+    user_agent = None
+    # Endpoints JSON do player: (regex na URL ou no HTML da página, modelo com os grupos {0}, {1}...)
+    player_apis = ()
+
+    def discover(self, engine):
+        """Páginas a processar; o padrão são as URLs fixas do plugin."""
+        return list(self.urls)
+
+    def scrape(self, engine, page):
+        """
+        Devolve o StreamEntry da página (ou None): primeiro só com HTTP e, se
+        não der, abrindo a página para o player pedir a playlist.
+        """
+        http_tried = engine.try_http(page)
+        entry = self.scrape_http(engine, page) if http_tried else None
+        if entry is None:
+            with engine.browser(page, self) as driver:
+                entry = self.scrape_page(engine, driver, page)
+        engine.record_tier(page, entry.tier if entry else None, http_tried)
+        return entry
+
+    def http_headers(self, page):
+        headers = {'Referer': page}
+        if self.user_agent:
+            headers['User-Agent'] = self.user_agent
+        return headers
+
+    def scrape_http(self, engine, page):
+        """Caminho rápido: a .m3u8 no HTML do servidor ou na API do player, sem navegador."""
+        headers = self.http_headers(page)
+        for tier, candidates, http_page in engine.http.iter_candidates(page, self.player_apis, headers):
+            if not candidates:
+                continue
+            m3u8 = resolve_candidates(None, candidates, tier, self.name, headers)
+            if m3u8:
+                return StreamEntry(m3u8, http_page.title, http_page.logo(self.logo_selectors), page, tier)
+        return None
+
+    def scrape_page(self, engine, driver, page):
+        capture = M3u8Capture(driver, deadline=self.deadline, profile=engine.profile)
+        driver.get(page)
+        # Cada passo só é tentado enquanto o player ainda não pediu a playlist
+        for step in self.steps:
+            if capture.found():
+                break
+            STEPS[step](driver, self)
+        candidates = capture.wait()
+        print(f"⏱️ [{self.name}] {page}: {len(candidates)} .m3u8 em {capture.elapsed:.1f} s")
+
+        m3u8 = resolve_candidates(driver, candidates, "rede", self.name) if candidates else None
+        if not m3u8:
+            from_source = m3u8_urls_from_source(driver)
+            if from_source:
+                m3u8 = resolve_candidates(driver, from_source, "código-fonte", self.name)
+        if not m3u8:
+            return None
+        return StreamEntry(m3u8, driver.title, extract_logo(driver, self), page)
+
+    def write_playlist(self, entries):
+        """Grava a playlist do site (arquivo temporário + rename), uma entrada por URL."""
+        seen = set()
+        tmp_path = self.output + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if self.write_header:
+                f.write("#EXTM3U\n")
+            for entry in entries:
+                if entry.url in seen:
+                    continue
+                seen.add(entry.url)
+                f.write(f'#EXTINF:-1 tvg-logo="{entry.logo or ""}" group-title="{self.group_title}", {entry.title}\n')
+                f.write(f"{entry.url}\n")
+        os.replace(tmp_path, self.output)
+        return len(seen)
+
+
+# =========================================================
+# AGENDADOR
+# =========================================================
+class ScrapeEngine:
+    """Roda os plugins juntos com um pool de navegadores e limites por domínio."""
+
+    def __init__(self, sites, browsers=None, profile=None, http_first=HTTP_FIRST):
+        self.sites = list(sites)
+        self.browsers = browsers or default_browser_budget()
+        self.pool = DriverPool(chrome_options(), size=self.browsers, hide_webdriver=True)
+        self.profile = profile if profile is not None else CaptureProfile()
+        self.http = HttpFastPath(pool_size=self.browsers * 2) if http_first else None
+        self.tiers = TierStore()
+        self._domain_slots = {}
+        self._lock = threading.Lock()
+
+    def _domain_slot(self, url, site):
+        domain = site_domain(url)
+        with self._lock:
+            slot = self._domain_slots.get(domain)
+            if slot is None:
+                slot = self._domain_slots[domain] = threading.BoundedSemaphore(
+                    max(1, min(site.max_per_domain, self.browsers)))
+        return slot
+
+    @contextmanager
+    def browser(self, url, site):
+        """Navegador do pool para abrir `url`, respeitando o limite do domínio."""
+        with self._domain_slot(url, site):
+            with self.pool.driver() as driver:
+                if site.user_agent:
+                    try:
+                        driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': site.user_agent})
+                    except Exception:
+                        pass
+                yield driver
+
+    def try_http(self, page):
+        """Tentar o caminho HTTP nesta página? (desligado, ou pulado nas que sempre precisam do navegador)"""
+        return self.http is not None and self.tiers.should_try_http(page)
+
+    def record_tier(self, page, tier, http_tried):
+        self.tiers.record(page, tier, http_tried)
+
+    def _scrape(self, site, page):
+        try:
+            return site.scrape(self, page)
+        except Exception as e:
+            print(f"❌ [{site.name}] Erro ao processar {page}: {e}")
+            return None
+
+    def _discover(self, site):
+        try:
+            return site.discover(self)
+        except Exception as e:
+            print(f"❌ [{site.name}] Erro na descoberta de páginas: {e}")
+            return []
+
+    def run(self):
+        """Processa todos os sites e grava as playlists; devolve {site: entradas gravadas}."""
+        started = time.monotonic()
+        print(f"🚀 {len(self.sites)} sites, {self.browsers} navegadores")
+        # Threads sobrando esperam no limite do domínio sem ocupar navegador
+        workers = self.browsers * 2
+        results = {}
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                pages = dict(zip(self.sites, executor.map(self._discover, self.sites)))
+                for site in self.sites:
+                    print(f"🔎 [{site.name}] {len(pages[site])} páginas")
+
+                # Fila intercalada: uma página de cada site por vez
+                futures = {site: [] for site in self.sites}
+                queues = [[(site, page) for page in pages[site]] for site in self.sites]
+                for batch in zip_longest_skip(queues):
+                    for site, page in batch:
+                        futures[site].append(executor.submit(self._scrape, site, page))
+
+                pending = {site: len(fs) for site, fs in futures.items()}
+                owner = {f: site for site, fs in futures.items() for f in fs}
+                for site in self.sites:
+                    if not pending[site]:
+                        results[site.name] = self._finish(site, futures[site], started)
+                for future in concurrent.futures.as_completed(owner):
+                    site = owner[future]
+                    pending[site] -= 1
+                    if not pending[site]:
+                        results[site.name] = self._finish(site, futures[site], started)
+        finally:
+            self.pool.close()
+            try:
+                self.tiers.save()
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar {self.tiers.path}: {e}")
+        print(f"🎉 Concluído em {time.monotonic() - started:.0f} s "
+              f"({self.pool.started} navegadores abertos, {self.pool.restarted} reiniciados)")
+        return results
+
+    def _finish(self, site, futures, started):
+        # Ordem das páginas, não de conclusão: a playlist não muda à toa entre execuções
+        entries = [f.result() for f in futures]
+        entries = [e for e in entries if e is not None]
+        count = site.write_playlist(entries)
+        tiers = {}
+        for entry in entries:
+            tiers[entry.tier] = tiers.get(entry.tier, 0) + 1
+        via = ", ".join(f"{tier} {n}" for tier, n in sorted(tiers.items()))
+        print(f"✅ [{site.name}] {count} streams salvos em {site.output} "
+              f"({len(futures)} páginas, {time.monotonic() - started:.0f} s{'; ' + via if via else ''})")
+        return count
+
+
+def zip_longest_skip(queues):
+    """Lotes com o próximo item de cada fila, pulando as que já acabaram."""
+    iterators = [iter(q) for q in queues]
+    while iterators:
+        batch = []
+        for it in list(iterators):
+            item = next(it, None)
+            if item is None:
+                iterators.remove(it)
+            else:
+                batch.append(item)
+        if batch:
+            yield batch
+
+
+def run_sites(sites, browsers=None, http_first=HTTP_FIRST):
+    return ScrapeEngine(sites, browsers=browsers, http_first=http_first).run()
+
+
+def load_site(path):
+    """Carrega o plugin (atributo SITE) de um script de site, inclusive com espaço no nome."""
+    module_name = 'site_' + re.sub(r'\W+', '_', os.path.splitext(os.path.basename(path))[0]).lower()
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SITE()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sites', nargs='*', help='nome do plugin ou script (padrão: todos)')
+    parser.add_argument('--navegadores', type=int, default=None,
+                        help='orçamento global de navegadores (padrão: pelos núcleos e memória)')
+    parser.add_argument('--sem-http', action='store_true',
+                        help='não tenta o caminho só HTTP; abre o navegador em todas as páginas')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    sites = [load_site(os.path.join(base_dir, script)) for script in SITE_SCRIPTS]
+    if args.sites:
+        wanted = set(args.sites)
+        sites = [s for s, script in zip(sites, SITE_SCRIPTS) if s.name in wanted or script in wanted]
+        if not sites:
+            parser.error(f"nenhum site corresponde a {', '.join(args.sites)}")
+    run_sites(sites, browsers=args.navegadores, http_first=HTTP_FIRST and not args.sem_http)
+
+
+if __name__ == '__main__':
+    main()
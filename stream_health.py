@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Histórico de saúde dos streams em SQLite, com verificação agendada por backoff.
+
+Cada stream é identificado pela URL canônica (m3u_dedup.canonical_url) e
+guarda o resultado das últimas verificações. Em vez de testar todas as
+entradas a cada execução, só as que estão "vencidas" são testadas:
+
+- stream novo: testado na primeira oportunidade;
+- stream no ar: o intervalo dobra a cada sucesso seguido, até 24 h;
+- stream fora do ar: o intervalo dobra a cada falha seguida, até 7 dias.
+
+Cada execução testa as mais atrasadas primeiro, dentro de um orçamento de
+tempo. Na geração das playlists, iter_healthy_lines remove ou manda para o
+fim as entradas com várias falhas seguidas.
+
+Uso:
+  python stream_health.py verificar [--orcamento 300] [--max 2000] PLAYLIST...
+  python stream_health.py filtrar [--rebaixar] ENTRADA SAIDA
+  python stream_health.py resumo
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from urllib.parse import urlsplit
+
+from m3u_dedup import canonical_url, iter_blocks
+from stream_prober import StreamProber, read_playlist_entries
+
+DB_PATH = os.environ.get(
+    'STREAM_HEALTH_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'stream_health.sqlite'),
+)
+OK_INTERVAL = 3600
+OK_MAX_INTERVAL = 24 * 3600
+FAIL_INTERVAL = 3600
+FAIL_MAX_INTERVAL = 7 * 24 * 3600
+DEAD_AFTER = 3        # falhas seguidas para considerar o stream fora do ar
+HISTORY_LIMIT = 20    # verificações guardadas por stream
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS streams (
+    canonical TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    headers TEXT NOT NULL DEFAULT '{}',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_probe REAL,
+    last_ok REAL,
+    status TEXT,
+    http_status INTEGER,
+    latency_ms INTEGER,
+    final_url TEXT,
+    failures INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    next_due REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS streams_due ON streams (next_due);
+CREATE TABLE IF NOT EXISTS probes (
+    canonical TEXT NOT NULL,
+    ts REAL NOT NULL,
+    status TEXT NOT NULL,
+    http_status INTEGER,
+    latency_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS probes_canonical ON probes (canonical, ts);
+"""
+
+
+def next_interval(ok, streak, canonical=''):
+    """
+    Segundos até a próxima verificação depois de `streak` resultados iguais
+    seguidos. Um desvio fixo de até ±10% por stream espalha as verificações
+    de streams que entraram juntos na lista.
+    """
+    base, cap = (OK_INTERVAL, OK_MAX_INTERVAL) if ok else (FAIL_INTERVAL, FAIL_MAX_INTERVAL)
+    interval = min(cap, base * 2 ** min(max(streak, 1) - 1, 20))
+    digest = hashlib.blake2b(canonical.encode('utf-8'), digest_size=2).digest()
+    jitter = 0.9 + 0.2 * int.from_bytes(digest, 'big') / 0xFFFF
+    return interval * jitter
+
+
+class HealthStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    @classmethod
+    def open_existing(cls, path=DB_PATH):
+        """Abre o histórico se ele já existir; None caso contrário."""
+        return cls(path) if os.path.exists(path) else None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sync(self, entries, now=None):
+        """
+        Registra as entradas (url, cabeçalhos) presentes nas playlists atuais.
+        Streams novos ficam vencidos na hora; os conhecidos só têm a URL e os
+        cabeçalhos atualizados.
+        """
+        now = time.time() if now is None else now
+        rows = {}
+        for url, headers in entries:
+            if urlsplit(url).scheme.lower() in ('http', 'https'):
+                rows[canonical_url(url)] = (url, json.dumps(headers, sort_keys=True))
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO streams (canonical, url, headers, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (canonical) DO UPDATE SET
+                    url = excluded.url, headers = excluded.headers, last_seen = excluded.last_seen
+                """,
+                ((canonical, url, headers, now, now) for canonical, (url, headers) in rows.items()),
+            )
+        return len(rows)
+
+    def due(self, now=None, limit=None, seen_since=None):
+        """Streams vencidos, dos mais atrasados para os menos: [(canônica, url, cabeçalhos)]."""
+        now = time.time() if now is None else now
+        query = 'SELECT canonical, url, headers FROM streams WHERE next_due <= ?'
+        params = [now]
+        if seen_since is not None:
+            # Streams que saíram das playlists não são mais testados
+            query += ' AND last_seen >= ?'
+            params.append(seen_since)
+        query += ' ORDER BY next_due'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [(row['canonical'], row['url'], json.loads(row['headers']))
+                for row in self.conn.execute(query, params)]
+
+    def record(self, canonical, result, now=None):
+        """Grava o resultado de uma verificação do stream_prober e reagenda o stream."""
+        now = time.time() if now is None else now
+        ok = result['status'] == 'ok'
+        row = self.conn.execute(
+            'SELECT failures, successes FROM streams WHERE canonical = ?', (canonical,)
+        ).fetchone()
+        failures, successes = (row['failures'], row['successes']) if row else (0, 0)
+        failures, successes = (0, successes + 1) if ok else (failures + 1, 0)
+        next_due = now + next_interval(ok, successes if ok else failures, canonical)
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE streams SET last_probe = ?, last_ok = CASE WHEN ? THEN ? ELSE last_ok END,
+                    status = ?, http_status = ?, latency_ms = ?, final_url = ?,
+                    failures = ?, successes = ?, next_due = ?
+                WHERE canonical = ?
+                """,
+                (now, ok, now, result['status'], result.get('http_status'), result.get('latency_ms'),
+                 result.get('final_url'), failures, successes, next_due, canonical),
+            )
+            self.conn.execute(
+                'INSERT INTO probes (canonical, ts, status, http_status, latency_ms) VALUES (?, ?, ?, ?, ?)',
+                (canonical, now, result['status'], result.get('http_status'), result.get('latency_ms')),
+            )
+            self.conn.execute(
+                """
+                DELETE FROM probes WHERE canonical = ? AND ts < (
+                    SELECT ts FROM probes WHERE canonical = ? ORDER BY ts DESC LIMIT 1 OFFSET ?
+                )
+                """,
+                (canonical, canonical, HISTORY_LIMIT - 1),
+            )
+
+    def lookup(self, url):
+        """Estado atual do stream (dicionário) ou None se nunca foi visto."""
+        row = self.conn.execute(
+            'SELECT * FROM streams WHERE canonical = ?', (canonical_url(url),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def is_dead(self, url, min_failures=DEAD_AFTER):
+        row = self.conn.execute(
+            'SELECT failures FROM streams WHERE canonical = ?', (canonical_url(url),)
+        ).fetchone()
+        return bool(row) and row['failures'] >= min_failures
+
+    def history(self, url):
+        return [dict(row) for row in self.conn.execute(
+            'SELECT ts, status, http_status, latency_ms FROM probes WHERE canonical = ? ORDER BY ts',
+            (canonical_url(url),),
+        )]
+
+    def summary(self, now=None):
+        now = time.time() if now is None else now
+        row = self.conn.execute(
+            """
+            SELECT COUNT(*) AS streams,
+                   SUM(status IS NULL) AS never_probed,
+                   SUM(status = 'ok') AS ok,
+                   SUM(failures >= ?) AS dead,
+                   SUM(next_due <= ?) AS due
+            FROM streams
+            """,
+            (DEAD_AFTER, now),
+        ).fetchone()
+        return {key: row[key] or 0 for key in row.keys()}
+
+
+def probe_due(playlists, store, budget=300, max_probes=None, prober=None, progress=None):
+    """
+    Sincroniza o histórico com as playlists e testa os streams vencidos até
+    `max_probes` ou até o orçamento de `budget` segundos acabar.
+    """
+    now = time.time()
+    entries = []
+    for path in playlists:
+        entries.extend((channel.url, headers) for _, channel, headers in read_playlist_entries(path))
+    tracked = store.sync(entries, now)
+
+    due = store.due(now, max_probes, seen_since=now)
+    targets = {canonical: (url, headers) for canonical, url, headers in due}
+    prober = prober or StreamProber()
+    started = time.monotonic()
+    results = asyncio.run(prober.probe_all(targets, progress, deadline=started + budget))
+    for canonical, result in results.items():
+        store.record(canonical, result)
+
+    states = {}
+    for result in results.values():
+        states[result['status']] = states.get(result['status'], 0) + 1
+    return {
+        'entries': len(entries),
+        'tracked': tracked,
+        'due': len(targets),
+        'probed': len(results),
+        'deferred': len(targets) - len(results),
+        'seconds': round(time.monotonic() - started, 1),
+        'results': states,
+    }
+
+
+def iter_healthy_lines(lines, store, demote=False, min_failures=DEAD_AFTER):
+    """
+    Repassa as linhas da playlist sem as entradas fora do ar (`min_failures`
+    falhas seguidas) ou, com `demote`, com elas movidas para o fim da lista.
+    Entradas nunca testadas são mantidas no lugar.
+    """
+    demoted = []
+    for channel, block in iter_blocks(lines):
+        if channel is not None and store.is_dead(channel.url, min_failures):
+            if demote:
+                demoted.append(block)
+            continue
+        yield from block
+    for block in demoted:
+        yield from block
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--banco', default=DB_PATH, help='arquivo SQLite do histórico')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    check = commands.add_parser('verificar', help='testa os streams vencidos das playlists')
+    check.add_argument('playlists', nargs='+')
+    check.add_argument('--orcamento', type=float, default=300, help='segundos para iniciar verificações')
+    check.add_argument('--max', type=int, default=None, help='máximo de streams testados nesta execução')
+    check.add_argument('--concorrencia', type=int, default=200)
+    check.add_argument('--por-host', type=int, default=4)
+    check.add_argument('--timeout', type=float, default=10.0)
+
+    filter_cmd = commands.add_parser('filtrar', help='grava a playlist sem os streams fora do ar')
+    filter_cmd.add_argument('entrada')
+    filter_cmd.add_argument('saida')
+    filter_cmd.add_argument('--rebaixar', action='store_true', help='move para o fim em vez de remover')
+    filter_cmd.add_argument('--falhas', type=int, default=DEAD_AFTER, help='falhas seguidas para remover')
+
+    commands.add_parser('resumo', help='mostra o estado do histórico')
+    args = parser.parse_args()
+
+    with HealthStore(args.banco) as store:
+        if args.command == 'verificar':
+            prober = StreamProber(args.concorrencia, args.por_host, args.timeout)
+
+            def progress(done, total):
+                if done % 500 == 0 or done == total:
+                    print(f"  ⏳ {done}/{total} streams vencidos", file=sys.stderr)
+
+            stats = probe_due(args.playlists, store, args.orcamento, args.max, prober, progress)
+            results = ', '.join(f"{status}: {count}" for status, count in sorted(stats['results'].items()))
+            print(f"🩺 {stats['entries']} entradas, {stats['tracked']} streams, {stats['due']} vencidos, "
+                  f"{stats['probed']} testados em {stats['seconds']} s ({results or 'nenhum'})")
+            if stats['deferred']:
+                print(f"⏭️ {stats['deferred']} ficaram para a próxima execução (orçamento de tempo)")
+        elif args.command == 'filtrar':
+            tmp_path = args.saida + '.tmp'
+            with open(args.entrada, 'r', encoding='utf-8', errors='surrogateescape', newline='') as src, \
+                    open(tmp_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as dst:
+                dst.writelines(iter_healthy_lines(src, store, args.rebaixar, args.falhas))
+            os.replace(tmp_path, args.saida)
+            print(f"📝 Playlist filtrada salva em: {args.saida}")
+        summary = store.summary()
+        print(f"📊 Histórico: {summary['streams']} streams, {summary['ok']} no ar, "
+              f"{summary['dead']} fora do ar, {summary['never_probed']} nunca testados, {summary['due']} vencidos")
+
+
+if __name__ == '__main__':
+    main()
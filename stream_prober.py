@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Verificador assíncrono de streams: lê playlists M3U e testa cada URL com
+concorrência limitada (global e por host), gerando um índice de saúde em JSON.
+
+Cada URL recebe um HEAD; se o servidor recusar (erro HTTP ou conexão
+derrubada), tenta um GET com Range dos primeiros bytes. Redirecionamentos são
+seguidos e o User-Agent/Referer de #EXTVLCOPT é respeitado. URLs que só
+diferem em parâmetros voláteis (m3u_dedup.canonical_url) são testadas uma
+única vez. Usa só asyncio da biblioteca padrão, sem dependências novas.
+
+Uso: python stream_prober.py [--saida saude.json] [--concorrencia 200] [--por-host 4] PLAYLIST...
+"""
+
+import argparse
+import asyncio
+import json
+import ssl
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote, urljoin, urlsplit
+
+from m3u_dedup import canonical_url, iter_blocks
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+MAX_REDIRECTS = 5
+MAX_HEADER_LINES = 100
+RANGE_BYTES = 1024
+_SAFE_PATH_CHARS = "/%:@!$&'()*+,;=-._~?"
+
+
+class ProbeError(Exception):
+    """Falha de rede ou de protocolo ao testar uma URL."""
+
+
+def parse_vlc_options(block):
+    """Extrai http-user-agent/http-referrer das linhas #EXTVLCOPT de uma entrada."""
+    options = {}
+    for line in block[:-1]:
+        line = line.strip()
+        if line.startswith('#EXTVLCOPT:'):
+            key, _, value = line[len('#EXTVLCOPT:'):].partition('=')
+            options[key.strip().lower()] = value.strip()
+    headers = {}
+    if options.get('http-user-agent'):
+        headers['User-Agent'] = options['http-user-agent']
+    referrer = options.get('http-referrer') or options.get('http-referer')
+    if referrer:
+        headers['Referer'] = referrer
+    return headers
+
+
+def read_playlist_entries(path):
+    """Entradas (linha, Channel, cabeçalhos HTTP) de uma playlist, via o parser M3U do repositório."""
+    entries = []
+    line_no = 1
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for channel, block in iter_blocks(f):
+            if channel is not None:
+                entries.append((line_no, channel, parse_vlc_options(block)))
+            line_no += len(block)
+    return entries
+
+
+async def _request(method, url, headers, timeout, ssl_context):
+    """Envia uma requisição HTTP/1.1 e devolve (status, cabeçalhos) sem ler o corpo."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        raise ProbeError(f'esquema não suportado: {scheme or url}')
+    host = parts.hostname.encode('idna').decode('ascii')
+    port = parts.port or (443 if scheme == 'https' else 80)
+    target = quote(parts.path or '/', safe=_SAFE_PATH_CHARS)
+    if parts.query:
+        target += '?' + quote(parts.query, safe=_SAFE_PATH_CHARS)
+    host_header = host if parts.port is None else f'{host}:{parts.port}'
+
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {host_header}', 'Accept: */*', 'Connection: close']
+    lines += [f'{key}: {value}' for key, value in headers.items()]
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace')
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=ssl_context if scheme == 'https' else None,
+                                server_hostname=host if scheme == 'https' else None),
+        timeout,
+    )
+    try:
+        writer.write(request)
+        await asyncio.wait_for(writer.drain(), timeout)
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        fields = status_line.decode('latin-1').split(None, 2)
+        if len(fields) < 2 or not fields[0].startswith('HTTP/') or not fields[1].isdigit():
+            raise ProbeError(f'resposta HTTP inválida: {status_line[:60]!r}')
+        response_headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+        return int(fields[1]), response_headers
+    finally:
+        writer.close()
+
+
+class StreamProber:
+    def __init__(self, concurrency=200, per_host=4, timeout=10.0, verify_tls=False):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        # Muitos servidores de IPTV têm certificados vencidos; por padrão não invalidam o stream
+        self.ssl_context = ssl.create_default_context()
+        if not verify_tls:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._global = None
+        self._hosts = {}
+
+    def _host_semaphore(self, url):
+        host = (urlsplit(url).hostname or '').lower()
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    async def _follow(self, method, url, headers):
+        """Segue redirecionamentos; devolve (status, URL final)."""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers = await _request(method, url, headers, self.timeout, self.ssl_context)
+            location = response_headers.get('location')
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return status, url
+        raise ProbeError('redirecionamentos demais')
+
+    async def probe(self, url, headers=None, deadline=None):
+        """
+        Testa uma URL e devolve o resultado como dicionário, ou None se a vez
+        dela só chegou depois de `deadline` (time.monotonic()).
+        """
+        headers = {'User-Agent': DEFAULT_USER_AGENT, **(headers or {})}
+        if urlsplit(url).scheme.lower() not in ('http', 'https'):
+            return {'status': 'skipped', 'error': 'esquema não HTTP'}
+
+        async with self._host_semaphore(url), self._global:
+            start = time.monotonic()
+            if deadline is not None and start >= deadline:
+                return None
+            result = {'method': 'HEAD'}
+            try:
+                status, final_url = await self._follow('HEAD', url, headers)
+                head_failed = status >= 400
+            # asyncio.TimeoutError é subclasse de OSError no Python 3.11+: precisa vir antes
+            except asyncio.TimeoutError:
+                status, final_url, head_failed = None, url, False
+                result['error'] = 'timeout'
+            except (OSError, asyncio.IncompleteReadError, ProbeError) as e:
+                # Servidores que derrubam HEAD costumam aceitar GET
+                status, final_url, head_failed = None, url, True
+                result['error'] = str(e) or type(e).__name__
+
+            if head_failed:
+                result['method'] = 'GET'
+                try:
+                    ranged = {**headers, 'Range': f'bytes=0-{RANGE_BYTES - 1}'}
+                    status, final_url = await self._follow('GET', url, ranged)
+                    result.pop('error', None)
+                except asyncio.TimeoutError:
+                    result['error'] = 'timeout'
+                except (OSError, asyncio.IncompleteReadError, ProbeError) as e:
+                    result['error'] = str(e) or type(e).__name__
+
+            result['latency_ms'] = round((time.monotonic() - start) * 1000)
+        result['http_status'] = status
+        result['final_url'] = final_url
+        if status is None:
+            result['status'] = 'error'
+        else:
+            # 416: o servidor não aceitou o Range, mas o recurso existe
+            result['status'] = 'ok' if status < 400 or status == 416 else 'dead'
+        return result
+
+    async def probe_all(self, targets, progress=None, deadline=None):
+        """
+        Testa {chave: (url, cabeçalhos)} e devolve {chave: resultado}. `progress`
+        é chamado com (feitos, total) a cada URL concluída. Com `deadline`, as
+        URLs que não começaram a tempo ficam de fora do resultado.
+        """
+        self._global = asyncio.Semaphore(self.concurrency)
+        results = {}
+        done = 0
+
+        async def run(key, url, headers):
+            nonlocal done
+            result = await self.probe(url, headers, deadline)
+            if result is not None:
+                results[key] = result
+            done += 1
+            if progress:
+                progress(done, len(targets))
+
+        await asyncio.gather(*(run(key, url, headers) for key, (url, headers) in targets.items()))
+        return results
+
+
+def build_health_index(playlists, prober, progress=None):
+    """Lê as playlists, testa cada stream uma vez e monta o índice de saúde."""
+    entries = []
+    targets = {}
+    for path in playlists:
+        for line_no, channel, headers in read_playlist_entries(path):
+            # Mesma URL canônica com o mesmo User-Agent é testada uma vez só
+            key = (canonical_url(channel.url), tuple(sorted(headers.items())))
+            targets.setdefault(key, (channel.url, headers))
+            entries.append((path, line_no, channel, key))
+
+    started = time.monotonic()
+    results = asyncio.run(prober.probe_all(targets, progress))
+    elapsed = time.monotonic() - started
+
+    index = []
+    for path, line_no, channel, key in entries:
+        index.append({
+            'playlist': path,
+            'line': line_no,
+            'name': channel.name,
+            'tvg_id': channel.tvg_id,
+            'url': channel.url,
+            **results[key],
+        })
+    summary = {}
+    for item in index:
+        summary[item['status']] = summary.get(item['status'], 0) + 1
+    return {
+        'generated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'playlists': list(playlists),
+        'unique_urls': len(targets),
+        'seconds': round(elapsed, 1),
+        'summary': summary,
+        'entries': index,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('playlists', nargs='+')
+    parser.add_argument('--saida', default='output/saude_streams.json', help='arquivo JSON do índice de saúde')
+    parser.add_argument('--concorrencia', type=int, default=200, help='conexões simultâneas no total')
+    parser.add_argument('--por-host', type=int, default=4, help='conexões simultâneas por host')
+    parser.add_argument('--timeout', type=float, default=10.0, help='segundos por etapa (conexão, resposta)')
+    parser.add_argument('--verificar-tls', action='store_true', help='rejeita certificados inválidos')
+    args = parser.parse_args()
+
+    prober = StreamProber(args.concorrencia, args.por_host, args.timeout, args.verificar_tls)
+
+    def progress(done, total):
+        if done % 500 == 0 or done == total:
+            print(f"  ⏳ {done}/{total} URLs testadas", file=sys.stderr)
+
+    health = build_health_index(args.playlists, prober, progress)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(health, f, ensure_ascii=False, indent=1)
+
+    summary = ', '.join(f"{status}: {count}" for status, count in sorted(health['summary'].items()))
+    print(f"🩺 {len(health['entries'])} entradas, {health['unique_urls']} URLs únicas em {health['seconds']} s ({summary})")
+    print(f"📝 Índice de saúde salvo em: {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
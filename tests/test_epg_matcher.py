@@ -0,0 +1,37 @@
+import pytest
+
+from epg_matcher import EpgMatcher, normalize
+
+EPG = [
+    ('Premiere2.br', ['Premiere 2']),
+    ('Discovery Kids.br', ['Discovery Kids']),
+    ('RecordBH.br', ['Record BH']),
+    ('SporTV.br', ['SporTV']),
+    ('GloboBahia.br', ['Globo TV Bahia']),
+]
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return EpgMatcher(EPG)
+
+
+@pytest.mark.parametrize('name', ['Premiere 3', 'Premiere 12', 'Discovery', 'Record BA'])
+def test_variante_irma_nao_casa(matcher, name):
+    assert matcher.match(name)[0] is None
+
+
+@pytest.mark.parametrize('name, epg_id', [
+    ('Premiere 2 HD', 'Premiere2.br'),
+    ('TV Record BH', 'RecordBH.br'),
+    ('Globo BA', 'GloboBahia.br'),
+    ('Globo Bahai', 'GloboBahia.br'),
+    ('SporTV FHD', 'SporTV.br'),
+])
+def test_mesma_variante_casa(matcher, name, epg_id):
+    assert matcher.match(name)[0] == epg_id
+
+
+def test_tv_colado_no_nome_nao_e_ruido():
+    assert normalize('SporTV') == 'sportv'
+    assert normalize('TV Globo') == 'globo'
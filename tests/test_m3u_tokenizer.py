@@ -0,0 +1,21 @@
+from m3u_tokenizer import parse_extinf
+
+
+def test_nome_com_aspas_e_virgula():
+    line = '#EXTINF:-1 tvg-id="a.br" group-title="Filmes",Filme ",Parte 2"'
+    assert parse_extinf(line) == ('-1', {'tvg-id': 'a.br', 'group-title': 'Filmes'}, 'Filme ",Parte 2"')
+
+
+def test_virgula_dentro_de_valor_entre_aspas():
+    line = '#EXTINF:-1 tvg-name="A, B" tvg-id="x",Nome, com vírgula'
+    assert parse_extinf(line) == ('-1', {'tvg-name': 'A, B', 'tvg-id': 'x'}, 'Nome, com vírgula')
+
+
+def test_valores_sem_aspas_e_igual_em_url():
+    line = '#EXTINF:-1 media=true tvg-logo="http://x/a.jpg?q=100&w=900", Série'
+    assert parse_extinf(line) == ('-1', {'media': 'true', 'tvg-logo': 'http://x/a.jpg?q=100&w=900'}, 'Série')
+
+
+def test_aspas_desbalanceadas_usam_a_ultima_virgula():
+    line = '#EXTINF:-1 radio="true" tvg-logo="http://x/logo.png,AVFM'
+    assert parse_extinf(line)[2] == 'AVFM'
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from stream_prober import StreamProber
+
+TIMEOUT = 0.5
+
+
+async def _handle(reader, writer):
+    """Servidor de teste: o comportamento depende do caminho e do método."""
+    request = await reader.readuntil(b'\r\n\r\n')
+    method, path = request.decode('latin-1').split(None, 2)[:2]
+    if path == '/lento':
+        await asyncio.sleep(TIMEOUT * 4)
+        writer.close()
+        return
+    if path == '/ok':
+        status, extra = '200 OK', ''
+    elif path == '/redireciona':
+        status, extra = '302 Found', 'Location: /ok\r\n'
+    elif method == 'HEAD':
+        status, extra = '405 Method Not Allowed', ''
+    elif path == '/sem-head':
+        status, extra = '206 Partial Content', ''
+    else:
+        status, extra = '416 Range Not Satisfiable', ''
+    writer.write(f'HTTP/1.1 {status}\r\n{extra}Content-Length: 0\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    writer.close()
+
+
+def probe(path):
+    async def run():
+        server = await asyncio.start_server(_handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            url = f'http://127.0.0.1:{port}{path}'
+            results = await StreamProber(timeout=TIMEOUT).probe_all({'url': (url, {})})
+            return url, results['url']
+    return asyncio.run(run())
+
+
+def test_head_ok():
+    url, result = probe('/ok')
+    assert result['status'] == 'ok'
+    assert result['method'] == 'HEAD'
+    assert result['http_status'] == 200
+    assert result['final_url'] == url
+
+
+def test_head_rejeitado_cai_para_get():
+    _, result = probe('/sem-head')
+    assert result['status'] == 'ok'
+    assert result['method'] == 'GET'
+    assert result['http_status'] == 206
+    assert 'error' not in result
+
+
+def test_redirecionamento():
+    url, result = probe('/redireciona')
+    assert result['status'] == 'ok'
+    assert result['final_url'] == url.replace('/redireciona', '/ok')
+
+
+def test_timeout_nao_repete_com_get():
+    started = time.monotonic()
+    _, result = probe('/lento')
+    assert result['status'] == 'error'
+    assert result['error'] == 'timeout'
+    assert result['method'] == 'HEAD'
+    assert time.monotonic() - started < TIMEOUT * 2
+
+
+def test_416_conta_como_no_ar():
+    _, result = probe('/range')
+    assert result['status'] == 'ok'
+    assert result['method'] == 'GET'
+    assert result['http_status'] == 416
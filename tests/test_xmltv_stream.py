@@ -0,0 +1,72 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from xmltv_stream import ProgrammeIndex, XMLTVScanError, iter_xmltv_raw
+
+CDATA_DOC = (
+    b'<?xml version="1.0" encoding="utf-8"?>\n<tv>\n'
+    b'<programme start="20260101000000 +0000" channel="a.br">'
+    b'<title>Um</title><desc><![CDATA[texto com </programme> e <tag> no meio]]></desc></programme>\n'
+    b'<programme start="20260101010000 +0000" channel="a.br"><title>Dois</title></programme>\n'
+    b'</tv>\n'
+)
+COMMENT_DOC = (
+    b'<?xml version="1.0" encoding="utf-8"?>\n<tv>\n'
+    b'<channel id="a.br"><display-name>A</display-name></channel>\n'
+    b'<!-- removido: <programme start="20250101000000 +0000" channel="x.br"> -->\n'
+    b'<programme start="20260101000000 +0000" channel="a.br">'
+    b'<!-- nota: </programme> --><title>Um</title></programme>\n'
+    b'<!-- fim da lista <programme -->\n'
+    b'</tv>\n'
+)
+
+
+def scan(doc, chunk_size=None):
+    if chunk_size is None:
+        chunks = [doc]
+    else:
+        chunks = [doc[i:i + chunk_size] for i in range(0, len(doc), chunk_size)]
+    return list(iter_xmltv_raw(chunks))
+
+
+@pytest.mark.parametrize('chunk_size', [None, 7])
+def test_cdata_com_fechamento_nao_corta_o_elemento(chunk_size):
+    elements = scan(CDATA_DOC, chunk_size)
+    assert [attrs['start'][:10] for _, attrs, _ in elements] == ['2026010100', '2026010101']
+    first = ET.fromstring(elements[0][2])
+    assert first.findtext('desc') == 'texto com </programme> e <tag> no meio'
+    assert ET.fromstring(elements[1][2]).findtext('title') == 'Dois'
+
+
+@pytest.mark.parametrize('chunk_size', [None, 7])
+def test_comentarios_sao_ignorados(chunk_size):
+    elements = scan(COMMENT_DOC, chunk_size)
+    assert [(tag, attrs.get('channel') or attrs.get('id')) for tag, attrs, _ in elements] == [
+        ('channel', 'a.br'), ('programme', 'a.br'),
+    ]
+    assert ET.fromstring(elements[1][2]).findtext('title') == 'Um'
+
+
+def test_elemento_nao_fechado_continua_sendo_erro():
+    doc = b'<tv><programme channel="a.br"><title>x</title>\n</tv>'
+    with pytest.raises(XMLTVScanError):
+        scan(doc)
+
+
+def test_sobreposicao_dentro_da_mesma_fonte_e_mantida():
+    index = ProgrammeIndex()
+    assert index.accept('a.br', '20260101100000 +0000', '20260101110500 +0000')
+    assert index.accept('a.br', '20260101110000 +0000', '20260101120000 +0000')
+    assert index.dropped == 0
+
+
+def test_fonte_seguinte_nao_sobrepoe_a_anterior():
+    index = ProgrammeIndex()
+    assert index.accept('a.br', '20260101100000 +0000', '20260101140000 +0000')
+    assert index.accept('a.br', '20260101110000 +0000', '20260101120000 +0000')
+    index.end_source()
+    assert not index.accept('a.br', '20260101110000 +0000', '20260101120000 +0000')
+    assert not index.accept('a.br', '20260101123000 +0000', '20260101130000 +0000')
+    assert index.accept('a.br', '20260101140000 +0000', '20260101150000 +0000')
+    assert (index.duplicates, index.overlaps) == (1, 1)
@@ -0,0 +1,387 @@
+"""
+Utilitários de streaming para XMLTV - descompressão incremental (.gz/.xz) e
+parsing elemento a elemento, mantendo o uso de memória independente do
+tamanho da fonte.
+"""
+
+import codecs
+import html
+import itertools
+import lzma
+import re
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+import xml.etree.ElementTree as ET
+
+CHUNK_SIZE = 64 * 1024
+
+XMLTV_HEADER = b'<?xml version="1.0" encoding="utf-8"?>\n<tv>\n'
+XMLTV_FOOTER = b'</tv>\n'
+
+GZIP_MAGIC = b'\x1f\x8b'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+
+
+def detect_compression(head):
+    """Identifica a compressão pelos bytes iniciais: 'gz', 'xz' ou None."""
+    if head.startswith(GZIP_MAGIC):
+        return 'gz'
+    if head.startswith(XZ_MAGIC):
+        return 'xz'
+    return None
+
+
+def _new_decompressor(kind):
+    if kind == 'gz':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return lzma.LZMADecompressor()
+
+
+def iter_decompressed(chunks):
+    """
+    Descomprime incrementalmente um iterável de blocos de bytes.
+
+    A compressão é detectada pelos bytes mágicos (não pela extensão da URL);
+    conteúdo sem compressão é repassado como está. Membros gzip e streams xz
+    concatenados são suportados.
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(XZ_MAGIC):
+            break
+
+    kind = detect_compression(head)
+    if kind is None:
+        if head:
+            yield head
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+        return
+
+    decompressor = _new_decompressor(kind)
+    for chunk in itertools.chain([head], chunks):
+        while chunk:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+            if not decompressor.eof:
+                break
+            chunk = decompressor.unused_data
+            if chunk and detect_compression(chunk) != kind:
+                # Lixo após o último membro (ex.: padding com zeros) é ignorado
+                return
+            decompressor = _new_decompressor(kind)
+
+    if kind == 'gz':
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+def iter_xmltv_elements(byte_chunks, tags=('channel', 'programme')):
+    """
+    Gera (tag, elemento) para cada filho direto de <tv> presente em `tags`,
+    assim que o elemento termina de ser lido.
+
+    Cada elemento é removido da árvore logo após ser entregue, portanto quem
+    consome deve serializá-lo ou copiar o que precisar antes de avançar.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    depth = 0
+    for chunk in itertools.chain(byte_chunks, [None]):
+        if chunk is None:
+            parser.close()
+        else:
+            parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            if elem.tag in tags:
+                yield elem.tag, elem
+            root.remove(elem)
+
+
+class XMLTVScanError(ValueError):
+    """XMLTV malformado ou truncado encontrado pela varredura de bytes."""
+
+
+_ROOT_RE = re.compile(rb'<tv(?=[\s/>])')
+_DECLARED_ENCODING_RE = re.compile(rb'<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._:-]+)["\']')
+_ELEMENT_START_RE = re.compile(rb'<(channel|programme)(?=[\s/>])')
+_ELEMENT_RE = re.compile(
+    rb'<(channel|programme)((?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*)\s*(?:/>|>.*?</\1\s*>)',
+    re.DOTALL,
+)
+_START_TAG_END_RE = re.compile(rb'(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*\s*>')
+_COMMENT_RE = re.compile(rb'\s*<!--.*?-->', re.DOTALL)
+# Dentro de um elemento: o que pode esconder um "</programme>" que não fecha nada
+_SECTIONS = {b'<!--': b'-->', b'<![CDATA[': b']]>'}
+_CLOSE_OR_SECTION_RES = {
+    tag: re.compile(rb'<!--|<!\[CDATA\[|</' + tag + rb'\s*>') for tag in (b'channel', b'programme')
+}
+_ATTR_RE = re.compile(r'([^\s=/>]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_TAG_NAMES = {b'channel': 'channel', b'programme': 'programme'}
+_MAX_PENDING = 16 * 1024 * 1024  # maior trecho aceito sem achar o fim de um elemento
+
+
+def _decode_attrs(attr_bytes, encoding):
+    text = attr_bytes.decode(encoding, 'replace')
+    if '&' in text:
+        return {name: html.unescape(dq or sq) for name, dq, sq in _ATTR_RE.findall(text)}
+    return {name: dq or sq for name, dq, sq in _ATTR_RE.findall(text)}
+
+
+def _skip_comments(buf, pos):
+    """Posição depois dos comentários completos que começam em `pos` (ignorando espaços)."""
+    while True:
+        match = _COMMENT_RE.match(buf, pos)
+        if match is None:
+            return pos
+        pos = match.end()
+
+
+def _element_end(buf, match):
+    """
+    Fim do elemento que `match` (de _ELEMENT_RE) começa, pulando comentários e
+    seções CDATA, que podem conter um falso "</programme>". Devolve -1 se o
+    elemento ainda não terminou dentro de `buf`.
+    """
+    tag = match.group(1)
+    start_tag = _START_TAG_END_RE.match(buf, match.start() + 1 + len(tag))
+    pos = start_tag.end()
+    close_re = _CLOSE_OR_SECTION_RES[tag]
+    while True:
+        token = close_re.search(buf, pos)
+        if token is None:
+            return -1
+        terminator = _SECTIONS.get(token.group(0))
+        if terminator is None:
+            return token.end()
+        end = buf.find(terminator, token.end())
+        if end == -1:
+            return -1
+        pos = end + len(terminator)
+
+
+def iter_xmltv_raw(byte_chunks):
+    """
+    Varre o XMLTV em bytes e gera (tag, atributos, bytes_originais) para cada
+    <channel>/<programme> filho de <tv>, sem decodificar o documento nem
+    montar árvore: só os atributos da tag de abertura são lidos.
+
+    Os bytes originais são repassados como estão (ou recodificados para UTF-8
+    se a declaração XML indicar outra codificação). Não há validação completa
+    do XML; documentos sem raiz <tv>, truncados ou com elementos não fechados
+    geram XMLTVScanError. Comentários entre os elementos são pulados, e
+    comentários e CDATA dentro deles não encerram o elemento antes da hora.
+    """
+    buf = b''
+    pos = 0
+    encoding = None
+    transcode = False
+    for chunk in itertools.chain(byte_chunks, [None]):
+        final = chunk is None
+        if not final:
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        if encoding is None:
+            root = _ROOT_RE.search(buf)
+            if root is None:
+                if final:
+                    raise XMLTVScanError("raiz <tv> não encontrada (conteúdo não parece ser XMLTV)")
+                if len(buf) > _MAX_PENDING:
+                    raise XMLTVScanError("raiz <tv> não encontrada no início do documento")
+                continue
+            declared = _DECLARED_ENCODING_RE.search(buf, 0, root.start())
+            encoding = 'utf-8'
+            if declared:
+                try:
+                    encoding = codecs.lookup(declared.group(1).decode('ascii')).name
+                except LookupError:
+                    pass
+            transcode = encoding not in ('utf-8', 'ascii')
+            pos = root.end()
+
+        rescan = True
+        while rescan:
+            rescan = False
+            for match in _ELEMENT_RE.finditer(buf, pos):
+                end = match.end()
+                # Caminho lento só quando há comentário ou CDATA antes ou dentro do elemento
+                if buf.find(b'<!', pos, end) != -1:
+                    comment = buf.find(b'<!--', pos, match.start())
+                    if comment != -1:
+                        # Um "<programme" dentro do comentário não conta: recomeça depois dele
+                        close = buf.find(b'-->', comment + 4)
+                        if close == -1:
+                            break
+                        pos = close + 3
+                        rescan = True
+                        break
+                    end = _element_end(buf, match)
+                    if end == -1:
+                        break
+                    rescan = end != match.end()
+                raw = buf[match.start():end]
+                if transcode:
+                    raw = raw.decode(encoding, 'replace').encode('utf-8')
+                yield _TAG_NAMES[match.group(1)], _decode_attrs(match.group(2), encoding), raw
+                pos = end
+                if rescan:
+                    break
+        pos = _skip_comments(buf, pos)
+
+        # O que sobrou após o último elemento completo fica para o próximo bloco
+        if final or len(buf) - pos > _MAX_PENDING:
+            pending = _ELEMENT_START_RE.search(buf, pos)
+            if pending:
+                raise XMLTVScanError(f"elemento <{pending.group(1).decode()}> não fechado")
+
+    if b'</tv>' not in buf[pos:]:
+        raise XMLTVScanError("documento truncado: </tv> não encontrado")
+
+
+_DAY_CACHE = {}
+
+
+def _days_from_civil(year, month, day):
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def parse_xmltv_time(value):
+    """
+    Converte um horário XMLTV ('20240101120000 +0000') em segundos desde a
+    época (UTC). Sem fuso, assume UTC; devolve None se o formato for inválido.
+    """
+    if not value or len(value) < 12:
+        return None
+    date = value[:8]
+    days = _DAY_CACHE.get(date)
+    try:
+        if days is None:
+            days = _days_from_civil(int(date[:4]), int(date[4:6]), int(date[6:8]))
+            _DAY_CACHE[date] = days
+        seconds = int(value[8:10]) * 3600 + int(value[10:12]) * 60
+        rest = value[12:]
+        if rest[:2].isdigit():
+            seconds += int(rest[:2])
+            rest = rest[2:]
+        tz = rest.strip()
+        if tz and tz[0] in '+-' and len(tz) == 5:
+            offset = int(tz[1:3]) * 3600 + int(tz[3:5]) * 60
+            seconds -= offset if tz[0] == '+' else -offset
+    except ValueError:
+        return None
+    return days * 86400 + seconds
+
+
+class ProgrammeIndex:
+    """
+    Índice de intervalos por canal para descartar programas duplicados ou
+    sobrepostos entre fontes. Vence quem chega primeiro, ou seja, a fonte
+    processada antes tem prioridade.
+
+    Os programas de uma mesma fonte nunca se descartam entre si: os aceitos
+    ficam pendentes e só entram no índice em end_source, quando a fonte termina.
+
+    Para cada canal só são guardados os inícios, fins e o maior fim até cada
+    posição dos programas aceitos, ordenados em três array('q') (24 bytes por
+    programa), nunca os elementos.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._pending = {}
+        self._journal = None
+        self.duplicates = 0
+        self.overlaps = 0
+
+    @property
+    def dropped(self):
+        return self.duplicates + self.overlaps
+
+    def accept(self, channel, start, stop):
+        """Registra o programa e devolve False se ele deve ser descartado."""
+        return self.accept_interval(channel, parse_xmltv_time(start), parse_xmltv_time(stop))
+
+    def accept_interval(self, channel, start_ts, stop_ts):
+        """Como accept, mas com os horários já convertidos por parse_xmltv_time."""
+        if start_ts is None:
+            return True
+        if stop_ts is None or stop_ts <= start_ts:
+            stop_ts = start_ts + 1
+
+        intervals = self._channels.get(channel)
+        if intervals is not None:
+            starts, stops, max_stops = intervals
+            i = bisect_right(starts, start_ts)
+            if i and max_stops[i - 1] > start_ts:
+                if any(stops[j] == stop_ts for j in range(bisect_left(starts, start_ts), i)):
+                    self.duplicates += 1
+                else:
+                    self.overlaps += 1
+                return False
+            if i < len(starts) and starts[i] < stop_ts:
+                self.overlaps += 1
+                return False
+
+        pending = self._pending.get(channel)
+        if pending is None:
+            pending = self._pending[channel] = array('q')
+        pending.extend((start_ts, stop_ts))
+        if self._journal is not None:
+            self._journal.setdefault(channel, array('q')).extend((start_ts, stop_ts))
+        return True
+
+    def end_source(self):
+        """Fim da fonte atual: os programas aceitos dela passam a valer contra as próximas."""
+        pending, self._pending = self._pending, {}
+        for channel, values in pending.items():
+            self._add(channel, values)
+
+    def _add(self, channel, values):
+        intervals = self._channels.get(channel)
+        pairs = list(zip(values[::2], values[1::2]))
+        if intervals is not None:
+            pairs.extend(zip(intervals[0], intervals[1]))
+        pairs.sort()
+        starts, stops, max_stops = array('q'), array('q'), array('q')
+        highest = None
+        for start_ts, stop_ts in pairs:
+            starts.append(start_ts)
+            stops.append(stop_ts)
+            highest = stop_ts if highest is None or stop_ts > highest else highest
+            max_stops.append(highest)
+        self._channels[channel] = (starts, stops, max_stops)
+
+    def start_journal(self):
+        """Passa a registrar os intervalos aceitos, para salvar o estado de uma fonte."""
+        self._journal = {}
+
+    def take_journal(self):
+        """Devolve {canal: [início, fim, início, fim, ...]} aceitos desde start_journal."""
+        journal, self._journal = self._journal or {}, None
+        return {channel: values.tolist() for channel, values in journal.items()}
+
+    def add_intervals(self, journal):
+        """Recoloca no índice intervalos salvos por take_journal (de uma fonte inteira), sem nova checagem."""
+        self.end_source()
+        for channel, values in journal.items():
+            self._add(channel, values)